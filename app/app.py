@@ -4,15 +4,20 @@ import json
 import io
 import os
 import shutil
+import tempfile
 import matplotlib as mpl
 
 # Local imports
-from utils import configure_fonts, process_dataframe_for_json, prepare_individual_dataframe, prepare_relationships_dataframe
+from utils import configure_fonts, process_dataframe_for_json, prepare_individual_dataframe, prepare_relationships_dataframe, remap_ids
 from engine import PedigreeEngine
-from drawer import draw_pedigree_chart
+from layout_cache import LayoutCache
+from scene import build_scene
+from drawer import draw_scene, raster_dpi
+from svg_writer import scene_to_svg
+from tiles import zip_tiles
 from translation import LANGUAGES
 from pedigree_generator import generate_pedigree_data, parse_input_string
-from parameter import UPLOADER_KEY, CURRENT_JSON_KEY, LANG_KEY, DEFAULT_LANG, LAYOUT_PARAMS, DEFAULT_LAYOUT
+from parameter import UPLOADER_KEY, CURRENT_JSON_KEY, LANG_KEY, ENGINE_KEY, DEFAULT_LANG, LAYOUT_PARAMS, DEFAULT_LAYOUT, ENGINE_CONFIG_KEYS, LAYOUT_PRIORITY_ISOTONIC, LAYOUT_PRIORITY_TIDY, EXPORT_DPI, SCREEN_DPI
 from instructions import render_instructions
 
 # ========================================
@@ -94,6 +99,7 @@ def load_sample_data(data_content, success_message):
         update_layout_params_from_json(data_content)
     
     clear_table_cache()
+    st.session_state.pop(ENGINE_KEY, None)
     st.sidebar.success(success_message)
     st.session_state[UPLOADER_KEY] += 1
     st.rerun()
@@ -227,8 +233,17 @@ def render_layout_settings(L):
     )
     
     layout_priority = (
-        "Children to Parents (Top-down)" if layout_priority_display == L["lp_options"][0] else "Parents to Children (Bottom-up)"
-    )
+        "Children to Parents (Top-down)", "Parents to Children (Bottom-up)", LAYOUT_PRIORITY_ISOTONIC, LAYOUT_PRIORITY_TIDY
+    )[L["lp_options"].index(layout_priority_display)]
+    
+    with st.sidebar.expander(L["advanced"], expanded=False):
+        advanced_inputs = {
+            'layout_tolerance': st.number_input(L["label_lt"], 0.0, 10.0, step=0.01, key="lt_slider", help=L["help_lt"]),
+            'layout_time_budget': st.number_input(L["label_ltb"], 0.0, 60.0, step=0.5, key="ltb_slider", help=L["help_ltb"]),
+            'split_components': st.checkbox(L["label_sc"], key="sc_checkbox", help=L["help_sc"]),
+            'multilevel_layout': st.checkbox(L["label_ml"], key="ml_checkbox", help=L["help_ml"]),
+            'crossing_budget': st.number_input(L["label_cb"], 0.0, 10.0, step=0.1, key="cb_slider", help=L["help_cb"]),
+        }
     
     st.sidebar.subheader(L["sub_visual"])
     
@@ -236,13 +251,17 @@ def render_layout_settings(L):
         'symbol_size': st.sidebar.number_input(L["label_ss"], 0.1, 5.0, step=0.1, key="ss_slider", help=L["help_ss"]),
         'line_width': st.sidebar.number_input(L["label_lw"], 0.5, 5.0, step=0.1, key="lw_slider", help=L["help_lw"]),
         'label_offset': st.sidebar.number_input(L["label_lo"], 0.0, 2.0, step=0.1, key="lo_slider", help=L["help_lo"]),
+        'place_labels': st.sidebar.checkbox(L["label_pl"], key="pl_checkbox", help=L["help_pl"]),
         'font_size': st.sidebar.number_input(L["label_fs"], 5, 20, step=1, key="fs_slider", help=L["help_fs"]),
         'arrow_size': st.sidebar.number_input(L["label_as"], 5, 30, step=1, key="as_slider", help=L["help_as"]),
         'proband_size': st.sidebar.number_input(L["label_pbs"], 5, 30, step=1, key="pbs_slider", help=L["help_pbs"]),
+        'svg_preview': st.sidebar.checkbox(L["label_svp"], key="svp_checkbox", help=L["help_svp"]),
+        'max_megapixels': st.sidebar.number_input(L["label_mp"], 1.0, 500.0, step=10.0, key="mp_input", help=L["help_mp"]),
     }
     
     config = {
         **spacing_inputs,
+        **advanced_inputs,
         **visual_inputs,
         'layout_priority': layout_priority,
         'node_width': 1,
@@ -251,7 +270,7 @@ def render_layout_settings(L):
     return config
 
 
-def render_data_editor():
+def render_data_editor(L):
     """Render data editor section."""
     with st.expander("Edit Data (Table View)", expanded=False):
         # Initialize dataframes if needed using utils function
@@ -282,9 +301,15 @@ def render_data_editor():
                 "carrier": st.column_config.CheckboxColumn("carrier", default=False),
                 "donor": st.column_config.CheckboxColumn("donor", default=False),
                 "surrogate": st.column_config.CheckboxColumn("surrogate", default=False),
+                "pinned": st.column_config.CheckboxColumn("pinned", default=False, help=L["help_pinned"]),
             }
         )
         
+        renumber = st.button(
+            L["label_renumber"],
+            help=L["help_renumber"]
+        )
+        
         st.subheader("Relationships")
         edited_rel = st.data_editor(
             st.session_state.rel_df,
@@ -309,40 +334,111 @@ def render_data_editor():
         )
         current_meta["comments"] = comments
         
-        return edited_ind, edited_rel, current_meta
-
-
-def create_download_button(fig, format_info):
-    """Create a download button for a specific format."""
-    buf = io.BytesIO()
-    
-    if format_info["ext"] in ["svg", "tiff", "pdf"]:
-        fig.savefig(buf, format=format_info["ext"], bbox_inches='tight')
+        return edited_ind, edited_rel, current_meta, renumber
+
+
+def create_download_button(L, fig, format_info, svg=None, max_megapixels=DEFAULT_LAYOUT["max_megapixels"], scene=None):
+    """
+    Create a download button for a specific format; SVG uses the native
+    writer's output when given, raster formats stay within `max_megapixels`
+    and are disabled when that would leave them illegible.
+    Deep-zoom tiles (zip) are rendered from `scene` only after a first click,
+    into a temporary file, and the download button then appears.
+    """
+    if format_info["ext"] == "zip":
+        # Tiles take a while on large charts, so they are built on request only;
+        # they render sequentially here rather than forking the server process
+        if not st.button(f"**{format_info['label']}**", icon=":material/build:", use_container_width=True):
+            return
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "tiles.zip")
+            zip_tiles(scene, path, workers=1)
+            with open(path, "rb") as data:
+                st.download_button(
+                    label=f"**{format_info['label']}**",
+                    data=data,
+                    file_name=f"pedigree_chart.{format_info['ext']}",
+                    mime=format_info["mime"],
+                    icon=":material/download:",
+                    on_click="ignore",
+                    use_container_width=True
+                )
+        return
+    
+    dpi = None
+    if format_info["ext"] not in ["svg", "pdf"]:
+        dpi = raster_dpi(fig, fig.dpi if format_info["ext"] == "tiff" else EXPORT_DPI, max_megapixels)
+        if dpi is None:
+            st.button(f"**{format_info['label']}**", disabled=True, help=L["raster_too_large"],
+                      key=f"raster_{format_info['ext']}", use_container_width=True)
+            return
+    
+    data = io.BytesIO()
+    if format_info["ext"] == "svg" and svg is not None:
+        data.write(svg.encode("utf-8"))
+    elif format_info["ext"] in ["svg", "pdf"]:
+        fig.savefig(data, format=format_info["ext"], bbox_inches='tight')
     else:
-        fig.savefig(buf, format=format_info["ext"], bbox_inches='tight', dpi=300)
-    
-    buf.seek(0)
+        fig.savefig(data, format=format_info["ext"], bbox_inches='tight', dpi=dpi)
+    data.seek(0)
     
     st.download_button(
         label=f"**{format_info['label']}**",
-        data=buf,
+        data=data,
         file_name=f"pedigree_chart.{format_info['ext']}",
         mime=format_info["mime"],
         use_container_width=True
     )
 
 
-def render_pedigree_output(positioned_nodes, relationships, live_config, latest_json_data):
-    """Render pedigree chart and download options."""
+def render_layout_status(L, layout_stats):
+    """Show whether a convergence-driven layout settled, came from the cache or saved positions, fell back from the tidy tree or reduced crossings."""
+    if layout_stats.get("cached"):
+        info = get_layout_cache().info()
+        st.caption(L["layout_cached"].format(info["hits"], info["misses"]))
+    if layout_stats.get("restored"):
+        st.caption(L["layout_restored"])
+    if layout_stats.get("tidy") is False:
+        st.caption(L["layout_tidy_fallback"])
+    before, after = layout_stats.get("crossings", (0, 0))
+    if after < before:
+        st.caption(L["layout_crossings"].format(before, after))
+    
+    if layout_stats.get("converged") is None:
+        return
+    
+    iterations = layout_stats["iterations"]
+    residual = layout_stats["residual"] or 0.0
+    if layout_stats["converged"]:
+        st.caption(L["layout_converged"].format(iterations, residual))
+    else:
+        st.warning(L["layout_not_converged"].format(iterations, residual))
+
+
+def render_pedigree_output(L, positioned_nodes, relationships, live_config, latest_json_data):
+    """Render pedigree chart and download options; too wide a chart for a legible image is previewed as SVG."""
     st.subheader("Pedigree Chart")
     
-    fig = draw_pedigree_chart(
+    # Geometry is computed once; matplotlib and the SVG writer both draw from it.
+    # The figure is sized from the chart extents, so raster DPIs are capped by pixel count
+    scene = build_scene(
         positioned_nodes,
         relationships,
         live_config,
         meta=latest_json_data["meta"]
     )
-    st.pyplot(fig)
+    svg = scene_to_svg(scene)
+    fig = draw_scene(scene)
+    max_megapixels = live_config.get("max_megapixels", DEFAULT_LAYOUT["max_megapixels"])
+    screen_dpi = raster_dpi(fig, SCREEN_DPI, max_megapixels)
+    if screen_dpi is None:
+        st.caption(L["raster_too_large"])
+    if live_config.get("svg_preview") or screen_dpi is None:
+        st.image(svg, use_container_width=True)
+    else:
+        buf = io.BytesIO()
+        fig.savefig(buf, format="png", bbox_inches='tight', dpi=screen_dpi)
+        st.image(buf, use_container_width=True)
     
     st.markdown("### Download Options")
     
@@ -352,14 +448,20 @@ def render_pedigree_output(positioned_nodes, relationships, live_config, latest_
         {"label": "JPEG", "ext": "jpg", "mime": "image/jpeg"},
         {"label": "TIFF", "ext": "tiff", "mime": "image/tiff"},
         {"label": "PDF", "ext": "pdf", "mime": "application/pdf"},
+        {"label": "Deep Zoom", "ext": "zip", "mime": "application/zip"},
     ]
 
-    cols = st.columns(5)
+    cols = st.columns(len(formats))
     for i, fmt in enumerate(formats):
         with cols[i]:
-            create_download_button(fig, fmt)
+            create_download_button(L, fig, fmt, svg=svg, max_megapixels=max_megapixels, scene=scene)
     
-    json_str = json.dumps(latest_json_data, indent=2)
+    # Positions are saved with the data so reopening the chart skips the layout
+    positions = {
+        "key": positions_key(latest_json_data, live_config),
+        "x": {pid: node["x"] for pid, node in positioned_nodes.items()},
+    }
+    json_str = json.dumps(dict(latest_json_data, positions=positions), indent=2)
     with cols[0]:
         st.download_button(
             "**Save Data (JSON)**",
@@ -398,6 +500,66 @@ def render_readme():
 # Main Application
 # ========================================
 
+# ========================================
+# Layout
+# ========================================
+
+@st.cache_resource
+def get_layout_cache():
+    """Layout result cache shared by all sessions."""
+    return LayoutCache()
+
+
+def positions_key(json_data, live_config):
+    """Hash of everything saved positions depend on; a match means they can be reused as-is."""
+    layout_args = {k: live_config.get(k) for k in ENGINE_CONFIG_KEYS}
+    return LayoutCache.make_key(json_data["individual"], json_data["relationships"], live_config, layout_args)
+
+
+def compute_layout(latest_json_data, live_config):
+    """
+    Lay out the pedigree, reusing the engine from the previous rerun when the
+    layout settings are unchanged so that data edits only relayout what changed.
+    The first new engine after loading restores the positions saved in the
+    JSON when nothing they depend on changed, and otherwise starts the passes
+    from them; they are dropped after that, so later rebuilds start afresh.
+    """
+    config_key = tuple(live_config.get(k) for k in ENGINE_CONFIG_KEYS)
+    cached = st.session_state.get(ENGINE_KEY)
+    
+    if cached is not None and cached[0] == config_key:
+        engine = cached[1]
+        engine.sync(latest_json_data)
+        positioned_nodes = engine.relayout(priority=live_config['layout_priority'])
+    else:
+        engine = PedigreeEngine(latest_json_data, live_config)
+        layout_args = dict(
+            adjustment_iterations=live_config['adjustment_iterations'],
+            priority=live_config['layout_priority'],
+            tolerance=live_config['layout_tolerance'] or None,
+            time_budget=live_config['layout_time_budget'] or None,
+            multilevel=live_config['multilevel_layout'],
+            crossing_budget=live_config['crossing_budget'] or None,
+        )
+        saved = st.session_state[CURRENT_JSON_KEY].pop("positions", None) or {}
+        if saved.get("key") == positions_key(latest_json_data, live_config) and engine.restore_positions(saved.get("x", {}), **layout_args):
+            st.session_state[ENGINE_KEY] = (config_key, engine)
+            return engine, engine.nodes
+        
+        positioned_nodes = engine.calculate_layout(
+            **layout_args,
+            split_components=live_config['split_components'],
+            # Families are laid out one after another here rather than
+            # forking the server process
+            workers=1,
+            initial_positions=saved.get("x") or None,
+            cache=get_layout_cache()
+        )
+        st.session_state[ENGINE_KEY] = (config_key, engine)
+    
+    return engine, positioned_nodes
+
+
 def main():
     """Main application entry point."""
     clear_matplotlib_cache()
@@ -423,20 +585,28 @@ def main():
     initialize_layout_defaults()
     live_config = render_layout_settings(L)
     
-    edited_ind, edited_rel, current_meta = render_data_editor()
+    edited_ind, edited_rel, current_meta, renumber = render_data_editor(L)
     
     latest_json_data = process_dataframe_for_json(
         edited_ind, edited_rel, current_meta, live_config
     )
     
     if latest_json_data:
-        engine = PedigreeEngine(latest_json_data, live_config)
-        positioned_nodes = engine.calculate_layout(
-            adjustment_iterations=live_config['adjustment_iterations'],
-            priority=live_config['layout_priority']
-        )
+        engine, positioned_nodes = compute_layout(latest_json_data, live_config)
+        
+        if renumber:
+            # Current positions go along, so the chart keeps its layout under the new IDs
+            current = dict(latest_json_data, positions={"x": engine.positions()})
+            st.session_state[CURRENT_JSON_KEY] = remap_ids(current, engine.canonical_ids())
+            clear_table_cache()
+            st.session_state.pop(ENGINE_KEY, None)
+            st.toast(L["ids_renumbered"])
+            st.rerun()
+        
+        render_layout_status(L, engine.layout_stats)
         
         render_pedigree_output(
+            L,
             positioned_nodes,
             latest_json_data["relationships"],
             live_config,
@@ -0,0 +1,524 @@
+"""
+Layout benchmarks.
+
+Usage (from the app directory):
+    python benchmark.py            # run all benchmarks
+    python benchmark.py spacing    # run a single benchmark
+"""
+import argparse
+import glob
+import io
+import json
+import math
+import os
+import random
+import time
+from array import array
+
+from engine import PedigreeEngine
+from parameter import DEFAULT_LAYOUT, EXPORT_DPI, LAYOUT_PRIORITY_ISOTONIC, LAYOUT_PRIORITY_TIDY
+from utils import int_to_roman
+
+
+def make_wide_pedigree(families, children):
+    """
+    Build a two-generation pedigree: `families` founder couples in generation I,
+    each with `children` children, so generation II is one wide cousin set.
+    """
+    individuals = []
+    relationships = []
+    child_no = 1
+
+    for f in range(families):
+        father = f"I-{2 * f + 1}"
+        mother = f"I-{2 * f + 2}"
+        individuals.append({"id": father, "gender": "M"})
+        individuals.append({"id": mother, "gender": "F"})
+
+        kids = []
+        for _ in range(children):
+            cid = f"II-{child_no}"
+            child_no += 1
+            individuals.append({"id": cid, "gender": "M" if child_no % 2 else "F"})
+            kids.append(cid)
+
+        relationships.append({"p1": father, "p2": mother, "children": kids})
+
+    return {"individual": individuals, "relationships": relationships}
+
+
+def make_deep_pedigree(generations, children):
+    """
+    Build a descendant pedigree: every child marries in and has `children`
+    children of their own, for `generations` generations.
+    """
+    individuals = [{"id": "I-1", "gender": "M"}, {"id": "I-2", "gender": "F"}]
+    relationships = []
+    couples = [("I-1", "I-2")]
+
+    for g in range(2, generations + 1):
+        roman = int_to_roman(g)
+        number = 1
+        next_couples = []
+
+        for p1, p2 in couples:
+            kids = []
+            for _ in range(children):
+                cid = f"{roman}-{number}"
+                sid = f"{roman}-{number + 1}"
+                number += 2
+                individuals.append({"id": cid, "gender": "M"})
+                individuals.append({"id": sid, "gender": "F"})
+                kids.append(cid)
+                next_couples.append((cid, sid))
+            relationships.append({"p1": p1, "p2": p2, "children": kids})
+
+        couples = next_couples
+
+    return {"individual": individuals, "relationships": relationships}
+
+
+def make_forest(families, generations, children):
+    """
+    Build `families` unrelated copies of make_deep_pedigree(generations, children),
+    renumbering IDs so every copy is distinct.
+    """
+    tree = make_deep_pedigree(generations, children)
+    individuals = []
+    relationships = []
+
+    for f in range(families):
+        def rename(pid):
+            roman, number = pid.split("-")
+            return f"{roman}-{f * len(tree['individual']) + int(number)}"
+
+        individuals.extend(dict(person, id=rename(person["id"])) for person in tree["individual"])
+        relationships.extend(
+            {"p1": rename(rel["p1"]), "p2": rename(rel["p2"]), "children": [rename(c) for c in rel["children"]]}
+            for rel in tree["relationships"]
+        )
+
+    return {"individual": individuals, "relationships": relationships}
+
+
+def shuffle_ids(data, seed=0):
+    """Renumber individuals randomly within each generation, like an imported pedigree."""
+    rng = random.Random(seed)
+    by_roman = {}
+    for person in data["individual"]:
+        by_roman.setdefault(person["id"].split("-")[0], []).append(person["id"])
+
+    mapping = {}
+    for roman, ids in by_roman.items():
+        numbers = list(range(1, len(ids) + 1))
+        rng.shuffle(numbers)
+        mapping.update((pid, f"{roman}-{n}") for pid, n in zip(ids, numbers))
+
+    return {
+        "individual": [dict(person, id=mapping[person["id"]]) for person in data["individual"]],
+        "relationships": [
+            dict(rel, p1=mapping[rel["p1"]], p2=mapping[rel["p2"]], children=[mapping[c] for c in rel["children"]])
+            for rel in data["relationships"]
+        ],
+    }
+
+
+def make_config(**overrides):
+    config = dict(DEFAULT_LAYOUT)
+    config.update(overrides)
+    return config
+
+
+def best_of(func, repeat=3):
+    """Best wall-clock time of `repeat` runs, in seconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _enforce_spacing_quadratic(engine, gen):
+    """Previous O(n^2) spacing pass, kept as the benchmark baseline."""
+    nids = engine.generations.get(gen, [])
+    xs = engine.store.x
+    gaps = engine.spacing[gen]
+
+    for i in range(1, len(nids)):
+        min_x = xs[nids[i-1]] + engine.NODE_WIDTH + gaps[i-1]
+        if xs[nids[i]] < min_x - 0.001:
+            shift = min_x - xs[nids[i]]
+            for j in range(i, len(nids)):
+                xs[nids[j]] += shift
+
+
+def bench_spacing():
+    """_enforce_spacing on one wide generation: linear sweep vs. quadratic baseline."""
+    print(f"{'members':>8} {'quadratic [s]':>14} {'linear [s]':>11} {'speedup':>8} {'max |dx|':>9}")
+
+    for families in (50, 200, 500, 1000):
+        engine = PedigreeEngine(make_wide_pedigree(families, 4), make_config())
+        engine._build_tables()
+        engine._initial_layout()
+        # Centering sibships under their parents creates the overlaps to resolve
+        engine._align_children_to_parents(2)
+        start = array('d', engine.store.x)
+
+        def run(func):
+            engine.store.x[:] = start
+            func(engine, 2)
+
+        t_old = best_of(lambda: run(_enforce_spacing_quadratic))
+        expected = array('d', engine.store.x)
+        t_new = best_of(lambda: run(PedigreeEngine._enforce_spacing))
+        max_dx = max(abs(a - b) for a, b in zip(expected, engine.store.x))
+
+        members = len(engine.generations[2])
+        print(f"{members:>8} {t_old:>14.4f} {t_new:>11.4f} {t_old / t_new:>7.0f}x {max_dx:>9.1e}")
+
+
+def relative_deviation(a, b):
+    """Max |x_a - x_b| over all nodes, relative to the horizontal extent of `a`."""
+    xs = [n["x"] for n in a.values()]
+    extent = max(xs) - min(xs) or 1.0
+    return max(abs(a[nid]["x"] - b[nid]["x"]) for nid in a) / extent
+
+
+def bench_vectorized():
+    """calculate_layout: dict/array passes vs. vectorized NumPy passes."""
+    cases = [
+        ("wide 1000x4", make_wide_pedigree(1000, 4)),
+        ("deep 6 gen x3", make_deep_pedigree(6, 3)),
+        ("deep 7 gen x4", make_deep_pedigree(7, 4)),
+    ]
+    iterations = 5
+    print(f"{'pedigree':>14} {'nodes':>6} {'python [s]':>11} {'numpy [s]':>10} {'speedup':>8} {'rel. dev':>9}")
+
+    for name, data in cases:
+        config = make_config()
+        py_engine = PedigreeEngine(data, config)
+        np_engine = PedigreeEngine(data, config)
+
+        t_py = best_of(lambda: py_engine.calculate_layout(iterations))
+        t_np = best_of(lambda: np_engine.calculate_layout(iterations, vectorized=True))
+        deviation = relative_deviation(py_engine.nodes, np_engine.nodes)
+
+        print(f"{name:>14} {len(py_engine.nodes):>6} {t_py:>11.4f} {t_np:>10.4f} {t_py / t_np:>7.1f}x {deviation:>9.1e}")
+
+
+def bench_components():
+    """Build + calculate_layout: whole graph vs. per-family layout, sequential and on a process pool."""
+    cases = [
+        ("12 x deep 5x3", make_forest(12, 5, 3)),
+        ("8 x deep 6x3", make_forest(8, 6, 3)),
+        ("4 x deep 7x4", make_forest(4, 7, 4)),
+    ]
+    iterations = 5
+    workers = os.cpu_count()
+    print(f"{workers} CPU(s)")
+    print(f"{'pedigree':>14} {'nodes':>6} {'families':>9} {'whole [s]':>10} {'split [s]':>10} {'pool [s]':>9}")
+
+    for name, data in cases:
+        config = make_config()
+
+        def run(**kwargs):
+            engine = PedigreeEngine(data, config)
+            engine.calculate_layout(iterations, **kwargs)
+            return engine
+
+        t_whole = best_of(run)
+        t_split = best_of(lambda: run(split_components=True, workers=1))
+        t_pool = best_of(lambda: run(split_components=True, workers=workers))
+        engine = run(split_components=True, workers=1)
+        families = sum(len(nids) > 1 for nids in engine._connected_components())
+
+        print(f"{name:>14} {len(engine.nodes):>6} {families:>9} {t_whole:>10.4f} {t_split:>10.4f} {t_pool:>9.4f}")
+
+
+def alignment_error(engine):
+    """Mean |sibship center - parents center| over all sibships."""
+    xs = engine.store.x
+    errors = []
+    for groups in engine.sibling_groups.values():
+        for _, p_tuple, sib_ids in groups:
+            parents = sum(xs[p] for p in p_tuple) / len(p_tuple)
+            sibs = (min(xs[s] for s in sib_ids) + max(xs[s] for s in sib_ids)) / 2
+            errors.append(abs(parents - sibs))
+    return sum(errors) / len(errors) if errors else 0.0
+
+
+def bench_isotonic():
+    """Bundled samples to tolerance 0.01: alternating passes vs. isotonic projection."""
+    samples = sorted(glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)), "samples", "*.json")))
+    priorities = [("passes", "Children to Parents (Top-down)"), ("isotonic", LAYOUT_PRIORITY_ISOTONIC)]
+    print(f"{'sample':>24} {'mode':>9} {'sweeps':>7} {'residual':>9} {'time [s]':>9} {'width':>6} {'align err':>10}")
+
+    for path in samples:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        config = make_config(**data.get("layout", {}))
+        name = os.path.splitext(os.path.basename(path))[0][:24]
+
+        for mode, priority in priorities:
+            engine = PedigreeEngine(data, config)
+            elapsed = best_of(lambda: engine.calculate_layout(1, priority, tolerance=0.01))
+            stats = engine.layout_stats
+            xs = [n["x"] for n in engine.nodes.values()]
+            print(f"{name:>24} {mode:>9} {stats['iterations']:>7} {stats['residual']:>9.3f} "
+                  f"{elapsed:>9.4f} {max(xs) - min(xs):>6.1f} {alignment_error(engine):>10.3f}")
+
+
+def bench_tidy():
+    """Descendant pedigrees: alignment passes (5 sweeps) vs. one tidy-tree pass."""
+    cases = [
+        ("deep 5 gen x3", make_deep_pedigree(5, 3)),
+        ("deep 7 gen x4", make_deep_pedigree(7, 4)),
+        ("deep 8 gen x4", make_deep_pedigree(8, 4)),
+    ]
+    print(f"{'pedigree':>14} {'nodes':>6} {'mode':>7} {'time [s]':>9} {'width':>9} {'align err':>10}")
+
+    for name, data in cases:
+        for mode, priority in (("passes", "Children to Parents (Top-down)"), ("tidy", LAYOUT_PRIORITY_TIDY)):
+            engine = PedigreeEngine(data, make_config())
+            elapsed = best_of(lambda: engine.calculate_layout(5, priority))
+            engine._ensure_tables()
+            xs = [n["x"] for n in engine.nodes.values()]
+            print(f"{name:>14} {len(engine.nodes):>6} {mode:>7} {elapsed:>9.4f} "
+                  f"{max(xs) - min(xs):>9.3g} {alignment_error(engine):>10.3g}")
+
+
+def bench_multilevel():
+    """Growing forests: single-level passes vs. multilevel coarsen/refine (3 sweeps, levels reused across runs)."""
+    cases = [
+        ("25 x 3x2", make_forest(25, 3, 2)),
+        ("100 x 3x2", make_forest(100, 3, 2)),
+        ("400 x 3x2", make_forest(400, 3, 2)),
+        ("1600 x 3x2", make_forest(1600, 3, 2)),
+    ]
+    print(f"{'pedigree':>12} {'nodes':>6} {'mode':>10} {'levels':>6} {'time [s]':>9} {'us/node':>8} {'width':>9} {'align err':>10}")
+
+    for name, data in cases:
+        for mode, multilevel in (("single", False), ("multilevel", True)):
+            engine = PedigreeEngine(data, make_config())
+            elapsed = best_of(lambda: engine.calculate_layout(3, multilevel=multilevel))
+            engine._ensure_tables()
+            xs = [n["x"] for n in engine.nodes.values()]
+            print(f"{name:>12} {len(xs):>6} {mode:>10} {engine.layout_stats.get('levels', 1):>6} {elapsed:>9.4f} "
+                  f"{elapsed / len(xs) * 1e6:>8.1f} {max(xs) - min(xs):>9.3g} {alignment_error(engine):>10.3g}")
+
+
+def bench_ordering():
+    """Shuffled IDs: crossings in ID order vs. after crossing reduction (1 s budget)."""
+    cases = [
+        ("deep 5x3", shuffle_ids(make_deep_pedigree(5, 3))),
+        ("deep 6x3", shuffle_ids(make_deep_pedigree(6, 3))),
+        ("30 x deep 3x2", shuffle_ids(make_forest(30, 3, 2))),
+        ("200 x deep 3x2", shuffle_ids(make_forest(200, 3, 2))),
+    ]
+    print(f"{'pedigree':>15} {'nodes':>6} {'crossings':>10} {'reduced':>8} {'order [s]':>10}")
+
+    for name, data in cases:
+        engine = PedigreeEngine(data, make_config())
+        start = time.perf_counter()
+        engine.calculate_layout(0, crossing_budget=1.0)
+        elapsed = time.perf_counter() - start
+        before, after = engine.layout_stats["crossings"]
+        print(f"{name:>15} {len(engine.nodes):>6} {before:>10} {after:>8} {elapsed:>10.4f}")
+
+
+def bench_warm_start():
+    """Reopening a laid-out pedigree: cold layout vs. restored vs. warm start after one removal (tolerance 0.01)."""
+    cases = [
+        ("wide 1000x4", make_wide_pedigree(1000, 4)),
+        ("400 x deep 3x2", make_forest(400, 3, 2)),
+    ]
+    print(f"{'pedigree':>15} {'mode':>9} {'sweeps':>7} {'time [s]':>9}")
+
+    for name, data in cases:
+        config = make_config()
+        engine = PedigreeEngine(data, config)
+        cold = best_of(lambda: engine.calculate_layout(0, tolerance=0.01))
+        print(f"{name:>15} {'cold':>9} {engine.layout_stats['iterations']:>7} {cold:>9.4f}")
+        positions = engine.positions()
+
+        restored = PedigreeEngine(data, config)
+        elapsed = best_of(lambda: restored.restore_positions(positions))
+        print(f"{name:>15} {'restored':>9} {0:>7} {elapsed:>9.4f}")
+
+        # One child of the first family removed
+        child = data["relationships"][0]["children"][-1]
+        edited = {
+            "individual": [p for p in data["individual"] if p["id"] != child],
+            "relationships": [dict(r, children=[c for c in r["children"] if c != child]) for r in data["relationships"]],
+        }
+        warm = PedigreeEngine(edited, config)
+        elapsed = best_of(lambda: warm.calculate_layout(0, tolerance=0.01, initial_positions=positions))
+        print(f"{name:>15} {'warm':>9} {warm.layout_stats['iterations']:>7} {elapsed:>9.4f}")
+
+
+def bench_render():
+    """Chart drawing time with the number of artists, PNG export time and size at the capped export DPI, and native SVG export time and size."""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    from drawer import draw_pedigree_chart, raster_dpi
+    from scene import build_scene
+    from svg_writer import write_svg
+
+    cases = [
+        ("wide 5x2", make_wide_pedigree(5, 2)),
+        ("wide 250x4", make_wide_pedigree(250, 4)),
+        ("wide 1000x4", make_wide_pedigree(1000, 4)),
+    ]
+    print(f"{'pedigree':>12} {'nodes':>6} {'artists':>8} {'draw [s]':>9} {'inches':>13} {'dpi':>5} "
+          f"{'png [MP]':>9} {'savefig [s]':>12} {'svg [s]':>8} {'svg [KB]':>9}")
+
+    for name, data in cases:
+        config = make_config()
+        nodes = PedigreeEngine(data, config).calculate_layout(1)
+        start = time.perf_counter()
+        fig = draw_pedigree_chart(nodes, data["relationships"], config)
+        drawn = time.perf_counter() - start
+        ax = fig.axes[0]
+        artists = len(ax.lines) + len(ax.collections) + len(ax.patches) + len(ax.texts)
+        width, height = fig.get_size_inches()
+        # None: too large for a legible PNG, which the app does not offer
+        dpi = raster_dpi(fig, EXPORT_DPI, DEFAULT_LAYOUT["max_megapixels"])
+        saved = math.nan
+        if dpi is not None:
+            start = time.perf_counter()
+            fig.savefig(io.BytesIO(), format="png", dpi=dpi)
+            saved = time.perf_counter() - start
+        plt.close(fig)
+
+        svg = io.StringIO()
+        start = time.perf_counter()
+        write_svg(build_scene(nodes, data["relationships"], config), svg)
+        written = time.perf_counter() - start
+        print(f"{name:>12} {len(nodes):>6} {artists:>8} {drawn:>9.4f} {f'{width:.0f}x{height:.0f}':>13} {dpi or math.nan:>5.0f} "
+              f"{width * height * (dpi or math.nan) ** 2 / 1e6:>9.1f} {saved:>12.4f} "
+              f"{written:>8.4f} {len(svg.getvalue()) / 1024:>9.0f}")
+
+
+def bench_tiles():
+    """Deep-zoom tile export: tile count and time, sequential and on a process pool, with the largest tile file."""
+    import matplotlib
+    matplotlib.use("Agg")
+    import tempfile
+    from scene import build_scene
+    from tiles import TilePyramid, write_tiles
+
+    cases = [
+        ("wide 25x4", make_wide_pedigree(25, 4)),
+        ("wide 100x4", make_wide_pedigree(100, 4)),
+    ]
+    workers = os.cpu_count() or 1
+    print(f"{'pedigree':>12} {'nodes':>6} {'pixels':>12} {'levels':>7} {'tiles':>6} "
+          f"{'1 worker [s]':>13} {f'{workers} workers [s]':>15} {'max tile [KB]':>14}")
+
+    for name, data in cases:
+        config = make_config()
+        nodes = PedigreeEngine(data, config).calculate_layout(1)
+        scene = build_scene(nodes, data["relationships"], config)
+        pyramid = TilePyramid(scene)
+        times = []
+        for n in (1, workers):
+            with tempfile.TemporaryDirectory() as directory:
+                start = time.perf_counter()
+                write_tiles(scene, directory, workers=n)
+                times.append(time.perf_counter() - start)
+                sizes = [os.path.getsize(path) for path in glob.glob(os.path.join(directory, "*_files", "*", "*.png"))]
+        print(f"{name:>12} {len(nodes):>6} {f'{pyramid.width}x{pyramid.height}':>12} {pyramid.max_level + 1:>7} "
+              f"{len(sizes):>6} {times[0]:>13.2f} {times[1]:>15.2f} {max(sizes) / 1024:>14.1f}")
+
+
+def bench_labels():
+    """Label placement on a spatial hash: time and overlapping label pairs before and after."""
+    from labels import SpatialHash
+    from scene import build_scene
+
+    def overlaps(scene):
+        # Label pairs whose boxes intersect, found with the same grid
+        grid = SpatialHash()
+        pairs = 0
+        for t in scene.texts:
+            if t.background:
+                box = scene.text_box(t)
+                pairs += grid.count(box)
+                grid.add_box(box)
+        return pairs
+
+    cases = [("wide 250x4", make_wide_pedigree(250, 4)), ("wide 1000x4", make_wide_pedigree(1000, 4))]
+    print(f"{'pedigree':>12} {'labels':>7} {'overlaps':>9} {'placed':>7} {'scene [s]':>10} {'placed [s]':>11}")
+
+    for name, data in cases:
+        for k, person in enumerate(data["individual"]):
+            person["label"] = f"label {k}: long enough to collide"
+        config = make_config()
+        nodes = PedigreeEngine(data, config).calculate_layout(1)
+        start = time.perf_counter()
+        fixed = build_scene(nodes, data["relationships"], make_config(place_labels=False))
+        t_fixed = time.perf_counter() - start
+        start = time.perf_counter()
+        placed = build_scene(nodes, data["relationships"], config)
+        t_placed = time.perf_counter() - start
+        print(f"{name:>12} {len(nodes):>7} {overlaps(fixed):>9} {overlaps(placed):>7} {t_fixed:>10.3f} {t_placed:>11.3f}")
+
+
+def bench_lanes():
+    """U-shape lanes per generation: one new lane per partner line (old counter) vs. interval colouring."""
+    from scene import assign_lanes
+
+    rng = random.Random(0)
+    cases = []
+    for spans, width in ((50, 1000), (1000, 5000), (10000, 20000)):
+        starts = [rng.uniform(0, width) for _ in range(spans)]
+        cases.append((f"{spans} spans", [(x, x + rng.uniform(2, 20)) for x in starts]))
+    # Cousin couples with siblings between them, one per family: disjoint spans
+    cases.append(("1000 disjoint", [(10.0 * k, 10.0 * k + 6) for k in range(1000)]))
+    offset, step = DEFAULT_LAYOUT["u_shape_offset"], 0.5
+    print(f"{'case':>14} {'old lanes':>10} {'new lanes':>10} {'old depth':>10} {'new depth':>10} {'time [s]':>9}")
+
+    for name, spans in cases:
+        start = time.perf_counter()
+        lanes = assign_lanes(spans)
+        elapsed = time.perf_counter() - start
+        new = max(lanes) + 1
+        print(f"{name:>14} {len(spans):>10} {new:>10} {offset + (len(spans) - 1) * step:>10.1f} "
+              f"{offset + (new - 1) * step:>10.1f} {elapsed:>9.4f}")
+
+
+BENCHMARKS = {
+    "spacing": bench_spacing,
+    "vectorized": bench_vectorized,
+    "components": bench_components,
+    "isotonic": bench_isotonic,
+    "tidy": bench_tidy,
+    "multilevel": bench_multilevel,
+    "ordering": bench_ordering,
+    "warm_start": bench_warm_start,
+    "render": bench_render,
+    "tiles": bench_tiles,
+    "labels": bench_labels,
+    "lanes": bench_lanes,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HeredicTree layout benchmarks")
+    parser.add_argument("names", nargs="*", help=f"benchmarks to run: {', '.join(BENCHMARKS)} (default: all)")
+    args = parser.parse_args()
+
+    unknown = [n for n in args.names if n not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(unknown)}")
+
+    for name in args.names or BENCHMARKS:
+        print(f"== {name}: {BENCHMARKS[name].__doc__}")
+        BENCHMARKS[name]()
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,22 @@
-from parameter import ROMAN_TO_INT
-from utils import parse_list_string
+import os
+import time
+from array import array
+from bisect import bisect_right
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from operator import sub
+
+from layout_isotonic import IsotonicPasses
+from layout_numpy import VectorizedPasses
+from layout_order import CrossingMinimizer
+from layout_tidy import TidyTreeLayout
+from node_store import NodeStore
+from parameter import (
+    LAYOUT_PRIORITY_ISOTONIC, LAYOUT_PRIORITY_TIDY, MAX_LAYOUT_ITERATIONS, PARALLEL_LAYOUT_MIN_NODES, MAX_ID_GENERATION,
+    MULTILEVEL_MIN_NODES, MULTILEVEL_MIN_SHRINK, MULTILEVEL_REFINE_SWEEPS,
+    FLAG_ADOPTED_IN, FLAG_ADOPTED_OUT, FLAG_DONOR, FLAG_SURROGATE, FLAG_PINNED,
+)
+from utils import int_to_roman, parse_individual_flags, roman_to_int
 
 
 class PedigreeEngine:
@@ -7,52 +24,83 @@ class PedigreeEngine:
 
     def __init__(self, data, config):
         """Initialize the pedigree engine with data and configuration."""
-        self.raw_ind = data.get("individual", [])
-        self.raw_rel = data.get("relationships", [])
-        self.nodes = {}
+        self.raw_ind = list(data.get("individual", []))
+        self.raw_rel = list(data.get("relationships", []))
+        
+        self._configure(config)
+        
+        # Nodes are interned to integer indices; self.nodes is an {id: node} view
+        self.store = NodeStore(self.NODE_WIDTH)
+        self.nodes = self.store.view()
         self.generations = {}
         
+        self._build_graph()
+    
+    @classmethod
+    def from_store(cls, store, config):
+        """
+        Engine over an already built, frozen NodeStore (e.g. NodeStore.subset),
+        skipping record parsing. It has no relationships, so it is meant for
+        layout only, not for editing.
+        """
+        engine = cls.__new__(cls)
+        engine.raw_ind = [r for r in store.records if r is not None]
+        engine.raw_rel = []
+        engine._configure(config)
+        engine.store = store
+        engine.nodes = store.view()
+        engine.generations = {}
+        engine._rels_by_person = {}
+        engine._rel_sigs = Counter()
+        engine._build_generations()
+        return engine
+    
+    def _configure(self, config):
         # Store configuration
+        self.config = config
         self.GEN_HEIGHT = config['gen_height']
         self.NODE_WIDTH = config['node_width']
         self.MIN_SIB_SPACING = config['min_sib_spacing']
         self.PARTNER_SPACING = config['partner_spacing']
         self.FAMILY_GAP = config['family_gap']
         
-        self._build_graph()
+        # Layout tables are built on first use (see _ensure_tables)
+        self.spacing = None
+        # Coarsened levels of the multilevel layout (see _multilevel_levels)
+        self._hierarchy = None
+        
+        # Incremental editing state (see add_individual ... relayout)
+        self._dirty_gens = set()
+        self._dirty_nodes = set()
+        self._new_nodes = set()
+        self._edited = False
+        self._laid_out = False
+        self._split_args = None
+        self._layout_args = None
+        self._reordered = False
+        # Pinned individuals (with a saved position); the passes never move them
+        self._pinned = set()
+        # Individuals whose ID has no Roman-numeral generation (see _infer_generations)
+        self._implicit = set()
     
-    def _is_affected_code(self, nid, code):
-        if nid not in self.nodes:
-            return False
-        vals = parse_list_string(self.nodes[nid]["data"].get("affected", ""))
-        return code in vals
+    def _is_donor(self, i):
+        """Check if a node is a donor ('donor' field or legacy 'D' affected code)."""
+        return bool(self.store.flags[i] & FLAG_DONOR)
 
-    def _is_donor(self, nid):
-        """Check if a node is a donor based on 'donor' field or 'affected' field."""
-        if nid not in self.nodes:
-            return False
-        # 変更: まず独立したフィールドを確認し、なければaffectedコードを確認
-        is_donor_bool = self.nodes[nid]["data"].get("donor")
-        if is_donor_bool is True or str(is_donor_bool).lower() == 'true':
-            return True
-        return self._is_affected_code(nid, "D")
+    def _is_surrogate(self, i):
+        """Check if a node is a surrogate ('surrogate' field or legacy 'S' affected code)."""
+        return bool(self.store.flags[i] & FLAG_SURROGATE)
 
-    def _is_surrogate(self, nid):
-        """Check if a node is a surrogate based on 'surrogate' field or 'affected' field."""
-        if nid not in self.nodes:
-            return False
-        
-        # 変更: まず独立したフィールドを確認
-        is_surrogate_bool = self.nodes[nid]["data"].get("surrogate")
-        if is_surrogate_bool is True or str(is_surrogate_bool).lower() == 'true':
-            return True
-            
-        # 互換性のためのフォールバック
-        return self._is_affected_code(nid, "S")
-    
     def _parse_gen(self, pid):
-        prefix = pid.split("-")[0]
-        return ROMAN_TO_INT.get(prefix, 1)
+        """Generation from a Roman-numeral ID prefix ('XXIV-3' -> 24), or None."""
+        prefix, dash, _ = pid.partition("-")
+        if not dash:
+            return None
+        gen = roman_to_int(prefix)
+        # 'C-1', 'D-2', 'M-3' are more likely names than generations 100+
+        if gen is None or gen > MAX_ID_GENERATION:
+            return None
+        return gen
     
     def _parse_individual_number(self, pid):
         try:
@@ -63,25 +111,30 @@ class PedigreeEngine:
     def _initialize_node(self, person):
         pid = person["id"]
         gen = self._parse_gen(pid)
+        explicit = gen is not None
+        if not explicit:
+            # Placeholder until _infer_generations
+            gen = 1
+        flags, fill = parse_individual_flags(person)
         
-        return {
-            "data": person,
-            "id": pid,
-            "gen": gen,
-            "spouse_ids": [],
-            "children_ids": [],
-            "parent_ids": [],
-            "adopted_in": False,
-            "adopted_out": False,
-            "x": 0.0,
-            "y": -(gen * self.GEN_HEIGHT),
-            "width_val": self.NODE_WIDTH,
-            "sort_idx": self._parse_individual_number(pid)
-        }
+        i = self.store.add(
+            pid,
+            person,
+            gen=gen,
+            y=-(gen * self.GEN_HEIGHT),
+            sort_idx=self._parse_individual_number(pid),
+            flags=flags,
+            fill=fill,
+        )
+        if explicit:
+            self._implicit.discard(i)
+        else:
+            self._implicit.add(i)
+        return i
     
     def _link_partners(self, p1, p2):
         """Link two partners in the graph."""
-        if p1 == p2 or p1 not in self.nodes or p2 not in self.nodes:
+        if p1 == p2:
             return
         
         # Don't link if either is a donor or surrogate (visual separation)
@@ -90,38 +143,27 @@ class PedigreeEngine:
         if self._is_surrogate(p1) or self._is_surrogate(p2):
             return
         
-        if p2 not in self.nodes[p1]["spouse_ids"]:
-            self.nodes[p1]["spouse_ids"].append(p2)
-        if p1 not in self.nodes[p2]["spouse_ids"]:
-            self.nodes[p2]["spouse_ids"].append(p1)
+        self.store.link_partners(p1, p2)
     
     def _link_parent_child(self, parent, child):
         """Link parent and child in the graph."""
-        if parent not in self.nodes or child not in self.nodes:
-            return
-        
         # Don't link if parent is a donor (stops them from being pulled together too closely)
         # Note: Surrogates ARE linked to pull child near them, 
         # but _link_partners prevents horizontal adjacency with intended parent.
         if self._is_donor(parent):
             return
         
-        if parent not in self.nodes[child]["parent_ids"]:
-            self.nodes[child]["parent_ids"].append(parent)
-        
-        if child not in self.nodes[parent]["children_ids"]:
-            self.nodes[parent]["children_ids"].append(child)
+        self.store.link_parent_child(parent, child)
     
     def _process_relationship(self, rel):
-        p1 = rel.get("p1")
-        p2 = rel.get("p2")
+        index = self.store.index
+        p1 = index.get(rel.get("p1")) if rel.get("p1") else None
         
-        if not p1 or p1 not in self.nodes:
+        if p1 is None:
             return
         
-        if not p2:
-            p2 = p1
-        if p2 not in self.nodes:
+        p2 = index.get(rel.get("p2")) if rel.get("p2") else None
+        if p2 is None:
             p2 = p1
         
         self._link_partners(p1, p2)
@@ -131,44 +173,208 @@ class PedigreeEngine:
         out_list = rel.get("adopted_out", [])
         
         for child in children:
-            if child not in self.nodes:
+            c = index.get(child)
+            if c is None:
                 continue
             
-            self._link_parent_child(p1, child)
+            self._link_parent_child(p1, c)
             if p1 != p2:
-                self._link_parent_child(p2, child)
+                self._link_parent_child(p2, c)
             
             if child in in_list:
-                self.nodes[child]["adopted_in"] = True
+                self.store.flags[c] |= FLAG_ADOPTED_IN
             if child in out_list:
-                self.nodes[child]["adopted_out"] = True
+                self.store.flags[c] |= FLAG_ADOPTED_OUT
     
     def _build_graph(self):
+        self._implicit = set()
         for person in self.raw_ind:
-            pid = person["id"]
-            self.nodes[pid] = self._initialize_node(person)
+            self._initialize_node(person)
         
+        self._rels_by_person = {}
+        self._rel_sigs = Counter()
         for rel in self.raw_rel:
+            self._index_relationship(rel)
             self._process_relationship(rel)
         
-        for nid, node in self.nodes.items():
-            gen = node["gen"]
+        self.store.freeze()
+        if self._implicit:
+            self._infer_generations()
+        self._build_generations()
+    
+    def _infer_generations(self):
+        """
+        Assign generations to individuals whose ID has no Roman-numeral prefix.
+        
+        Partners are merged into units, and units are levelled in topological
+        order of the parent-child edges: a unit sits one level below its
+        lowest parent unit. Founder units are then moved down to just above
+        their highest child unit. Each family holding explicit Roman IDs is
+        shifted so its levels agree with most of them, and further down if that
+        would put anyone above generation I; other families start at
+        generation I. Linear in individuals plus relationships. Edges come
+        from the relationships, so donors and surrogates are levelled too.
+        """
+        store = self.store
+        index = store.index
+        n = len(store)
+        
+        def find(root, i):
+            while root[i] != i:
+                root[i] = root[root[i]]
+                i = root[i]
+            return i
+        
+        def union(root, a, b):
+            a, b = find(root, a), find(root, b)
+            if a != b:
+                root[b] = a
+        
+        # Partner units, and families (units joined by parent-child edges)
+        unit = list(range(n))
+        family = list(range(n))
+        edges = []
+        for rel in self.raw_rel:
+            parents = [index[p] for p in (rel.get("p1"), rel.get("p2")) if p and p in index]
+            if len(parents) == 2:
+                union(unit, *parents)
+                union(family, *parents)
+            for child in rel.get("children", []):
+                c = index.get(child)
+                if c is None or not parents:
+                    continue
+                edges.append((parents[0], c))
+                union(family, parents[0], c)
+        
+        # Unit DAG; edges inside a unit (a parent marrying a child) are dropped
+        succ = {}
+        indegree = Counter()
+        for p, c in edges:
+            pu, cu = find(unit, p), find(unit, c)
+            if pu != cu:
+                succ.setdefault(pu, []).append(cu)
+                indegree[cu] += 1
+        
+        units = {find(unit, i) for i in index.values()}
+        level = dict.fromkeys(units, 0)
+        order = [u for u in units if not indegree[u]]
+        founders = set(order)
+        remaining = Counter(indegree)
+        k = 0
+        while k < len(order):
+            u = order[k]
+            k += 1
+            for v in succ.get(u, ()):
+                level[v] = max(level[v], level[u] + 1)
+                remaining[v] -= 1
+                if not remaining[v]:
+                    order.append(v)
+        # Units on a parent-child cycle never reach indegree 0 and keep the level reached
+        
+        for u in founders:
+            if u in succ:
+                level[u] = min(level[v] for v in succ[u]) - 1
+        
+        offsets = {}
+        for i in index.values():
+            if i not in self._implicit:
+                offsets.setdefault(find(family, i), Counter())[store.gen[i] - level[find(unit, i)]] += 1
+        
+        family_offset = {}
+        for i in self._implicit:
+            f = find(family, i)
+            if f not in family_offset:
+                votes = offsets.get(f)
+                family_offset[f] = votes.most_common(1)[0][0] if votes else 1
+        # A family whose inferred levels would reach above generation I moves
+        # down as a whole, so parents and children stay in separate rows
+        top = {}
+        for i in self._implicit:
+            f = find(family, i)
+            top[f] = min(top.get(f, 1), level[find(unit, i)] + family_offset[f])
+        for f, gen in top.items():
+            family_offset[f] += 1 - gen
+        
+        for i in self._implicit:
+            gen = level[find(unit, i)] + family_offset[find(family, i)]
+            store.gen[i] = gen
+            store.y[i] = -(gen * self.GEN_HEIGHT)
+    
+    def _build_generations(self):
+        for i in self.store.index.values():
+            gen = self.store.gen[i]
             if gen not in self.generations:
                 self.generations[gen] = []
-            self.generations[gen].append(nid)
+            self.generations[gen].append(i)
         
+        self._sort_generations()
+    
+    def _sort_generations(self):
+        """Order every generation by individual number (invalidates the layout tables)."""
+        sort_idx = self.store.sort_idx
         for gen in self.generations:
-            self.generations[gen].sort(key=lambda x: self.nodes[x]["sort_idx"])
+            self.generations[gen].sort(key=lambda i: sort_idx[i])
+        
+        self.spacing = None
+        self._reordered = False
+    
+    def _ensure_tables(self):
+        if self.spacing is None:
+            self._build_tables()
+    
+    def _build_tables(self):
+        """Precompute topology-derived tables reused by every layout pass."""
+        self.sibling_groups = {}
+        self.partner_groups = {}
+        self.spacing = {}
+        
+        for gen in self.generations:
+            self._build_generation_tables(gen)
+    
+    def _build_generation_tables(self, gen):
+        nids = self.generations[gen]
+        
+        # Sibling groups as (anchor, parents, siblings); anchor is a surrogate parent or None
+        sib_groups = []
+        for p_tuple, sib_ids in self._get_sibling_groups(gen).items():
+            anchor = next((p for p in p_tuple if self._is_surrogate(p)), None)
+            sib_groups.append((anchor, p_tuple, sib_ids))
+        self.sibling_groups[gen] = sib_groups
+        
+        # Partner groups as (partners, children), in the order _align_parents_to_children visits them
+        store = self.store
+        partner_groups = []
+        processed = set()
+        for nid in nids:
+            if nid in processed:
+                continue
+            
+            if not store.has_children(nid):
+                continue
+            
+            group_ids = self._get_partner_group(nid, gen)
+            
+            all_children = set()
+            for member_id in group_ids:
+                all_children.update(store.children(member_id))
+            
+            partner_groups.append((group_ids, sorted(all_children)))
+            processed.update(group_ids)
+        self.partner_groups[gen] = partner_groups
+        
+        # spacing[gen][i-1] is the required gap between nids[i-1] and nids[i]
+        self.spacing[gen] = array('d', (
+            self._get_required_spacing(nids[i-1], nids[i]) for i in range(1, len(nids))
+        ))
     
-    def _get_required_spacing(self, left_id, right_id):
-        left_node = self.nodes[left_id]
-        right_node = self.nodes[right_id]
+    def _get_required_spacing(self, left, right):
+        store = self.store
         
-        if right_id in left_node["spouse_ids"]:
+        if right in store.spouses(left):
             return self.PARTNER_SPACING
         
-        left_parents = set(left_node["parent_ids"])
-        right_parents = set(right_node["parent_ids"])
+        left_parents = set(store.parents(left))
+        right_parents = set(store.parents(right))
         
         if not left_parents and not right_parents:
             return self.MIN_SIB_SPACING + self.FAMILY_GAP
@@ -179,29 +385,59 @@ class PedigreeEngine:
         return self.MIN_SIB_SPACING + self.FAMILY_GAP
     
     def _enforce_spacing(self, gen):
+        """
+        Push nodes right until every neighbour pair meets its required gap.
+        Single left-to-right sweep; shifts accumulate in `offset` instead of
+        being applied to every later node at each violation.
+        A pinned node stays put: free nodes before it are pulled left instead.
+        """
         nids = self.generations.get(gen, [])
         
         if len(nids) < 2:
             return
         
+        xs = self.store.x
+        gaps = self.spacing[gen]
+        width = self.NODE_WIDTH
+        pinned = self._pinned
+        offset = 0.0
+        prev_x = xs[nids[0]]
+        
         for i in range(1, len(nids)):
-            prev = nids[i-1]
             curr = nids[i]
+            if pinned and curr in pinned:
+                self._pull_left(nids, i, gaps)
+                offset = 0.0
+                prev_x = xs[curr]
+                continue
+            
+            curr_x = xs[curr] + offset
+            min_x = prev_x + width + gaps[i-1]
             
-            required_dist = self._get_required_spacing(prev, curr)
-            min_x = self.nodes[prev]["x"] + self.NODE_WIDTH + required_dist
+            if curr_x < min_x - 0.001:
+                shift = min_x - curr_x
+                offset += shift
+                curr_x += shift
             
-            if self.nodes[curr]["x"] < min_x - 0.001:
-                shift = min_x - self.nodes[curr]["x"]
-                for j in range(i, len(nids)):
-                    self.nodes[nids[j]]["x"] += shift
+            xs[curr] = curr_x
+            prev_x = curr_x
+    
+    def _pull_left(self, nids, i, gaps):
+        """Move free nodes left of the pinned nids[i] far enough left to meet their gaps."""
+        xs = self.store.x
+        for k in range(i - 1, -1, -1):
+            max_x = xs[nids[k+1]] - self.NODE_WIDTH - gaps[k]
+            if xs[nids[k]] <= max_x + 0.001 or nids[k] in self._pinned:
+                break
+            xs[nids[k]] = max_x
     
     def _get_sibling_groups(self, gen):
         nids = self.generations.get(gen, [])
+        store = self.store
         groups = {}
         
         for nid in nids:
-            p_tuple = tuple(sorted(self.nodes[nid]["parent_ids"]))
+            p_tuple = tuple(sorted(store.parents(nid)))
             if not p_tuple:
                 continue
             
@@ -211,126 +447,1130 @@ class PedigreeEngine:
         
         return groups
     
-    def _align_children_to_parents(self, gen):
+    def _align_children_to_parents(self, gen, groups=None):
         """Align children to be centered under their parents."""
-        groups = self._get_sibling_groups(gen)
+        xs = self.store.x
+        pinned = self._pinned
+        if groups is None:
+            groups = self.sibling_groups.get(gen, ())
         
-        for p_tuple, sib_ids in groups.items():
+        for anchor, p_tuple, sib_ids in groups:
+            if pinned and not pinned.isdisjoint(sib_ids):
+                continue
             # Calculate parent center
             # SPECIAL LOGIC: If a parent is a Surrogate ('S'), align to that parent explicitly.
-            surrogate_parent = None
-            for p in p_tuple:
-                if self._is_surrogate(p):
-                    surrogate_parent = p
-                    break
-            
-            if surrogate_parent:
-                center_parents = self.nodes[surrogate_parent]["x"]
+            if anchor is not None:
+                center_parents = xs[anchor]
             else:
-                p_xs = [self.nodes[p]["x"] for p in p_tuple if p in self.nodes]
-                if not p_xs:
-                    continue
+                p_xs = [xs[p] for p in p_tuple]
                 center_parents = sum(p_xs) / len(p_xs)
             
             # Calculate sibling center
-            sib_xs = [self.nodes[s]["x"] for s in sib_ids]
+            sib_xs = [xs[s] for s in sib_ids]
             center_sibs = (min(sib_xs) + max(sib_xs)) / 2
             
             # Shift siblings to align with parents
             shift = center_parents - center_sibs
             for sib in sib_ids:
-                self.nodes[sib]["x"] += shift
+                xs[sib] += shift
     
     def _get_partner_group(self, nid, gen):
-        node = self.nodes[nid]
-        spouses = [
-            s for s in node["spouse_ids"]
-            if s in self.nodes and self.nodes[s]["gen"] == gen
-        ]
+        store = self.store
+        spouses = [s for s in store.spouses(nid) if store.gen[s] == gen]
         return [nid] + spouses
     
-    def _align_parents_to_children(self, gen):
-        nids = self.generations.get(gen, [])
-        processed = set()
+    def _align_parents_to_children(self, gen, groups=None):
+        xs = self.store.x
+        pinned = self._pinned
+        if groups is None:
+            groups = self.partner_groups.get(gen, ())
         
-        for nid in nids:
-            if nid in processed:
-                continue
-            
-            node = self.nodes[nid]
-            
-            if not node["children_ids"]:
-                continue
-            
-            group_ids = self._get_partner_group(nid, gen)
-            
-            all_children = set()
-            for member_id in group_ids:
-                all_children.update(self.nodes[member_id]["children_ids"])
-            
-            if not all_children:
-                continue
-            
-            c_xs = [self.nodes[c]["x"] for c in all_children if c in self.nodes]
-            if not c_xs:
+        for group_ids, children in groups:
+            if pinned and not pinned.isdisjoint(group_ids):
                 continue
+            c_xs = [xs[c] for c in children]
             center_children = sum(c_xs) / len(c_xs)
             
-            p_xs = [self.nodes[p]["x"] for p in group_ids]
+            p_xs = [xs[p] for p in group_ids]
             center_parents = (min(p_xs) + max(p_xs)) / 2
             
             shift = center_children - center_parents
             for parent in group_ids:
-                self.nodes[parent]["x"] += shift
-                processed.add(parent)
+                xs[parent] += shift
     
     def _initial_layout(self):
+        xs = self.store.x
         for gen, nids in self.generations.items():
+            gaps = self.spacing[gen]
             current_x = 0.0
             
             for i, nid in enumerate(nids):
                 if i > 0:
-                    prev_nid = nids[i-1]
-                    spacing = self._get_required_spacing(prev_nid, nid)
-                    current_x += spacing + self.NODE_WIDTH
+                    current_x += gaps[i-1] + self.NODE_WIDTH
                 
-                self.nodes[nid]["x"] = current_x
+                xs[nid] = current_x
     
-    def _iterative_adjustment(self, iterations):
+    def _iterative_adjustment(self, iterations, passes=None, tolerance=None, deadline=None, patience=3):
+        """
+        Run up to `iterations` top-down + bottom-up sweeps.
+        
+        Stops early once the largest node movement in a sweep (the residual)
+        is within `tolerance`, or when time.perf_counter() passes `deadline`.
+        With a tolerance, some pedigrees (e.g. intermarriage loops) spread
+        instead of settling; after `patience` sweeps without a new lowest
+        residual the sweeps stop, and the most settled state is restored.
+        Returns (sweeps run, residual).
+        """
+        passes = passes or self
+        done = 0
+        residual = None
+        best = None
+        stalled = 0
+        
         for _ in range(iterations):
+            before = passes._snapshot()
+            
             for gen in sorted(self.generations.keys()):
-                self._align_children_to_parents(gen)
-                self._enforce_spacing(gen)
+                passes._align_children_to_parents(gen)
+                passes._enforce_spacing(gen)
             
             for gen in sorted(self.generations.keys(), reverse=True):
-                self._align_parents_to_children(gen)
-                self._enforce_spacing(gen)
+                passes._align_parents_to_children(gen)
+                passes._enforce_spacing(gen)
+            
+            done += 1
+            residual = passes._displacement(before)
+            
+            if tolerance is not None:
+                if residual <= tolerance:
+                    return done, residual
+                
+                if best is None or residual < best[0]:
+                    best = (residual, passes._snapshot())
+                    stalled = 0
+                else:
+                    stalled += 1
+                    if stalled >= patience:
+                        break
+            
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+        
+        if best is not None and best[0] < residual:
+            passes._restore(best[1])
+            residual = best[0]
+        
+        return done, residual
     
-    def _final_priority_pass(self, priority):
-        if priority == "Children to Parents (Top-down)":
+    def _final_priority_pass(self, priority, passes=None):
+        passes = passes or self
+        # The isotonic fit ends centering sibships too, like the top-down passes
+        if priority in ("Children to Parents (Top-down)", LAYOUT_PRIORITY_ISOTONIC):
             for gen in sorted(self.generations.keys()):
-                self._align_children_to_parents(gen)
-                self._enforce_spacing(gen)
+                passes._align_children_to_parents(gen)
+                passes._enforce_spacing(gen)
         else:
             for gen in sorted(self.generations.keys(), reverse=True):
-                self._align_parents_to_children(gen)
-                self._enforce_spacing(gen)
+                passes._align_parents_to_children(gen)
+                passes._enforce_spacing(gen)
+    
+    def _snapshot(self):
+        return array('d', self.store.x)
+    
+    def _restore(self, snapshot):
+        self.store.x[:] = snapshot
+    
+    def _displacement(self, before):
+        """Largest |x| change of any node since `before` was taken."""
+        return max(map(abs, map(sub, before, self.store.x)), default=0.0)
     
     def _center_layout(self):
-        all_x = [n["x"] for n in self.nodes.values()]
+        xs = self.store.x
+        live = self.store.index.values()
         
-        if not all_x:
+        if not live or self._pinned:
+            # Pinned positions are absolute
             return
         
-        midpoint = (max(all_x) + min(all_x)) / 2
+        midpoint = (max(xs[i] for i in live) + min(xs[i] for i in live)) / 2
+        
+        for i in live:
+            xs[i] -= midpoint
+    
+    def calculate_layout(self, adjustment_iterations, priority="Children to Parents (Top-down)", vectorized=False,
+                         tolerance=None, time_budget=None, max_iterations=MAX_LAYOUT_ITERATIONS,
+                         split_components=False, workers=None, cache=None, multilevel=False,
+                         crossing_budget=None, initial_positions=None):
+        """
+        Run the layout passes and return an ``{id: node}`` view of the result.
+        
+        With vectorized=True the passes run on NumPy arrays (layout_numpy),
+        matching the default path to within float rounding. With priority
+        LAYOUT_PRIORITY_ISOTONIC every generation is instead solved as a
+        least-squares fit under the spacing constraints (layout_isotonic).
+        With LAYOUT_PRIORITY_TIDY, loop-free pedigrees get a one-pass tidy
+        tree layout (layout_tidy); pedigrees with loops fall back to the
+        top-down alignment passes (layout_stats["tidy"] tells which ran).
+        With a `tolerance`, adjustment_iterations is ignored: sweeps run until
+        no node moves more than `tolerance` in a full sweep, up to
+        `max_iterations`. `time_budget` (seconds) bounds the adjustment phase.
+        With multilevel=True the adjustment runs on successively coarsened
+        graphs first (see _multilevel_adjustment).
+        With a `crossing_budget` (seconds), generations are first reordered to
+        reduce line crossings (layout_order); layout_stats["crossings"] holds
+        the count before and after. Without it, nodes keep their ID order.
+        With split_components=True, unrelated families are laid out separately
+        (see _layout_components) and packed side by side. This is no faster on
+        its own; only `workers` > 1 can make it pay off on several CPUs.
+        With `initial_positions` ({id: x}, e.g. saved with the chart) the
+        passes start from those positions instead of _initial_layout (see
+        _warm_start), and pinned individuals keep their saved x; splitting,
+        multilevel and crossing reduction are skipped, since the saved
+        positions already carry the order. The tidy tree ignores them.
+        With a LayoutCache as `cache`, a result for identical input is
+        reused instead of recomputed (layout_stats["cached"] is True).
+        Sweep count and final residual are reported in self.layout_stats.
+        """
+        start = time.perf_counter()
+        deadline = start + time_budget if time_budget else None
+        if self._edited:
+            self._rebuild()
+        if self._reordered:
+            self._sort_generations()
+        self._pinned = set()
+        if initial_positions:
+            split_components = multilevel = False
+            crossing_budget = None
+        
+        layout_args = {
+            "adjustment_iterations": adjustment_iterations,
+            "priority": priority,
+            "vectorized": vectorized,
+            "tolerance": tolerance,
+            "time_budget": time_budget,
+            "max_iterations": max_iterations,
+            "multilevel": multilevel,
+            "crossing_budget": crossing_budget,
+            "initial_positions": initial_positions,
+        }
+        self._layout_args = layout_args
+        self._split_args = (layout_args, workers) if split_components else None
+        
+        if cache is not None:
+            key = cache.make_key(self.raw_ind, self.raw_rel, self.config, dict(layout_args, split_components=split_components))
+            hit = cache.get(key)
+            if hit is not None:
+                positions, stats = hit
+                self.store.x[:] = positions
+                # Restore the generation order and pins the positions came with
+                self._adopt_positions(pin=bool(initial_positions))
+                self.layout_stats = dict(stats, cached=True)
+                self._laid_out = True
+                return self.nodes
+            self.calculate_layout(**layout_args, split_components=split_components, workers=workers)
+            cache.put(key, self.store.x, self.layout_stats)
+            self.layout_stats["cached"] = False
+            return self.nodes
+        
+        if split_components:
+            components = self._connected_components()
+            if len(components) > 1:
+                stats = self._layout_components(components, layout_args, workers)
+                self.layout_stats = self._merge_component_stats(stats, tolerance, start)
+                self.layout_stats["components"] = len(components)
+                self._laid_out = True
+                return self.nodes
+        
+        if priority == LAYOUT_PRIORITY_TIDY:
+            if TidyTreeLayout(self).run():
+                self._center_layout()
+                self.layout_stats = {
+                    "iterations": 0,
+                    "residual": None,
+                    "converged": None if tolerance is None else True,
+                    "elapsed": time.perf_counter() - start,
+                    "tidy": True,
+                }
+                self._laid_out = True
+                return self.nodes
+            priority = "Children to Parents (Top-down)"
+        
+        if tolerance is not None:
+            adjustment_iterations = max_iterations
+        
+        crossings = None
+        if crossing_budget:
+            crossings = CrossingMinimizer(self).run(time.perf_counter() + crossing_budget)
+            self.spacing = None
+            self._reordered = True
+        
+        levels = 1
+        if initial_positions:
+            self._warm_start(initial_positions)
+            passes = self._make_passes(priority, vectorized)
+            iterations, residual = self._iterative_adjustment(adjustment_iterations, passes, tolerance, deadline)
+        elif multilevel:
+            iterations, residual, levels = self._multilevel_adjustment(
+                adjustment_iterations, priority, vectorized, tolerance, deadline
+            )
+            passes = self._make_passes(priority, vectorized)
+        else:
+            self._ensure_tables()
+            passes = self._make_passes(priority, vectorized)
+            passes._initial_layout()
+            iterations, residual = self._iterative_adjustment(adjustment_iterations, passes, tolerance, deadline)
+        self._final_priority_pass(priority, passes)
+        passes._center_layout()
+        
+        self.layout_stats = {
+            "iterations": iterations,
+            "residual": residual,
+            "converged": None if tolerance is None else (residual is not None and residual <= tolerance),
+            "elapsed": time.perf_counter() - start,
+        }
+        if multilevel:
+            self.layout_stats["levels"] = levels
+        if crossings is not None:
+            self.layout_stats["crossings"] = crossings
+        if layout_args["priority"] == LAYOUT_PRIORITY_TIDY:
+            self.layout_stats["tidy"] = False
+        self._laid_out = True
+        
+        return self.nodes
+    
+    def _make_passes(self, priority, vectorized=False):
+        """The pass implementation calculate_layout runs for `priority`."""
+        if priority == LAYOUT_PRIORITY_ISOTONIC:
+            return IsotonicPasses(self)
+        if vectorized and not self._pinned:
+            return VectorizedPasses(self)
+        return self
+    
+    # ========================================
+    # Saved positions
+    # ========================================
+    
+    def _warm_start(self, positions):
+        """
+        Start from saved x positions ({id: x}) instead of _initial_layout.
+        
+        Generations are ordered by the saved x. Individuals without a saved
+        position (added since) are placed next to their neighbour first.
+        Pinned individuals with a saved position are held fixed by the passes.
+        """
+        store = self.store
+        xs = store.x
+        self._ensure_tables()
         
-        for nid in self.nodes:
-            self.nodes[nid]["x"] -= midpoint
+        missing = set()
+        for nids in self.generations.values():
+            for nid in nids:
+                x = positions.get(store.ids[nid])
+                if x is None:
+                    missing.add(nid)
+                    continue
+                xs[nid] = float(x)
+                if store.flags[nid] & FLAG_PINNED:
+                    self._pinned.add(nid)
+        self._place_nodes(missing, self.generations)
+        
+        for gen, nids in self.generations.items():
+            order = sorted(nids, key=xs.__getitem__)
+            if order != nids:
+                self.generations[gen] = order
+                self.spacing = None
+                self._reordered = True
+        self._ensure_tables()
+    
+    def restore_positions(self, positions, **layout_args):
+        """
+        Use saved x positions ({id: x}) as the finished layout, without any
+        pass. `layout_args` (calculate_layout keywords) are the settings later
+        relayouts use. Returns False, changing nothing, if an individual has
+        no position.
+        """
+        start = time.perf_counter()
+        store = self.store
+        if self._edited:
+            self._rebuild()
+        if any(pid not in positions for pid in store.index):
+            return False
+        
+        xs = store.x
+        for pid, i in store.index.items():
+            xs[i] = float(positions[pid])
+        # Order generations as saved, so edits relayout from here
+        self._adopt_positions(pin=True)
+        
+        self._layout_args = dict({"adjustment_iterations": 1}, **layout_args, initial_positions=dict(positions))
+        self._split_args = None
+        self.layout_stats = {
+            "iterations": 0,
+            "residual": None,
+            "converged": None,
+            "elapsed": time.perf_counter() - start,
+            "restored": True,
+        }
+        self._laid_out = True
+        return True
     
-    def calculate_layout(self, adjustment_iterations, priority="Children to Parents (Top-down)"):
-        self._initial_layout()
-        self._iterative_adjustment(adjustment_iterations)
-        self._final_priority_pass(priority)
+    def _adopt_positions(self, pin):
+        """
+        Make the x already in the store the finished layout's state: every
+        generation ordered by x (as crossing reduction or saved positions
+        leave it) and, if `pin`, FLAG_PINNED individuals held fixed.
+        """
+        store = self.store
+        xs = store.x
+        self._pinned = {i for i in store.index.values() if store.flags[i] & FLAG_PINNED} if pin else set()
+        if self._reordered:
+            self._sort_generations()
+        for gen, nids in self.generations.items():
+            order = sorted(nids, key=xs.__getitem__)
+            if order != nids:
+                self.generations[gen] = order
+                self.spacing = None
+                self._reordered = True
+    
+    def positions(self):
+        """Current x of every individual, as {id: x} for saving with the chart."""
+        xs = self.store.x
+        return {pid: xs[i] for pid, i in self.store.index.items()}
+    
+    def canonical_ids(self):
+        """
+        {old id: new id} renumbering every generation left to right in the
+        current layout ('II-1', 'II-2', ...); IDs that already match are left out.
+        Generations past MAX_ID_GENERATION keep their IDs, since _parse_gen
+        would not read such prefixes back as generations.
+        Apply with utils.remap_ids.
+        """
+        xs = self.store.x
+        ids = self.store.ids
+        mapping = {}
+        for gen, nids in self.generations.items():
+            if gen > MAX_ID_GENERATION:
+                continue
+            roman = int_to_roman(gen)
+            # Generations are normally already in x order, so this sort is linear
+            for k, nid in enumerate(sorted(nids, key=xs.__getitem__), 1):
+                new_id = f"{roman}-{k}"
+                if ids[nid] != new_id:
+                    mapping[ids[nid]] = new_id
+        return mapping
+    
+    # ========================================
+    # Multilevel layout
+    # ========================================
+    
+    def _multilevel_adjustment(self, iterations, priority, vectorized=False, tolerance=None, deadline=None):
+        """
+        Coarsen the graph level by level, lay out the coarsest level, then
+        expand and refine back down to the individuals.
+        
+        Every level merges partners and full siblings of the level below
+        into weighted blocks (see _coarsen), until fewer than
+        MULTILEVEL_MIN_NODES remain or a level stops shrinking. A block level
+        is an ordinary engine whose spacing table includes the block widths,
+        so the usual passes run unchanged on it. The coarsest level gets the
+        full adjustment; every finer level starts from its block's position
+        and gets MULTILEVEL_REFINE_SWEEPS sweeps. Levels shrink
+        geometrically, so the total work stays close to linear.
+        It is still no faster than the single-level passes, whose sweeps are
+        already linear: about 10-18 vs. 8 us/node for 3 sweeps even with the
+        levels reused ('benchmark.py multilevel'). Its use is the layout it
+        gives, with couples and sibships kept together as blocks, which is
+        far narrower on large forests.
+        Generations end up ordered block by block (self._reordered).
+        Returns (sweeps run, residual, number of levels).
+        """
+        levels, coarsest = self._multilevel_levels()
+        engine = coarsest[0]
+        self._use_block_tables(coarsest)
+        passes = engine._make_passes(priority, vectorized)
+        passes._initial_layout()
+        total, residual = engine._iterative_adjustment(iterations, passes, tolerance, deadline)
+        
+        for level in reversed(levels):
+            fine, blocks = level[0], level[4]
+            coarse_x = engine.store.x
+            fine_x = fine.store.x
+            for gen, bids in engine.generations.items():
+                fine.generations[gen] = [m for b in bids for m, _ in blocks[b]]
+            for b, members in enumerate(blocks):
+                for m, offset in members:
+                    fine_x[m] = coarse_x[b] + offset
+            
+            self._use_block_tables(level)
+            passes = fine._make_passes(priority, vectorized)
+            done, residual = fine._iterative_adjustment(MULTILEVEL_REFINE_SWEEPS, passes, tolerance, deadline)
+            total += done
+            engine = fine
+        
+        self._reordered = self._reordered or bool(levels)
+        return total, residual, len(levels) + 1
+    
+    def _multilevel_levels(self):
+        """
+        ([(engine, span, first, last, blocks, tables)] from finest to
+        coarsest, and the coarsest level as (engine, span, first, last, None,
+        tables)). `tables` starts as None; _use_block_tables fills it.
+        
+        The levels depend only on the graph and on the generation order they
+        were coarsened from, so they are kept in self._hierarchy and reused
+        while the order matches; _rebuild drops them. Repeated layouts of the
+        same pedigree then skip coarsening and table building at every level.
+        """
+        order = {gen: list(nids) for gen, nids in self.generations.items()}
+        if self._hierarchy is not None and self._hierarchy[0] == order:
+            return self._hierarchy[1], self._hierarchy[2]
+        
+        n = len(self.store)
+        span = array('d', bytes(8 * n))
+        first = array('q', range(n))
+        last = array('q', range(n))
+        levels = []
+        engine = self
+        
+        while sum(map(len, engine.generations.values())) > MULTILEVEL_MIN_NODES:
+            coarse, blocks, c_span, c_first, c_last = self._coarsen(engine, span, first, last)
+            if len(coarse.store) > MULTILEVEL_MIN_SHRINK * sum(map(len, engine.generations.values())):
+                break
+            levels.append([engine, span, first, last, blocks, None])
+            engine, span, first, last = coarse, c_span, c_first, c_last
+        
+        coarsest = [engine, span, first, last, None, None]
+        self._hierarchy = (order, levels, coarsest)
+        return levels, coarsest
+    
+    def _coarsen(self, fine, span, first, last):
+        """
+        Merge partners and full siblings of one level into blocks.
+        
+        `span` is the width of every block of `fine` (distance between the
+        centers of its outer individuals) and `first`/`last` are those outer
+        individuals, which decide the spacing to the neighbouring blocks.
+        Members of a block are packed as tightly as the spacing allows.
+        Returns (coarse engine, blocks as [(member, offset from block center)],
+        and span/first/last of the coarse level).
+        """
+        store = fine.store
+        root = {}
+        
+        def find(i):
+            while root[i] != i:
+                root[i] = root[root[i]]
+                i = root[i]
+            return i
+        
+        def union(a, b):
+            a, b = find(a), find(b)
+            if a != b:
+                root[max(a, b)] = min(a, b)
+        
+        gens = sorted(fine.generations)
+        for gen in gens:
+            sibships = {}
+            for i in fine.generations[gen]:
+                root[i] = i
+            for i in fine.generations[gen]:
+                parents = store.parents(i)
+                if len(parents):
+                    union(i, sibships.setdefault(tuple(sorted(parents)), i))
+                for s in store.spouses(i):
+                    if s in root and store.gen[s] == gen:
+                        union(i, s)
+        
+        block_of = {}
+        blocks = []
+        for gen in gens:
+            for i in fine.generations[gen]:
+                r = find(i)
+                if r not in block_of:
+                    block_of[r] = len(blocks)
+                    blocks.append([])
+                block_of[i] = block_of[r]
+                blocks[block_of[r]].append(i)
+        
+        coarse_store = NodeStore(self.NODE_WIDTH)
+        c_span = array('d')
+        c_first = array('q')
+        c_last = array('q')
+        packed = []
+        for b, members in enumerate(blocks):
+            coarse_store.add(b, None, gen=store.gen[members[0]], y=0.0, sort_idx=b)
+            
+            centers = [span[members[0]] / 2]
+            for m_left, m_right in zip(members, members[1:]):
+                centers.append(
+                    centers[-1] + self.NODE_WIDTH + self._get_required_spacing(last[m_left], first[m_right])
+                    + (span[m_left] + span[m_right]) / 2
+                )
+            width = centers[-1] + span[members[-1]] / 2
+            packed.append([(m, c - width / 2) for m, c in zip(members, centers)])
+            c_span.append(width)
+            c_first.append(first[members[0]])
+            c_last.append(last[members[-1]])
+        
+        for b, members in enumerate(blocks):
+            for m in members:
+                for p in store.parents(m):
+                    if block_of.get(p, b) != b:
+                        coarse_store.link_parent_child(block_of[p], b)
+                for s in store.spouses(m):
+                    if block_of.get(s, b) != b:
+                        coarse_store.link_partners(b, block_of[s])
+        coarse_store.freeze()
+        
+        return PedigreeEngine.from_store(coarse_store, self.config), packed, c_span, c_first, c_last
+    
+    def _use_block_tables(self, level):
+        """
+        Give a level's engine its layout tables, block widths added to the
+        gaps: built on first use for the level's current generation order,
+        then reused from the level record.
+        """
+        engine, span, first, last = level[:4]
+        if level[5] is not None:
+            groups, partners, spacing = level[5]
+            engine.sibling_groups, engine.partner_groups, engine.spacing = dict(groups), dict(partners), dict(spacing)
+            return
+        engine._build_tables()
+        if engine is not self:
+            for gen, bids in engine.generations.items():
+                engine.spacing[gen] = array('d', (
+                    self._get_required_spacing(last[a], first[b]) + (span[a] + span[b]) / 2
+                    for a, b in zip(bids, bids[1:])
+                ))
+        level[5] = (dict(engine.sibling_groups), dict(engine.partner_groups), dict(engine.spacing))
+    
+    # ========================================
+    # Connected components
+    # ========================================
+    
+    def _connected_components(self):
+        """
+        Split live nodes into unrelated families.
+        
+        Nodes named in the same relationship (partners, children) share a
+        component. Relationships are used instead of graph edges so donors
+        and surrogates, which are deliberately left unlinked, stay with their
+        family. Returns lists of node indices, ordered by each component's
+        first node in the input.
+        """
+        index = self.store.index
+        root = {i: i for i in index.values()}
+        
+        def find(i):
+            while root[i] != i:
+                root[i] = root[root[i]]
+                i = root[i]
+            return i
+        
+        for rel in self.raw_rel:
+            members = [index[pid] for pid in self._relationship_members(rel) if pid in index]
+            for j in members[1:]:
+                a, b = find(members[0]), find(j)
+                if a != b:
+                    root[max(a, b)] = min(a, b)
+        
+        components = {}
+        for i in index.values():
+            components.setdefault(find(i), []).append(i)
+        
+        return [components[r] for r in sorted(components)]
+    
+    def _layout_components(self, components, layout_args, workers=None, only=None):
+        """
+        Lay out each component in its own engine, then pack them side by side.
+        
+        With workers=None, components run on a process pool (one worker
+        per CPU) once they hold at least PARALLEL_LAYOUT_MIN_NODES nodes;
+        an explicit `workers` > 1 always uses a pool. The largest components
+        go first. Components without a node in `only` are not laid out again
+        and keep their current shape. time_budget and crossing_budget in
+        `layout_args` bound all components together.
+        
+        Sequentially this is slower than one whole-graph layout, since every
+        component builds its own engine (components benchmark on one CPU:
+        0.067 s whole vs. 0.081 s split for 12 families, 1.23 s vs. 1.52 s
+        for 4 deep ones). Only the pool, on several CPUs, can win time back,
+        so the app passes workers=1 and uses splitting for packing only.
+        Returns the layout_stats of the components that were laid out.
+        """
+        store = self.store
+        jobs = []
+        for nids in components:
+            if only is not None and only.isdisjoint(nids):
+                continue
+            if len(nids) == 1:
+                # A lone individual needs no layout, only packing
+                store.x[nids[0]] = 0.0
+                continue
+            jobs.append(nids)
+        jobs.sort(key=len, reverse=True)
+        
+        if workers is None and sum(map(len, jobs)) >= PARALLEL_LAYOUT_MIN_NODES:
+            workers = os.cpu_count() or 1
+        
+        # The time and crossing budgets cover the whole layout, not each
+        # component: both become one wall-clock deadline that workers share
+        deadlines = {
+            key: time.time() + layout_args[key]
+            for key in ("time_budget", "crossing_budget") if layout_args.get(key)
+        }
+        
+        if workers is not None and workers > 1 and len(jobs) > 1:
+            # Components run side by side, so each may use all the time left
+            with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+                futures = [
+                    pool.submit(_layout_component, store.subset(nids), self.config, layout_args, deadlines)
+                    for nids in jobs
+                ]
+                results = [f.result() for f in futures]
+        else:
+            # One after another, each takes its share (by size) of the time left
+            left = sum(map(len, jobs))
+            results = []
+            for nids in jobs:
+                results.append(_layout_component(store.subset(nids), self.config, layout_args, deadlines, len(nids) / left))
+                left -= len(nids)
+        
+        for nids, (xs, _) in zip(jobs, results):
+            for i, x in zip(nids, xs):
+                store.x[i] = x
+        
+        self._pack_components(components)
         self._center_layout()
         
-        return self.nodes
\ No newline at end of file
+        return [stats for _, stats in results]
+    
+    def _pack_components(self, components):
+        """
+        Place components left to right. Each component's bounding box spans
+        its generation rows, and it moves as far left as the boxes already
+        placed in those rows allow.
+        """
+        xs = self.store.x
+        gens = self.store.gen
+        gap = self.NODE_WIDTH + self.MIN_SIB_SPACING + self.FAMILY_GAP
+        right = {}
+        
+        for nids in components:
+            left = min(xs[i] for i in nids)
+            rows = range(min(gens[i] for i in nids), max(gens[i] for i in nids) + 1)
+            edges = [right[g] for g in rows if g in right]
+            shift = (max(edges) + gap if edges else 0.0) - left
+            
+            for i in nids:
+                xs[i] += shift
+            
+            edge = max(xs[i] for i in nids)
+            for g in rows:
+                right[g] = edge
+    
+    @staticmethod
+    def _merge_component_stats(stats, tolerance, start):
+        residuals = [s["residual"] for s in stats if s["residual"] is not None]
+        merged = {
+            "iterations": max((s["iterations"] for s in stats), default=0),
+            "residual": max(residuals) if residuals else None,
+            "converged": None if tolerance is None else all(s["converged"] for s in stats),
+            "elapsed": time.perf_counter() - start,
+        }
+        crossings = [s["crossings"] for s in stats if "crossings" in s]
+        if crossings:
+            merged["crossings"] = tuple(map(sum, zip(*crossings)))
+        return merged
+    
+    # ========================================
+    # Incremental editing
+    # ========================================
+    
+    def _rebuild(self):
+        """Rebuild the graph from the current records, dropping tombstones and dirty state."""
+        self.raw_ind = [self.store.records[i] for i in self.store.index.values()]
+        self.store = NodeStore(self.NODE_WIDTH)
+        self.nodes = self.store.view()
+        self.generations = {}
+        self._dirty_gens.clear()
+        self._dirty_nodes.clear()
+        self._new_nodes.clear()
+        self._pinned = set()
+        self._edited = False
+        self._hierarchy = None
+        self._build_graph()
+    
+    @staticmethod
+    def _relationship_members(rel):
+        members = {rel.get("p1"), rel.get("p2")}
+        members.update(rel.get("children", []))
+        members.discard(None)
+        members.discard("")
+        return members
+    
+    @staticmethod
+    def _relationship_signature(rel):
+        """The fields of a relationship that affect the graph."""
+        return (
+            rel.get("p1"), rel.get("p2"), tuple(rel.get("children", [])),
+            tuple(rel.get("adopted_in", [])), tuple(rel.get("adopted_out", [])),
+        )
+    
+    def _index_relationship(self, rel):
+        self._rel_sigs[self._relationship_signature(rel)] += 1
+        for pid in self._relationship_members(rel):
+            self._rels_by_person.setdefault(pid, []).append(rel)
+    
+    def _unindex_relationship(self, rel):
+        self._rel_sigs[self._relationship_signature(rel)] -= 1
+        for pid in self._relationship_members(rel):
+            rels = self._rels_by_person.get(pid, [])
+            if any(r is rel for r in rels):
+                rels[:] = [r for r in rels if r is not rel]
+    
+    def _find_relationship(self, p1, p2=None):
+        """Relationship of the couple {p1, p2} (p2 empty = single parent), or None."""
+        couple = {p1, p2 or p1}
+        for rel in self._rels_by_person.get(p1, []):
+            if {rel.get("p1"), rel.get("p2") or rel.get("p1")} == couple:
+                return rel
+        return None
+    
+    def _touch(self, nodes):
+        """Mark nodes, and the generations holding them, dirty."""
+        for i in nodes:
+            self._dirty_nodes.add(i)
+            self._dirty_gens.add(self.store.gen[i])
+        self._edited = True
+    
+    def _relink(self, pids):
+        """
+        Re-derive the edges and adoption flags of `pids` from the relationships
+        that mention them, so the graph matches a fresh build.
+        """
+        store = self.store
+        affected = [store.index[pid] for pid in pids if pid in store.index]
+        touched = set(affected)
+        
+        for i in affected:
+            touched.update(store.unlink_all(i))
+            store.flags[i] &= ~(FLAG_ADOPTED_IN | FLAG_ADOPTED_OUT)
+        
+        rels = {}
+        for pid in pids:
+            for rel in self._rels_by_person.get(pid, []):
+                rels[id(rel)] = rel
+        for rel in rels.values():
+            self._process_relationship(rel)
+        
+        for i in affected:
+            touched.update(store.spouses(i))
+            touched.update(store.parents(i))
+            touched.update(store.children(i))
+        self._touch(touched)
+    
+    def add_individual(self, person):
+        """Add an individual record. Relationships are added with link/set_relationship."""
+        pid = person["id"]
+        if pid in self.store.index:
+            raise ValueError(f"Individual '{pid}' already exists")
+        
+        i = self._initialize_node(person)
+        gen = self.store.gen[i]
+        sort_idx = self.store.sort_idx
+        nids = self.generations.setdefault(gen, [])
+        nids.insert(bisect_right(nids, sort_idx[i], key=lambda n: sort_idx[n]), i)
+        
+        self._new_nodes.add(i)
+        self._touch([i])
+        # Existing relationships may already reference this ID
+        if pid in self._rels_by_person:
+            self._relink([pid])
+        return i
+    
+    def update_individual(self, pid, changes):
+        """Update fields of an individual. Only donor/surrogate changes affect the layout."""
+        if changes.get("id", pid) != pid:
+            raise ValueError("Individual IDs cannot be changed with update_individual")
+        
+        record = {**self.store.records[self.store.index[pid]], **changes}
+        self._replace_record(pid, record)
+    
+    def _replace_record(self, pid, record):
+        store = self.store
+        i = store.index[pid]
+        flags, fill = parse_individual_flags(record)
+        old_flags = store.flags[i]
+        
+        store.records[i] = record
+        store.flags[i] = flags | (old_flags & (FLAG_ADOPTED_IN | FLAG_ADOPTED_OUT))
+        store.fill[i] = fill
+        
+        # (Un)pinning holds or frees the node where it is now
+        if self._laid_out and flags & FLAG_PINNED:
+            self._pinned.add(i)
+        else:
+            self._pinned.discard(i)
+        
+        if (flags ^ old_flags) & (FLAG_DONOR | FLAG_SURROGATE):
+            self._relink([pid])
+    
+    def remove_individual(self, pid):
+        """Remove an individual. Relationships referencing it are kept, as in the input data."""
+        store = self.store
+        i = store.index[pid]
+        
+        self._touch(store.unlink_all(i))
+        gen = store.gen[i]
+        self.generations[gen].remove(i)
+        if not self.generations[gen]:
+            del self.generations[gen]
+        self._dirty_gens.add(gen)
+        self._dirty_nodes.discard(i)
+        self._new_nodes.discard(i)
+        self._pinned.discard(i)
+        self._implicit.discard(i)
+        store.remove(pid)
+        
+        # A missing p1 drops the whole relationship, so its other members change too
+        members = set()
+        for rel in self._rels_by_person.get(pid, []):
+            members.update(self._relationship_members(rel))
+        members.discard(pid)
+        self._relink(members)
+    
+    def set_relationship(self, p1, p2=None, **fields):
+        """Create or update the relationship of the couple {p1, p2}."""
+        rel = self._find_relationship(p1, p2)
+        old_members = set()
+        
+        if rel is None:
+            rel = {"p1": p1, "p2": p2 or "", "children": []}
+            self.raw_rel.append(rel)
+        else:
+            old_members = self._relationship_members(rel)
+            self._unindex_relationship(rel)
+        
+        rel.update(fields)
+        self._index_relationship(rel)
+        self._relink(old_members | self._relationship_members(rel))
+        return rel
+    
+    def link(self, p1, p2=None, child=None):
+        """Link partners p1 and p2, and optionally add `child` to their children."""
+        rel = self._find_relationship(p1, p2)
+        children = list(rel.get("children", [])) if rel else []
+        if child is not None and child not in children:
+            children.append(child)
+        return self.set_relationship(p1, p2, children=children)
+    
+    def unlink(self, p1, p2=None, child=None):
+        """Remove `child` from the couple's children, or the whole relationship if no child is given."""
+        rel = self._find_relationship(p1, p2)
+        if rel is None:
+            return
+        
+        if child is not None:
+            fields = {
+                key: [c for c in rel.get(key, []) if c != child]
+                for key in ("children", "adopted_in", "adopted_out")
+            }
+            self.set_relationship(p1, p2, **fields)
+            return
+        
+        members = self._relationship_members(rel)
+        self._unindex_relationship(rel)
+        self.raw_rel = [r for r in self.raw_rel if r is not rel]
+        self._relink(members)
+    
+    def sync(self, data):
+        """
+        Bring the engine in line with `data` through the editing operations,
+        so that only what changed is marked dirty for relayout().
+        Individual records are compared by value, so pass new dicts rather
+        than editing records the engine already holds.
+        """
+        store = self.store
+        new_ind = {p["id"]: p for p in data.get("individual", [])}
+        old_ids = set(store.index)
+        
+        for pid in old_ids - new_ind.keys():
+            self.remove_individual(pid)
+        for pid, person in new_ind.items():
+            if pid not in old_ids:
+                self.add_individual(person)
+            elif store.records[store.index[pid]] != person:
+                self._replace_record(pid, person)
+        
+        # Compared against the signatures recorded when relationships were indexed,
+        # so relationship dicts edited in place are still detected
+        new_rel = list(data.get("relationships", []))
+        old_sigs = +self._rel_sigs
+        new_sigs = Counter(self._relationship_signature(r) for r in new_rel)
+        changed = (old_sigs - new_sigs) + (new_sigs - old_sigs)
+        
+        self.raw_rel = new_rel
+        if changed:
+            members = set()
+            for p1, p2, children, _, _ in changed:
+                members.update(self._relationship_members({"p1": p1, "p2": p2, "children": children}))
+            self._rels_by_person = {}
+            self._rel_sigs = Counter()
+            for rel in self.raw_rel:
+                self._index_relationship(rel)
+            self._relink(members)
+    
+    def _dirty_groups(self, gen):
+        """Sibling and partner groups of `gen` that contain a dirty node."""
+        dirty = self._dirty_nodes
+        sib_groups = [
+            g for g in self.sibling_groups.get(gen, ())
+            if not dirty.isdisjoint(g[1]) or not dirty.isdisjoint(g[2])
+        ]
+        partner_groups = [
+            g for g in self.partner_groups.get(gen, ())
+            if not dirty.isdisjoint(g[0]) or not dirty.isdisjoint(g[1])
+        ]
+        return sib_groups, partner_groups
+    
+    def _place_nodes(self, nodes, gens):
+        """Give `nodes` (in generations `gens`) a starting x next to their left (or right) neighbour."""
+        xs = self.store.x
+        for gen in sorted(gens):
+            nids = self.generations.get(gen, [])
+            gaps = self.spacing.get(gen)
+            for k, nid in enumerate(nids):
+                if nid not in nodes:
+                    continue
+                if k > 0:
+                    xs[nid] = xs[nids[k-1]] + self.NODE_WIDTH + gaps[k-1]
+                elif len(nids) > 1:
+                    xs[nid] = xs[nids[1]] - self.NODE_WIDTH - gaps[0]
+                else:
+                    xs[nid] = 0.0
+    
+    def relayout(self, priority="Children to Parents (Top-down)", sweeps=None):
+        """
+        Lay out only what changed since the last layout.
+        
+        Dirty generations get their tables rebuilt and new nodes are placed
+        next to their neighbours. Then only sibling and partner groups holding
+        a dirty node are realigned, and spacing is re-enforced in the dirty
+        generations (shifts ripple to the right). The sweeps follow the last
+        layout's adjustment_iterations, tolerance and time_budget unless
+        `sweeps` is given. Falls back to a full layout if nothing has been
+        laid out yet.
+        """
+        if not self._laid_out:
+            return self.calculate_layout(adjustment_iterations=sweeps or 1, priority=priority)
+        if priority == LAYOUT_PRIORITY_TIDY:
+            # The tidy layout is a single linear pass: just redo it, with the
+            # settings the passes need if a loop makes it fall back to them
+            return self.calculate_layout(**dict(self._layout_args, priority=priority))
+        if self._reordered or (self._implicit and self._edited):
+            # Generations are not in ID order (crossing reduction, multilevel
+            # blocks or saved positions), or inferred generations may have
+            # changed, so new nodes have no place yet: lay out again,
+            # warm-starting from the current positions if saved ones were used
+            args = dict(self._layout_args, priority=priority)
+            if args.get("initial_positions"):
+                xs = self.store.x
+                args["initial_positions"] = {
+                    pid: xs[i] for pid, i in self.store.index.items() if i not in self._new_nodes
+                }
+            return self.calculate_layout(**args)
+        if not self._dirty_gens:
+            return self.nodes
+        
+        start = time.perf_counter()
+        if self._split_args is not None:
+            # Only the families holding a dirty node are laid out again
+            layout_args, workers = self._split_args
+            components = self._connected_components()
+            stats = self._layout_components(components, layout_args, workers, only=self._dirty_nodes)
+            self.layout_stats = self._merge_component_stats(stats, layout_args["tolerance"], start)
+            self.layout_stats["components"] = len(components)
+            self.layout_stats["dirty_components"] = len(stats)
+            self._dirty_gens.clear()
+            self._dirty_nodes.clear()
+            self._new_nodes.clear()
+            return self.nodes
+        
+        gens = sorted(g for g in self._dirty_gens if g in self.generations)
+        self._ensure_tables()
+        for gen in list(self.spacing):
+            if gen not in self.generations:
+                del self.sibling_groups[gen], self.partner_groups[gen], self.spacing[gen]
+        for gen in gens:
+            self._build_generation_tables(gen)
+        self._place_nodes(self._new_nodes, self._dirty_gens)
+        
+        groups = {gen: self._dirty_groups(gen) for gen in gens}
+        passes = IsotonicPasses(self) if priority == LAYOUT_PRIORITY_ISOTONIC else self
+        
+        def down():
+            for gen in gens:
+                passes._align_children_to_parents(gen, groups[gen][0])
+                passes._enforce_spacing(gen)
+        
+        def up():
+            for gen in reversed(gens):
+                passes._align_parents_to_children(gen, groups[gen][1])
+                passes._enforce_spacing(gen)
+        
+        layout_args = self._layout_args
+        tolerance = layout_args.get("tolerance")
+        if sweeps is None:
+            sweeps = layout_args["adjustment_iterations"]
+            if tolerance is not None:
+                sweeps = layout_args.get("max_iterations", MAX_LAYOUT_ITERATIONS)
+        time_budget = layout_args.get("time_budget")
+        deadline = start + time_budget if time_budget else None
+        done = 0
+        residual = None
+        for _ in range(sweeps):
+            before = passes._snapshot() if tolerance is not None else None
+            down()
+            up()
+            done += 1
+            if tolerance is not None:
+                residual = passes._displacement(before)
+                if residual <= tolerance:
+                    break
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+        if priority in ("Children to Parents (Top-down)", LAYOUT_PRIORITY_ISOTONIC):
+            down()
+        else:
+            up()
+        self._center_layout()
+        
+        self.layout_stats = {
+            "iterations": done,
+            "residual": residual,
+            "converged": None if tolerance is None else (residual is not None and residual <= tolerance),
+            "elapsed": time.perf_counter() - start,
+            "dirty_generations": len(gens),
+            "dirty_nodes": len(self._dirty_nodes),
+        }
+        self._dirty_gens.clear()
+        self._dirty_nodes.clear()
+        self._new_nodes.clear()
+        
+        return self.nodes
+
+
+def _layout_component(store, config, layout_args, deadlines=None, share=1.0):
+    """
+    Lay out one family held in its own NodeStore. `deadlines` maps budget
+    arguments (time_budget, crossing_budget) to wall-clock deadlines; the
+    family gets `share` of the time left until each.
+    Returns (x per node, layout_stats).
+    """
+    args = dict(layout_args)
+    for key, deadline in (deadlines or {}).items():
+        args[key] = max((deadline - time.time()) * share, 1e-6)
+    engine = PedigreeEngine.from_store(store, config)
+    engine.calculate_layout(**args)
+    return store.x, engine.layout_stats
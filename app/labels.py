@@ -0,0 +1,146 @@
+import math
+from collections import defaultdict
+
+from parameter import LABEL_CELL_SIZE, LABEL_CANDIDATES, LABEL_PAD
+
+
+# ========================================
+# Spatial Hash
+# ========================================
+
+class SpatialHash:
+    """
+    Uniform grid of `cell` x `cell` chart units. Boxes and segments are
+    stored in every cell their bounding box touches, so a query for a small
+    box only looks at the few items in its cells.
+    """
+
+    def __init__(self, cell=LABEL_CELL_SIZE):
+        self.cell = cell
+        self.cells = defaultdict(list)
+        self.items = []
+
+    def _cells(self, box):
+        x0, y0, x1, y1 = box
+        c = self.cell
+        for i in range(math.floor(x0 / c), math.floor(x1 / c) + 1):
+            for j in range(math.floor(y0 / c), math.floor(y1 / c) + 1):
+                yield i, j
+
+    def _insert(self, box, segment):
+        k = len(self.items)
+        self.items.append((box, segment))
+        for key in self._cells(box):
+            self.cells[key].append(k)
+
+    def add_box(self, box):
+        """Add the box (x0, y0, x1, y1) as an obstacle."""
+        self._insert(box, None)
+
+    def add_segment(self, x0, y0, x1, y1):
+        """Add the segment from (x0, y0) to (x1, y1) as an obstacle."""
+        self._insert((min(x0, x1), min(y0, y1), max(x0, x1), max(y0, y1)), (x0, y0, x1, y1))
+
+    def count(self, box, limit=None, within=None):
+        """
+        Number of obstacles `box` hits, counting no further than `limit`.
+        Obstacles lying entirely inside the box `within` are not counted.
+        """
+        seen = set()
+        hits = 0
+        for key in self._cells(box):
+            for k in self.cells.get(key, ()):
+                if k in seen:
+                    continue
+                seen.add(k)
+                other, segment = self.items[k]
+                if within is not None and _contains(within, other):
+                    continue
+                if _overlaps(box, other) and (segment is None or _segment_hits(segment, box)):
+                    hits += 1
+                    if hits == limit:
+                        return hits
+        return hits
+
+
+def _overlaps(a, b):
+    return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+
+def _contains(outer, inner):
+    return outer[0] <= inner[0] and outer[1] <= inner[1] and inner[2] <= outer[2] and inner[3] <= outer[3]
+
+
+def _segment_hits(segment, box):
+    # Liang-Barsky: clip the segment's parameter range to the box
+    x0, y0, x1, y1 = segment
+    dx, dy = x1 - x0, y1 - y0
+    t0, t1 = 0.0, 1.0
+    for p, q in ((-dx, x0 - box[0]), (dx, box[2] - x0), (-dy, y0 - box[1]), (dy, box[3] - y0)):
+        if p == 0:
+            if q < 0:
+                return False
+            continue
+        t = q / p
+        if p < 0:
+            t0 = max(t0, t)
+        else:
+            t1 = min(t1, t)
+        if t0 > t1:
+            return False
+    return True
+
+
+# ========================================
+# Label Placement
+# ========================================
+
+def obstacles(scene, labels):
+    """SpatialHash of everything in `scene` except the texts at the indices in `labels`."""
+    grid = SpatialHash()
+    for s in scene.segments:
+        grid.add_segment(s.x0, s.y0, s.x1, s.y1)
+    for a in scene.arrows:
+        grid.add_segment(a.x0, a.y0, a.x1, a.y1)
+    for name in ("symbols", "brackets"):
+        for p in getattr(scene, name):
+            grid.add_box(scene.extent(name, p))
+    for k, t in enumerate(scene.texts):
+        if k not in labels and t.coords == 'data':
+            grid.add_box(scene.text_box(t, LABEL_PAD))
+    return grid
+
+
+def place_labels(scene, labels, symbol_size):
+    """
+    Move the texts at the indices in scene.texts given by `labels` ({index:
+    owner box}) to the first LABEL_CANDIDATES position (offsets in
+    `symbol_size` units) where they hit no line, symbol, other text or
+    already placed label. The owner box (x0, y0, x1, y1) covers the
+    labelled individual's symbol and deceased slash; whatever lies inside it
+    is the label's own and never counts as a hit. A label that fits nowhere
+    takes the candidate with the fewest hits, the default spot on ties.
+    Returns the number of labels moved.
+    """
+    grid = obstacles(scene, labels)
+    # Obstacles are stored with line width included
+    pad = scene.line_width / scene.points_per_unit
+    moved = 0
+    for k in sorted(labels):
+        t = scene.texts[k]
+        x0, y0, x1, y1 = labels[k]
+        own = (x0 - pad, y0 - pad, x1 + pad, y1 + pad)
+        best, best_hits = None, None
+        for ha, dx, dy in LABEL_CANDIDATES:
+            candidate = t._replace(x=t.x + dx * symbol_size, y=t.y + dy * symbol_size, ha=ha)
+            box = scene.text_box(candidate, LABEL_PAD)
+            hits = grid.count(box, limit=best_hits, within=own)
+            if best_hits is None or hits < best_hits:
+                best, best_hits, best_box = candidate, hits, box
+                if hits == 0:
+                    break
+        if best != t:
+            scene.texts[k] = best
+            moved += 1
+        grid.add_box(best_box)
+    return moved
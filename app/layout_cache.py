@@ -0,0 +1,97 @@
+import hashlib
+import json
+import threading
+from array import array
+from collections import OrderedDict
+
+from parameter import LAYOUT_GEOMETRY_KEYS, LAYOUT_CACHE_MAX_ENTRIES, LAYOUT_CACHE_MAX_BYTES, LAYOUT_FLAGS
+from utils import parse_individual_flags
+
+
+class LayoutCache:
+    """
+    Content-addressed LRU cache of layout results.
+
+    Entries are keyed by a hash of the individuals' IDs and LAYOUT_FLAGS,
+    who is in each relationship (partners, children, multiples), the
+    geometry config keys (LAYOUT_GEOMETRY_KEYS) and the calculate_layout
+    arguments, so purely visual edits (deceased, affected, divorced,
+    consanguinity, labels, font size, ...) never invalidate a result. A
+    value is the x position of every node in engine
+    store order plus the layout_stats of the run that produced it.
+    Eviction keeps at most `max_entries` entries and `max_bytes` bytes of
+    positions. Safe to share between threads (Streamlit sessions).
+    """
+
+    def __init__(self, max_entries=LAYOUT_CACHE_MAX_ENTRIES, max_bytes=LAYOUT_CACHE_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(individuals, relationships, config, layout_args):
+        """Canonical hash of everything that determines node positions."""
+        payload = {
+            "individual": [(person.get("id"), parse_individual_flags(person)[0] & LAYOUT_FLAGS) for person in individuals],
+            "relationships": [
+                (
+                    rel.get("p1"), rel.get("p2"), rel.get("children", []),
+                    sorted(sorted(m.get("ids", [])) for m in rel.get("multiples", [])),
+                )
+                for rel in relationships
+            ],
+            "config": {k: config.get(k) for k in LAYOUT_GEOMETRY_KEYS},
+            "layout": layout_args,
+        }
+        canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """Return (positions, layout_stats) for `key`, or None on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, positions, layout_stats):
+        positions = array('d', positions)
+        size = len(positions) * positions.itemsize
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= len(old[0]) * old[0].itemsize
+            self._entries[key] = (positions, dict(layout_stats))
+            self.bytes += size
+
+            while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+                _, (evicted, _) = self._entries.popitem(last=False)
+                self.bytes -= len(evicted) * evicted.itemsize
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def info(self):
+        """Hit/miss counters and current size."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+            }
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,167 @@
+import math
+from array import array
+
+
+def isotonic_fit(targets, weights, lower=-math.inf, upper=math.inf):
+    """
+    Weighted least-squares non-decreasing fit (pool adjacent violators),
+    every value kept within [lower, upper]. Linear time: every value is
+    pooled into a block at most once. Clipping the unbounded fit to the
+    bounds is the exact bounded solution.
+    """
+    # Blocks as [mean, weight, size]
+    blocks = []
+    for t, w in zip(targets, weights):
+        mean, weight, size = t, w, 1
+        while blocks and blocks[-1][0] > mean:
+            prev_mean, prev_weight, prev_size = blocks.pop()
+            total = prev_weight + weight
+            mean = (prev_mean * prev_weight + mean * weight) / total
+            weight = total
+            size += prev_size
+        blocks.append((mean, weight, size))
+
+    fitted = []
+    for mean, _, size in blocks:
+        fitted.extend([max(lower, min(mean, upper))] * size)
+    return fitted
+
+
+class IsotonicPasses:
+    """
+    Constraint-projection layout passes.
+
+    Holding the other generations fixed, each generation is placed by a
+    weighted least-squares fit of every node to a target, subject to the
+    minimum gaps between neighbouring nodes. Shifting node i by the
+    cumulative gap before it turns the gaps into an ordering constraint, so
+    the fit is solved exactly, in linear time, by isotonic_fit.
+
+    Targets are set per group, following the same rules as the engine's
+    passes. Going down, a sibship is shifted as a whole so that its center
+    is under its surrogate anchor or its parents' center. Going up, the
+    parents (or the anchor) of every sibship are shifted so that their
+    center is over it; someone with children by several partners takes the
+    mean of those shifts. Married-in partners move with their partner. Where groups compete for room, the fit finds
+    the least-squares compromise instead of pushing neighbours aside one
+    after another. Pinned nodes are hard bounds: they keep their x and the
+    nodes between two pins are fitted within them. Plugs into
+    calculate_layout through the engine's pass methods, like
+    VectorizedPasses.
+    """
+
+    # Pull of a node's current position when no group sets its target
+    ANCHOR_WEIGHT = 1e-3
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.offsets = {}
+        for gen, nids in engine.generations.items():
+            gaps = engine.spacing[gen]
+            offsets = array('d', [0.0])
+            for k in range(len(nids) - 1):
+                offsets.append(offsets[k] + engine.NODE_WIDTH + gaps[k])
+            self.offsets[gen] = offsets
+
+        # Couples by generation as (parents, children), from the sibships:
+        # the engine's partner groups pool every partner of a person
+        gens = engine.store.gen
+        self.couples = {}
+        for groups in engine.sibling_groups.values():
+            for anchor, p_tuple, sib_ids in groups:
+                parents = (anchor,) if anchor is not None else p_tuple
+                self.couples.setdefault(gens[parents[0]], []).append((parents, sib_ids))
+
+    def _sibship_targets(self, gen):
+        """{node: target x} centering every sibship of `gen` under its anchor or parents."""
+        xs = self.engine.store.x
+        targets = {}
+        for anchor, p_tuple, sib_ids in self.engine.sibling_groups.get(gen, ()):
+            if anchor is not None:
+                center = xs[anchor]
+            else:
+                center = sum(xs[p] for p in p_tuple) / len(p_tuple)
+            sib_xs = [xs[s] for s in sib_ids]
+            shift = center - (min(sib_xs) + max(sib_xs)) / 2
+            for s in sib_ids:
+                targets[s] = xs[s] + shift
+        return targets
+
+    def _couple_targets(self, gen):
+        """{node: target x} centering every couple of `gen` over its own children."""
+        xs = self.engine.store.x
+        shifts = {}
+        for parents, sib_ids in self.couples.get(gen, ()):
+            sib_xs = [xs[s] for s in sib_ids]
+            p_xs = [xs[p] for p in parents]
+            shift = (min(sib_xs) + max(sib_xs)) / 2 - (min(p_xs) + max(p_xs)) / 2
+            for p in parents:
+                shifts.setdefault(p, []).append(shift)
+        # Someone with children by several partners sits between those couples
+        return {p: xs[p] + sum(s) / len(s) for p, s in shifts.items()}
+
+    def _solve(self, gen, targets):
+        nids = self.engine.generations.get(gen)
+        if not nids:
+            return
+
+        store = self.engine.store
+        xs = store.x
+        pinned = self.engine._pinned
+        offsets = self.offsets[gen]
+        ys = []
+        weights = []
+        for nid, offset in zip(nids, offsets):
+            target = targets.get(nid)
+            if target is None:
+                # A married-in partner moves with the partner it has a target through
+                partner = next((s for s in store.spouses(nid) if s in targets), None)
+                if partner is not None:
+                    target = xs[nid] + targets[partner] - xs[partner]
+            if target is None:
+                ys.append(xs[nid] - offset)
+                weights.append(self.ANCHOR_WEIGHT)
+            else:
+                ys.append(target - offset)
+                weights.append(1.0)
+
+        # Pinned nodes stay put; the runs between them are fitted within them
+        lower = -math.inf
+        start = 0
+        for k, nid in enumerate(nids):
+            if nid in pinned:
+                upper = xs[nid] - offsets[k]
+                ys[start:k] = isotonic_fit(ys[start:k], weights[start:k], lower, upper)
+                ys[k] = upper
+                lower = upper
+                start = k + 1
+        ys[start:] = isotonic_fit(ys[start:], weights[start:], lower)
+
+        for nid, offset, y in zip(nids, offsets, ys):
+            if nid not in pinned:
+                xs[nid] = y + offset
+
+    def _initial_layout(self):
+        self.engine._initial_layout()
+
+    def _align_children_to_parents(self, gen, groups=None):
+        self._solve(gen, self._sibship_targets(gen))
+
+    def _align_parents_to_children(self, gen, groups=None):
+        self._solve(gen, self._couple_targets(gen))
+
+    def _enforce_spacing(self, gen):
+        # The fit already satisfies every gap
+        pass
+
+    def _center_layout(self):
+        self.engine._center_layout()
+
+    def _snapshot(self):
+        return self.engine._snapshot()
+
+    def _restore(self, snapshot):
+        self.engine._restore(snapshot)
+
+    def _displacement(self, before):
+        return self.engine._displacement(before)
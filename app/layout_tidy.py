@@ -0,0 +1,247 @@
+class TidyTreeLayout:
+    """
+    Reingold-Tilford / Walker style tidy layout for loop-free pedigrees.
+
+    Partners are grouped into units (connected through partner edges). A
+    unit hangs under the unit holding the parents of its first member with
+    parents. When a partner from another family has parents too (two
+    families marrying), that family is laid out as a tree of its own and
+    placed next to the tree holding the couple, on the partner's side.
+
+    Subtrees are laid out bottom-up. A subtree is summarised by its left and
+    right contour (outermost node per generation), and sibling subtrees are
+    pushed apart only as far as their contours require, using the engine's
+    own required spacing (PARTNER_SPACING, MIN_SIB_SPACING, FAMILY_GAP).
+    Each unit is then centered over its sibship, and a final top-down pass
+    adds up the subtree offsets. Merging a subtree touches one contour entry
+    per generation it spans, so the layout is a single linear pass (times
+    the number of generations) instead of repeated sweeps.
+
+    run() returns False without moving anything only for real loops, where
+    units are joined in a cycle (consanguinity, siblings marrying siblings),
+    or for partners in different generations, so the caller can fall back.
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.store = engine.store
+
+    def _order(self, i):
+        return self.store.gen[i], self.store.sort_idx[i]
+
+    def _build_units(self):
+        """Return (units, head, parent_unit, children, guests), or None for a loop."""
+        engine = self.engine
+        gens = self.store.gen
+        spouses = self.store.spouses
+        parents = self.store.parents
+        unit_of = {}
+        units = []
+
+        for gen in sorted(engine.generations):
+            for i in engine.generations[gen]:
+                if i in unit_of:
+                    continue
+                unit_of[i] = len(units)
+                if not len(spouses(i)):
+                    units.append([i])
+                    continue
+                members = []
+                stack = [i]
+                while stack:
+                    m = stack.pop()
+                    members.append(m)
+                    for s in spouses(m):
+                        if s not in unit_of:
+                            unit_of[s] = len(units)
+                            stack.append(s)
+                members.sort(key=self._order)
+                units.append(members)
+
+        # One edge per member with parents and parent unit
+        edges = []
+        for u, members in enumerate(units):
+            gen = gens[members[0]]
+            for m in members:
+                if gens[m] != gen:
+                    return None
+                for pu in dict.fromkeys(unit_of[p] for p in parents(m)):
+                    edges.append((u, m, pu))
+        if self._has_cycle(len(units), edges):
+            return None
+
+        head = [None] * len(units)
+        parent_unit = [None] * len(units)
+        children = [[] for _ in units]
+        guests = []
+        for u, m, pu in edges:
+            if head[u] is None:
+                head[u] = m
+                parent_unit[u] = pu
+                children[pu].append(u)
+            else:
+                # The partner's family becomes a tree of its own
+                guests.append((u, m, pu))
+
+        for kids in children:
+            if len(kids) > 1:
+                kids.sort(key=lambda c: self._order(head[c]))
+
+        return units, head, parent_unit, children, guests
+
+    @staticmethod
+    def _has_cycle(count, edges):
+        """True if the undirected graph of `count` units and (u, m, pu) `edges` has a cycle."""
+        adjacent = [[] for _ in range(count)]
+        for k, (u, _, pu) in enumerate(edges):
+            adjacent[u].append((pu, k))
+            adjacent[pu].append((u, k))
+        seen = [False] * count
+        for root in range(count):
+            if seen[root]:
+                continue
+            seen[root] = True
+            stack = [(root, None)]
+            while stack:
+                u, via = stack.pop()
+                for v, k in adjacent[u]:
+                    if k == via:
+                        continue
+                    if seen[v]:
+                        return True
+                    seen[v] = True
+                    stack.append((v, k))
+        return False
+
+    def _root_order(self, roots, postorder, units, head, parent_unit, guests):
+        """
+        Roots in packing order: every guest family's tree right beside the
+        tree it married into, left of it if the partner stands left of the
+        unit's head, right of it otherwise.
+        """
+        tree = [None] * len(units)
+        for u in reversed(postorder):
+            tree[u] = u if parent_unit[u] is None else tree[parent_unit[u]]
+        links = {r: [] for r in roots}
+        for u, m, pu in guests:
+            side = -1 if self._order(m) < self._order(head[u]) else 1
+            links[tree[u]].append((tree[pu], side))
+            links[tree[pu]].append((tree[u], -side))
+
+        order = []
+        placed = set()
+        for root in roots:
+            if root in placed:
+                continue
+            placed.add(root)
+            stack = [(root, None, False)]
+            while stack:
+                t, via, emit = stack.pop()
+                if emit:
+                    order.append(t)
+                    continue
+                left = [o for o, side in links[t] if o != via and side < 0]
+                right = [o for o, side in links[t] if o != via and side > 0]
+                placed.update(left + right)
+                # Popped in order: left guests, t itself, right guests
+                stack.extend((o, t, False) for o in reversed(right))
+                stack.append((t, None, True))
+                stack.extend((o, t, False) for o in reversed(left))
+        return order
+
+    def _gap(self, left, right):
+        return self.engine.NODE_WIDTH + self.engine._get_required_spacing(left, right)
+
+    def _merge(self, subtrees, shifts, contours):
+        """
+        Place subtrees left to right as close as their contours allow.
+        Records each subtree's offset in `shifts`; returns the merged contour.
+        """
+        left = right = None
+        for c in subtrees:
+            c_left, c_right = contours[c]
+            contours[c] = None
+
+            if left is None:
+                shifts[c] = 0.0
+                left, right = c_left, c_right
+                continue
+
+            # Subtrees sharing no generation (e.g. founders of different
+            # generations) need no separation
+            shift = max(
+                (right[g][0] + self._gap(right[g][1], n) - x for g, (x, n) in c_left.items() if g in right),
+                default=0.0,
+            )
+            shifts[c] = shift
+            for g, (x, n) in c_left.items():
+                if g not in left:
+                    left[g] = (x + shift, n)
+            for g, (x, n) in c_right.items():
+                right[g] = (x + shift, n)
+
+        return left, right
+
+    def run(self):
+        built = self._build_units()
+        if built is None:
+            return False
+        units, head, parent_unit, children, guests = built
+
+        # Post-order: every unit after all of its descendants
+        roots = [u for u in range(len(units)) if parent_unit[u] is None]
+        postorder = []
+        stack = [(u, False) for u in reversed(roots)]
+        while stack:
+            u, expanded = stack.pop()
+            if expanded:
+                postorder.append(u)
+                continue
+            stack.append((u, True))
+            stack.extend((c, False) for c in reversed(children[u]))
+        if len(postorder) != len(units):
+            # Some units are their own ancestors
+            return False
+
+        gens = self.store.gen
+        rel = {}
+        shifts = [0.0] * len(units)
+        contours = [None] * len(units)
+
+        for u in postorder:
+            members = units[u]
+            kids = children[u]
+
+            if kids:
+                left, right = self._merge(kids, shifts, contours)
+                first, last = kids[0], kids[-1]
+                center = (rel[head[first]] + shifts[first] + rel[head[last]] + shifts[last]) / 2
+            else:
+                left, right = {}, {}
+                center = 0.0
+
+            positions = [0.0]
+            for a, b in zip(members, members[1:]):
+                positions.append(positions[-1] + self._gap(a, b))
+            offset = center - (positions[0] + positions[-1]) / 2
+            for m, x in zip(members, positions):
+                rel[m] = x + offset
+
+            g = gens[members[0]]
+            left[g] = (rel[members[0]], members[0])
+            right[g] = (rel[members[-1]], members[-1])
+            contours[u] = (left, right)
+
+        # Family trees side by side, then offsets accumulated top-down
+        self._merge(self._root_order(roots, postorder, units, head, parent_unit, guests), shifts, contours)
+        xs = self.store.x
+        absolute = [0.0] * len(units)
+        for u in reversed(postorder):
+            if parent_unit[u] is not None:
+                absolute[u] = absolute[parent_unit[u]] + shifts[u]
+            else:
+                absolute[u] = shifts[u]
+            for m in units[u]:
+                xs[m] = rel[m] + absolute[u]
+
+        return True
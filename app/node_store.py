@@ -0,0 +1,268 @@
+from array import array
+from collections.abc import Mapping
+
+from parameter import FLAG_ADOPTED_IN, FLAG_ADOPTED_OUT
+
+
+class NodeStore:
+    """
+    Struct-of-arrays storage for pedigree nodes.
+
+    Each individual ID is interned to an integer index once. Coordinates,
+    generation, sort index, role flags and fill codes live in compact typed
+    arrays, and adjacency (spouses, parents, children) is packed into flat
+    index arrays (CSR layout: ``*_ptr[i]:*_ptr[i+1]`` slices ``*_idx``).
+
+    For editing, thaw() unpacks adjacency back into per-node lists and
+    remove() leaves a tombstone (the index is dropped from `index`, so the
+    slot is skipped by the views) until the store is rebuilt.
+    """
+
+    def __init__(self, node_width=1):
+        self.node_width = node_width
+        self.ids = []
+        self.index = {}
+        self.records = []
+        self.x = array('d')
+        self.y = array('d')
+        # 'q' is 64-bit everywhere; 'l' is only 32-bit on Windows
+        self.gen = array('q')
+        self.sort_idx = array('q')
+        self.flags = array('H')
+        self.fill = array('B')
+
+        # Adjacency while building or editing (per-node lists), packed by freeze()
+        self._spouses = []
+        self._parents = []
+        self._children = []
+        self.spouse_ptr = array('q', [0])
+        self.spouse_idx = array('q')
+        self.parent_ptr = array('q', [0])
+        self.parent_idx = array('q')
+        self.child_ptr = array('q', [0])
+        self.child_idx = array('q')
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def frozen(self):
+        return self._spouses is None
+
+    @property
+    def removed(self):
+        """Number of tombstoned slots."""
+        return len(self.ids) - len(self.index)
+
+    def add(self, pid, record, gen, y, sort_idx, flags=0, fill=0):
+        """Intern an ID and store its attributes. Returns the node index."""
+        i = self.index.get(pid)
+        if i is not None:
+            # 重複IDは後勝ち (dict上書きと同じ挙動)
+            self.records[i] = record
+            self.gen[i] = gen
+            self.y[i] = y
+            self.sort_idx[i] = sort_idx
+            self.flags[i] = flags
+            self.fill[i] = fill
+            return i
+
+        i = len(self.ids)
+        self.index[pid] = i
+        self.ids.append(pid)
+        self.records.append(record)
+        self.x.append(0.0)
+        self.y.append(y)
+        self.gen.append(gen)
+        self.sort_idx.append(sort_idx)
+        self.flags.append(flags)
+        self.fill.append(fill)
+        if self.frozen:
+            # New nodes have no edges yet: extend the CSR pointers in place
+            self.spouse_ptr.append(self.spouse_ptr[-1])
+            self.parent_ptr.append(self.parent_ptr[-1])
+            self.child_ptr.append(self.child_ptr[-1])
+        else:
+            self._spouses.append([])
+            self._parents.append([])
+            self._children.append([])
+        return i
+
+    def remove(self, pid):
+        """Tombstone a node. Its edges must already be unlinked."""
+        i = self.index.pop(pid)
+        self.records[i] = None
+        return i
+
+    def link_partners(self, i, j):
+        self.thaw()
+        if j not in self._spouses[i]:
+            self._spouses[i].append(j)
+        if i not in self._spouses[j]:
+            self._spouses[j].append(i)
+
+    def link_parent_child(self, parent, child):
+        self.thaw()
+        if parent not in self._parents[child]:
+            self._parents[child].append(parent)
+        if child not in self._children[parent]:
+            self._children[parent].append(child)
+
+    def unlink_all(self, i):
+        """Drop every edge of node i. Returns the former neighbours."""
+        self.thaw()
+        neighbours = set(self._spouses[i]) | set(self._parents[i]) | set(self._children[i])
+        for j in self._spouses[i]:
+            self._spouses[j].remove(i)
+        for p in self._parents[i]:
+            self._children[p].remove(i)
+        for c in self._children[i]:
+            self._parents[c].remove(i)
+        self._spouses[i] = []
+        self._parents[i] = []
+        self._children[i] = []
+        return neighbours
+
+    def freeze(self):
+        """Pack the per-node adjacency lists into flat CSR index arrays."""
+        if self.frozen:
+            return
+        self.spouse_ptr, self.spouse_idx = self._pack(self._spouses)
+        self.parent_ptr, self.parent_idx = self._pack(self._parents)
+        self.child_ptr, self.child_idx = self._pack(self._children)
+        self._spouses = self._parents = self._children = None
+
+    def thaw(self):
+        """Unpack the CSR arrays back into per-node lists for editing."""
+        if not self.frozen:
+            return
+        n = len(self.ids)
+        self._spouses = [list(self.spouses(i)) for i in range(n)]
+        self._parents = [list(self.parents(i)) for i in range(n)]
+        self._children = [list(self.children(i)) for i in range(n)]
+
+    @staticmethod
+    def _pack(lists):
+        ptr = array('q', [0])
+        idx = array('q')
+        for items in lists:
+            idx.extend(items)
+            ptr.append(len(idx))
+        return ptr, idx
+
+    def spouses(self, i):
+        if self._spouses is not None:
+            return self._spouses[i]
+        return self.spouse_idx[self.spouse_ptr[i]:self.spouse_ptr[i + 1]]
+
+    def parents(self, i):
+        if self._parents is not None:
+            return self._parents[i]
+        return self.parent_idx[self.parent_ptr[i]:self.parent_ptr[i + 1]]
+
+    def children(self, i):
+        if self._children is not None:
+            return self._children[i]
+        return self.child_idx[self.child_ptr[i]:self.child_ptr[i + 1]]
+
+    def has_children(self, i):
+        return len(self.children(i)) > 0
+
+    def subset(self, nids):
+        """
+        Copy the nodes `nids` (in that order) into a new frozen store.
+        Edges to nodes outside the subset are dropped.
+        """
+        sub = NodeStore(self.node_width)
+        remap = {i: k for k, i in enumerate(nids)}
+        
+        sub.ids = [self.ids[i] for i in nids]
+        sub.index = {pid: k for k, pid in enumerate(sub.ids)}
+        sub.records = [self.records[i] for i in nids]
+        for name in ("x", "y", "gen", "sort_idx", "flags", "fill"):
+            column = getattr(self, name)
+            setattr(sub, name, array(column.typecode, (column[i] for i in nids)))
+        
+        sub._spouses = [[remap[j] for j in self.spouses(i) if j in remap] for i in nids]
+        sub._parents = [[remap[j] for j in self.parents(i) if j in remap] for i in nids]
+        sub._children = [[remap[j] for j in self.children(i) if j in remap] for i in nids]
+        sub.freeze()
+        return sub
+
+    def view(self):
+        """Return a read-only ``{id: node}`` mapping over the store."""
+        return NodesView(self)
+
+
+class NodeView(Mapping):
+    """Dict-like view of a single node, compatible with the drawer."""
+
+    _KEYS = (
+        "data", "id", "gen", "spouse_ids", "children_ids", "parent_ids",
+        "adopted_in", "adopted_out", "x", "y", "width_val", "sort_idx",
+        "flags", "fill",
+    )
+
+    __slots__ = ("_store", "_i")
+
+    def __init__(self, store, i):
+        self._store = store
+        self._i = i
+
+    def __getitem__(self, key):
+        s = self._store
+        i = self._i
+        if key == "x":
+            return s.x[i]
+        if key == "y":
+            return s.y[i]
+        if key == "gen":
+            return s.gen[i]
+        if key == "data":
+            return s.records[i]
+        if key == "id":
+            return s.ids[i]
+        if key == "spouse_ids":
+            return [s.ids[j] for j in s.spouses(i)]
+        if key == "children_ids":
+            return [s.ids[j] for j in s.children(i)]
+        if key == "parent_ids":
+            return [s.ids[j] for j in s.parents(i)]
+        if key == "adopted_in":
+            return bool(s.flags[i] & FLAG_ADOPTED_IN)
+        if key == "adopted_out":
+            return bool(s.flags[i] & FLAG_ADOPTED_OUT)
+        if key == "width_val":
+            return s.node_width
+        if key == "sort_idx":
+            return s.sort_idx[i]
+        if key == "flags":
+            return s.flags[i]
+        if key == "fill":
+            return s.fill[i]
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(self._KEYS)
+
+    def __len__(self):
+        return len(self._KEYS)
+
+
+class NodesView(Mapping):
+    """``{id: node}`` mapping backed by a NodeStore."""
+
+    def __init__(self, store):
+        self._store = store
+
+    def __getitem__(self, pid):
+        return NodeView(self._store, self._store.index[pid])
+
+    def __contains__(self, pid):
+        return pid in self._store.index
+
+    def __iter__(self):
+        return iter(self._store.index)
+
+    def __len__(self):
+        return len(self._store.index)
@@ -2,6 +2,7 @@
 UPLOADER_KEY = 'uploader_key'
 CURRENT_JSON_KEY = 'current_json'
 LANG_KEY = 'lang'
+ENGINE_KEY = 'layout_engine'
 DEFAULT_LANG = "English"
 
 # Layout parameter keys
@@ -20,8 +21,89 @@ LAYOUT_PARAMS = {
     # --- ADDED THESE TWO LINES ---
     'as_slider': ('arrow_size', 12, int),
     'pbs_slider': ('proband_size', 12, int),
+    'lt_slider': ('layout_tolerance', 0.0, float),
+    'ltb_slider': ('layout_time_budget', 0.0, float),
+    'sc_checkbox': ('split_components', False, bool),
+    'ml_checkbox': ('multilevel_layout', False, bool),
+    'cb_slider': ('crossing_budget', 0.0, float),
+    'svp_checkbox': ('svg_preview', False, bool),
+    'mp_input': ('max_megapixels', 50.0, float),
+    'pl_checkbox': ('place_labels', True, bool),
 }
 
+# Layout priority that solves each generation as a least-squares fit (layout_isotonic)
+LAYOUT_PRIORITY_ISOTONIC = "Least Squares (Isotonic)"
+
+# Layout priority that places loop-free pedigrees as a tidy tree (layout_tidy)
+LAYOUT_PRIORITY_TIDY = "Tidy Tree"
+
+# Upper bound on adjustment sweeps when a convergence tolerance is set
+MAX_LAYOUT_ITERATIONS = 100
+
+# Multilevel layout: coarsen until this few blocks remain or a level keeps
+# more than MULTILEVEL_MIN_SHRINK of its nodes; sweeps per refined level
+MULTILEVEL_MIN_NODES = 64
+MULTILEVEL_MIN_SHRINK = 0.9
+MULTILEVEL_REFINE_SWEEPS = 2
+
+# Crossing reduction (layout_order): sweep limit, and sweeps without a
+# lower crossing count before stopping
+ORDER_MAX_SWEEPS = 24
+ORDER_PATIENCE = 4
+
+# Unrelated families are laid out on a process pool only above this many nodes
+PARALLEL_LAYOUT_MIN_NODES = 5000
+
+# Layout result cache bounds (see layout_cache.LayoutCache)
+LAYOUT_CACHE_MAX_ENTRIES = 64
+LAYOUT_CACHE_MAX_BYTES = 32 * 1024 * 1024
+
+# Chart scale in points per layout unit (scene.Scene.points_per_unit): at
+# least CHART_POINTS_PER_UNIT, and more when the font is large next to the
+# symbols so that a symbol stays CHART_SYMBOL_FONT_RATIO times the font size
+CHART_POINTS_PER_UNIT = 30.0
+CHART_SYMBOL_FONT_RATIO = 3.0
+
+# Raster output DPI (exports, on-screen image); drawer.raster_dpi lowers it so
+# an image stays within the max_megapixels setting and CHART_MAX_SIDE_PIXELS,
+# but not below CHART_MIN_DPI: charts that would need less are left to the
+# SVG and deep-zoom exports
+EXPORT_DPI = 300
+SCREEN_DPI = 200
+CHART_MAX_SIDE_PIXELS = 32000
+CHART_MIN_DPI = 36
+
+# Label extents without a renderer (scene.text_size): average glyph advance
+# and line spacing relative to the font size
+TEXT_ADVANCE_EM = 0.6
+TEXT_LINE_SPACING = 1.2
+
+# Label placement (labels.place_labels): cell size of the spatial hash in
+# chart units, padding around label boxes in points, and the positions tried
+# for each label, in order, as (ha, dx, dy) from its default spot under the
+# symbol, in symbol sizes
+LABEL_CELL_SIZE = 2.0
+LABEL_PAD = 1.0
+LABEL_CANDIDATES = (
+    ("center", 0.0, 0.0), ("left", 0.1, 0.0), ("right", -0.1, 0.0),
+    ("center", -0.5, 0.0), ("center", 0.5, 0.0),
+    ("center", 0.0, -0.6), ("left", 0.1, -0.6), ("right", -0.1, -0.6),
+    ("center", 0.0, -1.2), ("left", 0.1, -1.2), ("right", -0.1, -1.2),
+)
+
+# Deep-zoom tile export (tiles.write_tiles): square PNG tiles of TILE_SIZE
+# pixels, the deepest level at TILE_DPI; a process pool renders the tiles
+# from PARALLEL_TILES_MIN tiles per level upwards
+TILE_SIZE = 256
+TILE_DPI = 150
+PARALLEL_TILES_MIN = 64
+
+# Native SVG export (svg_writer): coordinates are rounded to SVG_DECIMALS places
+SVG_DECIMALS = 1
+SVG_FONT_FAMILY = "'Noto Sans JP', 'Noto Sans', 'DejaVu Sans', sans-serif"
+# Dash and gap length per point of line width (matplotlib's lines.dashed_pattern)
+SVG_DASH_PATTERN = (3.7, 1.6)
+
 # Roman numeral mapping for generation parsing
 ROMAN_TO_INT = {
     "I": 1, "II": 2, "III": 3, "IV": 4, "V": 5,
@@ -32,6 +114,17 @@ ROMAN_TO_INT = {
 
 INT_TO_ROMAN = {v: k for k, v in ROMAN_TO_INT.items()}
 
+# Highest generation read from a Roman-numeral ID prefix (LXXXIX); larger
+# prefixes such as 'C-1' are treated as names and the generation is inferred
+MAX_ID_GENERATION = 89
+
+# Roman numeral digits, largest first (see utils.int_to_roman / roman_to_int)
+ROMAN_DIGITS = (
+    (1000, "M"), (900, "CM"), (500, "D"), (400, "CD"),
+    (100, "C"), (90, "XC"), (50, "L"), (40, "XL"),
+    (10, "X"), (9, "IX"), (5, "V"), (4, "IV"), (1, "I"),
+)
+
 # Default layout configuration
 DEFAULT_LAYOUT = {
     "partner_spacing": 1.5,
@@ -48,9 +141,27 @@ DEFAULT_LAYOUT = {
     "node_width": 1,
     # --- ADDED DEFAULTS ---
     "arrow_size": 12,
-    "proband_size": 12
+    "proband_size": 12,
+    "layout_tolerance": 0.0,
+    "layout_time_budget": 0.0,
+    "split_components": False,
+    "multilevel_layout": False,
+    "crossing_budget": 0.0,
+    "svg_preview": False,
+    "max_megapixels": 50.0,
+    "place_labels": True
 }
 
+# Config keys the engine reads for geometry (part of the layout cache key)
+LAYOUT_GEOMETRY_KEYS = ("gen_height", "node_width", "min_sib_spacing", "partner_spacing", "family_gap")
+
+# Config keys that affect node positions; the cached engine is reused
+# across reruns only while these are unchanged
+ENGINE_CONFIG_KEYS = LAYOUT_GEOMETRY_KEYS + (
+    "adjustment_iterations", "layout_priority", "layout_tolerance", "layout_time_budget",
+    "split_components", "multilevel_layout", "crossing_budget",
+)
+
 # Generation labels
 GENERATION_LABELS = {
     1: "Paternal GF",
@@ -95,6 +206,31 @@ GENDER_SHAPES = {
     "NC": "no_children"
 }
 
+# Shapes with a symbol outline (see scene.Symbol); the other GENDER_SHAPES
+# entries are drawn as lines only
+SYMBOL_SHAPES = ("square", "circle", "triangle", "diamond")
+
+# Individual flag bits (see utils.parse_individual_flags)
+FLAG_ADOPTED_IN = 1 << 0
+FLAG_ADOPTED_OUT = 1 << 1
+FLAG_DONOR = 1 << 2
+FLAG_SURROGATE = 1 << 3
+FLAG_DECEASED = 1 << 4
+FLAG_PROBAND = 1 << 5
+FLAG_CLIENT = 1 << 6
+FLAG_DOCUMENTED = 1 << 7
+FLAG_CARRIER = 1 << 8
+FLAG_PREGNANCY = 1 << 9
+FLAG_PINNED = 1 << 10
+# Flags that change the layout (layout_cache keys on these only): donors and
+# surrogates are linked differently, pinned individuals keep their saved x
+LAYOUT_FLAGS = FLAG_DONOR | FLAG_SURROGATE | FLAG_PINNED
+
+# Affected fill codes; bit i of a node's fill mask stands for FILL_CODES[i]
+FILL_CODES = ("A", "A2-1", "A2-2", "A4-1", "A4-2", "A4-3", "A4-4")
+FILL_BITS = {code: 1 << i for i, code in enumerate(FILL_CODES)}
+FILL_AFFECTED = FILL_BITS["A"]
+
 AFFECTED_COLORS = {
     "A2-1": "black",
     "A2-2": "#999999",
@@ -0,0 +1,720 @@
+import unicodedata
+from bisect import bisect_left, bisect_right
+from collections import defaultdict, namedtuple
+
+from parameter import (
+    FILL_BITS, FILL_CODES, FILL_AFFECTED, GENDER_SHAPES, SYMBOL_SHAPES,
+    FLAG_DONOR, FLAG_SURROGATE, FLAG_DECEASED, FLAG_PROBAND, FLAG_CLIENT,
+    FLAG_DOCUMENTED, FLAG_CARRIER, FLAG_PREGNANCY,
+    CHART_POINTS_PER_UNIT, CHART_SYMBOL_FONT_RATIO, TEXT_ADVANCE_EM, TEXT_LINE_SPACING,
+)
+from labels import place_labels
+from utils import int_to_roman
+
+
+# ========================================
+# Primitives
+# ========================================
+# Positions and symbol sizes are in chart units; font sizes, arrow sizes and
+# the scene's line width are in points, as in the layout settings.
+
+# Black line; linestyle '-' or '--'
+Segment = namedtuple("Segment", "x0 y0 x1 y1 linestyle zorder", defaults=('-', 2))
+
+# Individual symbol: shape from SYMBOL_SHAPES, half-size hs, partial fill codes
+Symbol = namedtuple("Symbol", "shape x y hs facecolor fills", defaults=('white', ()))
+
+# Text anchored at (x, y); coords 'axes' places it in 0..1 figure-area units
+Text = namedtuple(
+    "Text", "x y text fontsize ha va color fontweight zorder linespacing background coords",
+    defaults=('left', 'baseline', 'black', 'normal', 3, None, False, 'data'),
+)
+
+# Adoption brackets on both sides of a symbol: half extents hw, hh and arm length
+Bracket = namedtuple("Bracket", "x y hw hh arm zorder", defaults=(13,))
+
+# Client arrow from (x0, y0) to the head at (x1, y1)
+Arrow = namedtuple("Arrow", "x0 y0 x1 y1 size zorder", defaults=(15,))
+
+PRIMITIVES = {"segments": Segment, "symbols": Symbol, "texts": Text, "brackets": Bracket, "arrows": Arrow}
+
+
+class Scene:
+    """
+    Everything a pedigree chart draws, as backend-independent primitives.
+    
+    build_scene() makes all geometry decisions (sibship bars, U-shapes, twin
+    tents, surrogate diagonals); a backend such as drawer.draw_scene only
+    turns primitives into output. Each list keeps drawing order. Scenes
+    compare equal when their primitives match and round-trip through
+    to_dict() / from_dict() (JSON-compatible). `points_per_unit` is the
+    drawing scale every backend uses for the figure or page size.
+    """
+    
+    def __init__(self, line_width, points_per_unit=CHART_POINTS_PER_UNIT):
+        self.line_width = line_width
+        self.points_per_unit = points_per_unit
+        self.segments = []
+        self.symbols = []
+        self.texts = []
+        self.brackets = []
+        self.arrows = []
+        self.xlim = None
+        self.ylim = None
+    
+    def add_line(self, xs, ys, linestyle='-', zorder=2):
+        """Add the segment from (xs[0], ys[0]) to (xs[1], ys[1])."""
+        self.segments.append(Segment(xs[0], ys[0], xs[1], ys[1], linestyle, zorder))
+    
+    def add_text(self, x, y, text, **style):
+        """Add a Text; `style` takes the Text fields (fontsize, ha, va, color, ...)."""
+        self.texts.append(Text(x, y, text, **style))
+    
+    def to_dict(self):
+        data = {"line_width": self.line_width, "points_per_unit": self.points_per_unit,
+                "xlim": self.xlim, "ylim": self.ylim}
+        for name in PRIMITIVES:
+            data[name] = [list(p) for p in getattr(self, name)]
+        return data
+    
+    @classmethod
+    def from_dict(cls, data):
+        scene = cls(data["line_width"], data.get("points_per_unit", CHART_POINTS_PER_UNIT))
+        scene.xlim = tuple(data["xlim"]) if data.get("xlim") else None
+        scene.ylim = tuple(data["ylim"]) if data.get("ylim") else None
+        for name, kind in PRIMITIVES.items():
+            getattr(scene, name).extend(kind(*p) for p in data.get(name, []))
+        scene.symbols = [s._replace(fills=tuple(s.fills)) for s in scene.symbols]
+        return scene
+    
+    def __eq__(self, other):
+        return isinstance(other, Scene) and self.to_dict() == other.to_dict()
+    
+    def text_anchor(self, t):
+        """Anchor of Text `t` in chart units; 'axes' texts are placed within xlim / ylim."""
+        if t.coords != 'axes' or not self.xlim:
+            return t.x, t.y
+        (x0, x1), (y0, y1) = self.xlim, self.ylim
+        return x0 + t.x * (x1 - x0), y0 + t.y * (y1 - y0)
+    
+    def extent(self, name, p):
+        """
+        (x0, y0, x1, y1) covered by primitive `p` of list `name`, in chart
+        units and including line width. Text extents are estimates
+        (text_size), padded for descenders and label backgrounds.
+        """
+        pad = self.line_width / self.points_per_unit
+        if name == "segments":
+            return min(p.x0, p.x1) - pad, min(p.y0, p.y1) - pad, max(p.x0, p.x1) + pad, max(p.y0, p.y1) + pad
+        if name == "symbols":
+            r = p.hs + pad
+            return p.x - r, p.y - r, p.x + r, p.y + r
+        if name == "brackets":
+            return p.x - p.hw - pad, p.y - p.hh - pad, p.x + p.hw + pad, p.y + p.hh + pad
+        if name == "arrows":
+            pad += p.size / self.points_per_unit
+            return min(p.x0, p.x1) - pad, min(p.y0, p.y1) - pad, max(p.x0, p.x1) + pad, max(p.y0, p.y1) + pad
+        return self.text_box(p, self.line_width + 0.3 * p.fontsize)
+    
+    def text_box(self, t, pad=0.0):
+        """(x0, y0, x1, y1) of Text `t` in chart units from text_size, grown by `pad` points."""
+        x, y = self.text_anchor(t)
+        width, height = (v / self.points_per_unit for v in text_size(t))
+        x0 = x - width * {"left": 0.0, "center": 0.5, "right": 1.0}[t.ha]
+        if t.va == 'top':
+            y0 = y - height
+        elif t.va in ('center', 'center_baseline'):
+            y0 = y - height / 2
+        else:
+            y0 = y
+        pad /= self.points_per_unit
+        return x0 - pad, y0 - pad, x0 + width + pad, y0 + height + pad
+
+
+def text_size(t):
+    """Estimated (width, height) of Text `t` in points: TEXT_ADVANCE_EM per glyph, 1 em per wide (CJK) glyph."""
+    lines = t.text.split("\n")
+    advance = max(
+        sum(1.0 if unicodedata.east_asian_width(c) in "WF" else TEXT_ADVANCE_EM for c in line)
+        for line in lines
+    )
+    spacing = t.linespacing if t.linespacing is not None else TEXT_LINE_SPACING
+    return advance * t.fontsize, (1 + spacing * (len(lines) - 1)) * t.fontsize
+
+
+def symbol_shape(gender):
+    """Shape name for a gender code ('M', 'F2', 'N', ...), or None when no symbol is drawn."""
+    if gender in GENDER_SHAPES:
+        # 'I' and 'NC' are drawn as lines only
+        shape = GENDER_SHAPES[gender]
+        return shape if shape in SYMBOL_SHAPES else None
+    if isinstance(gender, str) and len(gender) > 1:
+        # Multiple individuals: 'M3', 'F2', 'N5'
+        if gender[0] in "MF" and gender[1:].isdigit():
+            return GENDER_SHAPES[gender[0]]
+        if gender[0] == "N":
+            return GENDER_SHAPES["N"]
+    return None
+
+
+# ========================================
+# Scene Construction
+# ========================================
+
+def add_individual(scene, x, y, engine_node, config, display_number=None):
+    """
+    Add an individual's symbol, marks and labels to `scene`. Returns the
+    index of its label in scene.texts and the box (x0, y0, x1, y1) of its
+    symbol and deceased slash, or None without a label.
+    """
+    node_data = engine_node["data"]
+    is_adopted_in = engine_node.get("adopted_in", False)
+    is_adopted_out = engine_node.get("adopted_out", False)
+    is_any_adopted = is_adopted_in or is_adopted_out
+    
+    gender = node_data.get("gender", "N")
+    
+    # Flags are parsed once at ingest (utils.parse_individual_flags)
+    flags = engine_node["flags"]
+    fill = engine_node["fill"]
+    is_donor = bool(flags & FLAG_DONOR)
+    is_surrogate = bool(flags & FLAG_SURROGATE)
+    fully_affected = bool(fill & FILL_AFFECTED)
+    
+    deceased = flags & FLAG_DECEASED
+    proband = flags & FLAG_PROBAND
+    client = flags & FLAG_CLIENT
+    documented = flags & FLAG_DOCUMENTED
+    label = node_data.get("label", "")
+    pregnancy = flags & FLAG_PREGNANCY
+    carrier = flags & FLAG_CARRIER
+    size = config['symbol_size']
+    fsize = config['font_size']
+    label_offset = config['label_offset']
+    
+    # --- ADDED: Extract independent sizes with fallback ---
+    arrow_size = config.get('arrow_size', 12)
+    proband_size = config.get('proband_size', 12)
+    # ---------------------------------------------------
+
+    hs = size / 2 
+    # The deceased slash reaches this far past the symbol
+    overhang = 0.1
+    
+    # 2. Base Shape and 3. Fill Logic
+    shape = symbol_shape(gender)
+    if shape:
+        if fully_affected:
+            scene.symbols.append(Symbol(shape, x, y, hs, 'black'))
+        else:
+            scene.symbols.append(Symbol(shape, x, y, hs, 'white', tuple(code for code in FILL_CODES[1:] if fill & FILL_BITS[code])))
+        
+        # Multiple individuals: 'M3', 'F2', 'N5'
+        if gender not in GENDER_SHAPES:
+            scene.add_text(x, y, gender[1:], ha="center", va="center", fontsize=fsize*1.2, zorder=11)
+        
+    # 4. Other Indicators
+    if is_donor:
+        # Determine text color based on fill
+        text_color = 'white' if fully_affected else 'black'
+        scene.add_text(x, y, "D", ha="center", va="center", color=text_color, fontsize=fsize * 1.2, fontweight='normal', zorder=20)
+    
+    if carrier:
+            scene.add_line([x, x], [y-hs*0.9, y+hs*0.9], zorder=11)
+            
+    if is_surrogate:
+        text_color = 'white' if fully_affected else 'black'
+        scene.add_text(x, y, "S", ha="center", va="center", color=text_color, fontsize=fsize * 1.2, fontweight='normal', zorder=20)
+        
+    if deceased:
+        scene.add_line([x-hs-overhang, x+hs+overhang], [y-hs-overhang, y+hs+overhang], zorder=12)
+
+    if gender == "I":
+        scene.add_line([x-hs, x+hs], [y+0.4, y+0.4])
+        scene.add_line([x-hs, x+hs], [y+0.2, y+0.2])
+    elif gender == "NC":
+        scene.add_line([x-hs, x+hs], [y+0.4, y+0.4])
+
+    if proband:
+        # --- MODIFIED: Use proband_size ---
+        scene.add_text(x - hs - 1, y - 0.4, "P", fontsize=proband_size, zorder=15)
+        # ----------------------------------
+        
+    if client:
+        # --- MODIFIED: Use arrow_size ---
+        scale_factor = arrow_size / 12.0
+        arrow_dist = 0.75 * scale_factor
+        scene.arrows.append(Arrow(x - hs - arrow_dist, y - arrow_dist, x - hs, y, arrow_size))
+        # --------------------------------
+
+    if documented:
+        # シンボルの右下に"*"を表示
+        scene.add_text(x + hs + 0.15, y - hs*1.5, "*", 
+                ha="left", va="bottom", fontsize=fsize * 2, color='black', zorder=15)
+    
+    label_info = None
+    if label:
+        reach = hs + overhang
+        label_info = (len(scene.texts), (x - reach, y - reach, x + reach, y + reach))
+        wrapped_label = "\n".join([label[i:i+15] for i in range(0, len(label), 15)]) if "\n" not in label else label
+        scene.add_text(x, y - hs - label_offset, wrapped_label, 
+                ha="center", va="top", fontsize=fsize, 
+                linespacing=1.2, background=True, zorder=20)
+
+    num_str = ""
+    if display_number:
+        num_str = str(display_number)
+    elif 'id' in node_data:
+        try:
+            num_str = node_data['id'].split('-')[-1]
+        except: pass
+    
+    if num_str:
+        scene.add_text(x + hs + 0.15, y + hs - 0.25, num_str, 
+                ha="left", va="bottom", fontsize=fsize, zorder=12)
+    
+    if pregnancy:
+        p_color = 'white' if fully_affected else 'black'
+        scene.add_text(x, y, "P", ha="center", va="center", 
+                color=p_color, fontsize=fsize * 1.2, fontweight='bold', zorder=20) 
+    
+    if is_any_adopted:
+        pad = 0.2
+        bracket_w = 0.15
+        scene.brackets.append(Bracket(x, y, hs + pad, hs + pad, bracket_w))
+    
+    return label_info
+
+
+def assign_lanes(spans):
+    """
+    Lane (0, 1, ...) for each (left, right) span, lane 0 nearest the
+    partners, so that spans sharing a lane neither overlap nor touch and a
+    span enclosing another takes a deeper lane, keeping its legs clear of
+    the inner U-shape. Spans are placed inner first, by right end and then
+    by rightmost left end; each takes the lowest lane below every span it
+    encloses that no span across its left end holds. O(n log n) plus the
+    overlapping pairs.
+    """
+    lanes = [0] * len(spans)
+    placed = []  # placed spans in order of right end
+    rights = []
+    for i in sorted(range(len(spans)), key=lambda i: (spans[i][1], -spans[i][0])):
+        left, right = spans[i]
+        lane = 0
+        taken = set()
+        # Placed spans reaching `left` either lie inside this one or cross its left end
+        for k in range(bisect_left(rights, left), len(placed)):
+            j = placed[k]
+            if spans[j][0] >= left:
+                lane = max(lane, lanes[j] + 1)
+            else:
+                taken.add(lanes[j])
+        while lane in taken:
+            lane += 1
+        lanes[i] = lane
+        placed.append(i)
+        rights.append(right)
+    return lanes
+
+
+def points_per_unit(config):
+    """Drawing scale for `config`: CHART_POINTS_PER_UNIT, raised so symbols stay CHART_SYMBOL_FONT_RATIO times the font size."""
+    return max(CHART_POINTS_PER_UNIT, CHART_SYMBOL_FONT_RATIO * config['font_size'] / config['symbol_size'])
+
+
+def build_scene(engine_nodes, relationships, config, meta=None):
+    """Scene for the positioned `engine_nodes` (engine.calculate_layout) and `relationships`."""
+    gen_height = config['gen_height']
+    lw = config['line_width']
+    u_shape_offset = config['u_shape_offset']
+    
+    scene = Scene(lw, points_per_unit(config))
+    
+    def get_pos(nid):
+        if nid in engine_nodes:
+            return engine_nodes[nid]["x"], engine_nodes[nid]["y"]
+        return None, None
+
+    def check_is_donor(nid):
+        if nid not in engine_nodes: return False
+        return bool(engine_nodes[nid]["flags"] & FLAG_DONOR)
+    
+    def check_is_surrogate(nid):
+        if nid not in engine_nodes: return False
+        return bool(engine_nodes[nid]["flags"] & FLAG_SURROGATE)
+    
+    # Indexes built once per render: relationships by child and by partner,
+    # and each generation's sorted x positions (queried with bisect)
+    child_rels = defaultdict(list)
+    person_rels = defaultdict(list)
+    for r in relationships:
+        for c in r.get("children", []):
+            child_rels[c].append(r)
+        for p in {r.get("p1"), r.get("p2")} - {None, ""}:
+            person_rels[p].append(r)
+    
+    gen_xs = defaultdict(list)
+    for n in engine_nodes.values():
+        gen_xs[n["gen"]].append(n["x"])
+    for xs in gen_xs.values():
+        xs.sort()
+    
+    def num_valid_children(r):
+        return sum(1 for c in r.get("children", []) if c in engine_nodes)
+    
+    def any_between(gen, left_x, right_x):
+        xs = gen_xs[gen]
+        return bisect_left(xs, right_x) > bisect_right(xs, left_x)
+    
+    def drawn_partners(r):
+        """(p1, p2) joined by the regular partner line with donors left out (p1 == p2 for one parent), or None."""
+        p1 = r.get("p1")
+        p2 = r.get("p2")
+        if not p1:
+            return None
+        # ドナーである親は、通常のカギ型配線ロジック上の「親」としては扱わない（Noneにする）
+        # これにより、ドナー側からのカギ型線が描画されるのを防ぐ
+        eff_p1 = p1 if not check_is_donor(p1) else None
+        eff_p2 = p2 if (p2 and not check_is_donor(p2)) else None
+        
+        if eff_p1 is None and eff_p2 is None:
+            return None
+        # 片方がドナーで、もう片方が通常親の場合（例: 母 + 精子ドナー）
+        # 通常親（母）については、通常の「親1人の場合の描画ロジック」を適用して子供と繋ぐ必要がある
+        if eff_p1 is None:
+            # ドナーでない方をp1として扱う（シングルペアレント的な処理に持ち込む）
+            eff_p1 = eff_p2
+        elif eff_p2 is None:
+            # p2がドナーだった場合、p1だけで処理
+            eff_p2 = eff_p1
+        
+        if eff_p1 not in engine_nodes:
+            return None
+        return eff_p1, eff_p2
+    
+    # U-shapes: partners of one generation with others between them. Spans
+    # that do not overlap share a lane (depth below the partners).
+    u_spans = defaultdict(list)
+    for k, r in enumerate(relationships):
+        partners = drawn_partners(r)
+        if partners is None or partners[0] == partners[1] or partners[1] not in engine_nodes:
+            continue
+        n1, n2 = engine_nodes[partners[0]], engine_nodes[partners[1]]
+        left_x, right_x = min(n1["x"], n2["x"]), max(n1["x"], n2["x"])
+        if n1["gen"] == n2["gen"] and any_between(n1["gen"], left_x, right_x):
+            u_spans[n1["gen"]].append((left_x, right_x, k))
+    u_lanes = {}
+    for spans in u_spans.values():
+        lanes = assign_lanes([(left_x, right_x) for left_x, right_x, _ in spans])
+        u_lanes.update((k, lane) for (_, _, k), lane in zip(spans, lanes))
+
+    for k, r in enumerate(relationships):
+        p1 = r.get("p1")
+        p2 = r.get("p2")
+        children = r.get("children", [])
+        in_list = r.get("adopted_in", [])
+        div_status = r.get("divorced", "")
+        is_consanguineous = r.get("consanguinity", False)
+        multiples = r.get("multiples", [])
+        
+        if not p1: continue
+        
+        # --- ドナー判定 ---
+        p1_is_donor = check_is_donor(p1)
+        p2_is_donor = check_is_donor(p2) if p2 else False
+        
+        valid_children = [c for c in children if c in engine_nodes]
+
+        # ドナーの子供のIDを取得
+        donor_children = []
+        if p1_is_donor:
+            donor_children.extend(valid_children)
+        if p2_is_donor:
+            donor_children.extend(valid_children)
+        donor_children = list(set(donor_children))
+        
+        # donor_childrenがvalid_childrenに含まれる親のIDを取得
+        non_donor_parents = []
+        for c in donor_children:
+            for r_check in child_rels[c]:
+                p1_check = r_check.get("p1")
+                p2_check = r_check.get("p2")
+                if p1_check and not check_is_donor(p1_check):
+                    non_donor_parents.append(p1_check)
+                if p2_check and not check_is_donor(p2_check):
+                    non_donor_parents.append(p2_check)
+        non_donor_parents = list(set(non_donor_parents))
+        
+        # non_donor_parentsの子供の数を取得
+        num_siblings = {}
+        for p in non_donor_parents:
+            num_siblings[p] = sum(num_valid_children(r_check) for r_check in person_rels[p])
+            
+        # --- ドナー接続線の描画 (直線) ---
+        # 親がドナーの場合、親から子供たちへ直線を引く
+        if (p1_is_donor and valid_children) or (p2_is_donor and valid_children):
+            x_d, y_d = get_pos(p1)
+            # Without a sibship line under the non-donor parents, run straight to the child
+            is_single_child = all(count == 1 for count in num_siblings.values())
+            for cid in valid_children:
+                xc, yc = get_pos(cid)
+
+                if is_single_child:
+                    # シンボルの中心(x_d, y_d) から 子供のシンボルの上縁へ直線を引く
+                    scene.add_line([x_d, xc], [y_d, yc+config['symbol_size'] / 2], zorder=5)
+                else:
+                    # sibship lineの高さからドナーのシンボルに直線を引く
+                    c_gen = min(engine_nodes[c]["gen"] for c in valid_children)
+                    child_y_level = - (c_gen * gen_height)
+                    sibship_y = child_y_level + (gen_height * 0.3) 
+                    scene.add_line([x_d, xc], [y_d, sibship_y], zorder=5)
+
+        # --- 通常のカギ型配線の準備 ---
+        # 両親ともドナー、あるいは片親のみでその人がドナーだった場合 -> 通常描画は不要
+        partners = drawn_partners(r)
+        if partners is None:
+            continue
+            
+        # --- ここから通常の配線ロジック (ドナーは除外済み) ---
+        p1_curr, p2_curr = partners
+        
+        x1, y1 = get_pos(p1_curr)
+        x2, y2 = get_pos(p2_curr)
+        
+        gen1 = engine_nodes[p1_curr]["gen"]
+        gen2 = engine_nodes[p2_curr]["gen"]
+        
+        mid_x = 0 
+        line_y = 0 
+        rel_min_x, rel_max_x = x1, x1
+
+        # パートナー線 (水平線)
+        if p1_curr == p2_curr:
+            # シングル（またはパートナーがドナーで除外された）ケース
+            # 親から少し下に線を下ろす
+            mid_x = x1
+            line_y = y1 - 0.5
+            scene.add_line([x1, x1], [y1, line_y], zorder=1)
+            rel_min_x, rel_max_x = x1, x1
+
+        elif gen1 == gen2:
+            line_y = y1 
+            left_x, right_x = min(x1, x2), max(x1, x2)
+            rel_min_x, rel_max_x = left_x, right_x
+            mid_x = (x1 + x2) / 2
+            
+            # The partners sit at left_x and right_x, so only others fall strictly between
+            if k in u_lanes:
+                current_u_offset = u_shape_offset + (u_lanes[k] * 0.5)
+                bottom_y = y1 - current_u_offset
+                
+                if is_consanguineous:
+                    offset = 0.15
+                    scene.add_line([x1-offset, x1-offset], [y1, bottom_y+offset])
+                    scene.add_line([x1+offset, x1+offset], [y1, bottom_y-offset])
+                    scene.add_line([x2-offset, x2-offset], [y2, bottom_y+offset])
+                    scene.add_line([x2+offset, x2+offset], [y2, bottom_y-offset])
+                    scene.add_line([x1, x2], [bottom_y+offset, bottom_y+offset])
+                    scene.add_line([x1, x2], [bottom_y-offset, bottom_y-offset])
+                else:
+                    scene.add_line([x1, x1], [y1, bottom_y])
+                    scene.add_line([x2, x2], [y2, bottom_y])
+                    scene.add_line([x1, x2], [bottom_y, bottom_y])
+                line_y = bottom_y
+            else:
+                if is_consanguineous:
+                    offset = 0.1
+                    scene.add_line([x1, x2], [line_y + offset, line_y + offset])
+                    scene.add_line([x1, x2], [line_y - offset, line_y - offset])
+                else:
+                    scene.add_line([x1, x2], [line_y, line_y])
+
+            if str(div_status).startswith("D"):
+                slash_x = mid_x
+                if div_status == "D_p1": slash_x = x1 + (x2 - x1) * 0.4
+                if div_status == "D_p2": slash_x = x1 + (x2 - x1) * 0.6
+                s_size = 0.3
+                d_gap = 0.15
+                scene.add_line([slash_x - d_gap - s_size, slash_x - d_gap + s_size], [line_y - s_size*1.5, line_y + s_size*1.5])
+                scene.add_line([slash_x + d_gap - s_size, slash_x + d_gap + s_size], [line_y - s_size*1.5, line_y + s_size*1.5])
+
+        else:
+            # Inter-generational
+            if gen1 < gen2:
+                x_up, y_up = x1, y1
+                x_low, y_low = x2, y2
+            else:
+                x_up, y_up = x2, y2
+                x_low, y_low = x1, y1
+            
+            line_y = y_low 
+            hs = config['symbol_size'] / 2
+            offset = 0.1
+            
+            if x_up < x_low: stop_x = x_low - hs
+            else: stop_x = x_low + hs
+
+            rel_min_x, rel_max_x = min(x_up, stop_x), max(x_up, stop_x)
+
+            if is_consanguineous:
+                scene.add_line([x_up - offset, x_up - offset], [y_up, line_y + offset])
+                scene.add_line([x_up + offset, x_up + offset], [y_up, line_y - offset])
+                scene.add_line([x_up, stop_x], [line_y + offset, line_y + offset])
+                scene.add_line([x_up, stop_x], [line_y - offset, line_y - offset])
+            else:
+                scene.add_line([x_up, x_up], [y_up, line_y])
+                scene.add_line([x_up, stop_x], [line_y, line_y])
+
+            if str(div_status).startswith("D"):
+                slash_x = (x_up + stop_x) / 2
+                s_size = 0.3
+                d_gap = 0.15
+                scene.add_line([slash_x - d_gap - s_size, slash_x - d_gap + s_size], [line_y - s_size*1.5, line_y + s_size*1.5])
+                scene.add_line([slash_x + d_gap - s_size, slash_x + d_gap + s_size], [line_y - s_size*1.5, line_y + s_size*1.5])
+            pass
+            mid_x = (x_up + stop_x) / 2
+
+        # --- Children Connections ---
+        # Helper to check if a child is involved in surrogacy
+        def is_surrogacy_child(cid):
+            if cid not in engine_nodes: return False
+            # Check all parents of this child
+            for pid in engine_nodes[cid].get("parent_ids", []):
+                if check_is_surrogate(pid):
+                    return True
+            return False
+
+        if valid_children:
+            # Common calculations
+            c_gen = min([engine_nodes[c]["gen"] for c in valid_children], default=gen1+1)
+            child_y_level = - (c_gen * gen_height)
+            sibship_y = child_y_level + (gen_height * 0.3) 
+            
+            # === FIX START: 子供が1人の場合、接続線の下端(mid_x)を子供の位置(cx)に合わせて直立させる ===
+            if len(valid_children) == 1:
+                child_id = valid_children[0]
+                cx, cy = get_pos(child_id)
+                tolerance = 0.1
+                if rel_min_x - tolerance <= cx <= rel_max_x + tolerance:
+                    mid_x = cx
+            
+            # Prepare Multiples Data
+            mult_map = {}
+            for m in multiples:
+                ids = tuple(sorted(m.get("ids", [])))
+                mult_map[ids] = m.get("type", "dizygotic")
+            
+            # Lists for connections
+            regular_xs = []
+            surrogate_targets = [] # (x, y, linestyle)
+            
+            processed_children = set()
+            
+            # 1. Process Multiples (Draw Tents and classify)
+            for m_ids, m_type in mult_map.items():
+                m_points = []
+                m_cids = []
+                is_surr_group = False
+                
+                for cid in m_ids:
+                    if cid in engine_nodes:
+                        m_points.append(get_pos(cid))
+                        m_cids.append(cid)
+                        processed_children.add(cid)
+                        if is_surrogacy_child(cid):
+                            is_surr_group = True
+                
+                if not m_points: continue
+                
+                m_xs = [p[0] for p in m_points]
+                apex_x = sum(m_xs) / len(m_xs)
+                apex_y = sibship_y
+                
+                # Draw Tent (Always draw local tent)
+                for cx, cy in m_points:
+                    scene.add_line([apex_x, cx], [apex_y, cy + config['symbol_size']/2], zorder=1)
+                
+                if m_type == "monozygotic":
+                    bar_y = apex_y - (gen_height * 0.1)
+                    w = (max(m_xs) - min(m_xs)) / 2 * 0.5
+                    scene.add_line([apex_x - w, apex_x + w], [bar_y, bar_y])
+                elif m_type == "unknown":
+                    scene.add_text(apex_x, apex_y - 0.5, "?", ha="center", va="top", fontsize=config['font_size']*1.5, zorder=20)
+                
+                # Add to connection lists
+                if is_surr_group:
+                    # Line to Apex
+                    surrogate_targets.append((apex_x, apex_y, '-')) # Tents are usually solid
+                else:
+                    regular_xs.append(apex_x)
+
+            # 2. Process Singletons
+            for cid in valid_children:
+                if cid in processed_children: continue
+                
+                cx, cy = get_pos(cid)
+                ls = '--' if cid in in_list else '-'
+                
+                if is_surrogacy_child(cid):
+                    # Direct line to head
+                    surrogate_targets.append((cx, cy + config['symbol_size']/2, ls))
+                else:
+                    regular_xs.append(cx)
+                    # Draw drop line from sibship_y to head
+                    scene.add_line([cx, cx], [sibship_y, cy + config['symbol_size']/2], linestyle=ls, zorder=1)
+
+            # 3. Draw Regular Sibship Bar and Parent Connection
+            if regular_xs:
+                all_xs = regular_xs + [mid_x]
+                bar_min = min(all_xs)
+                bar_max = max(all_xs)
+                
+                # Vertical line from Parent to Bar
+                scene.add_line([mid_x, mid_x], [line_y, sibship_y])
+                
+                # Horizontal Bar
+                if bar_max > bar_min + 1e-5:
+                    scene.add_line([bar_min, bar_max], [sibship_y, sibship_y])
+
+            # 4. Draw Surrogate Connections (Direct Diagonal)
+            for tx, ty, tls in surrogate_targets:
+                scene.add_line([mid_x, tx], [line_y, ty], linestyle=tls, zorder=1)
+
+    # Draw Nodes
+    labels = {}
+    for nid, node in engine_nodes.items():
+        label_info = add_individual(scene, node["x"], node["y"], node, config, display_number=None)
+        if label_info is not None:
+            label_index, own_box = label_info
+            labels[label_index] = own_box
+
+    # Labels & Meta
+    all_x = [n["x"] for n in engine_nodes.values()]
+    all_y = [n["y"] for n in engine_nodes.values()]
+    
+    if all_x:
+        min_x = min(all_x) - 3.0
+        present_gens = sorted(list(set(n["gen"] for n in engine_nodes.values())))
+        for g in present_gens:
+            y_coord = - (g * gen_height)
+            label = int_to_roman(g)
+            scene.add_text(min_x, y_coord, label, fontsize=config['font_size'] * 1.5, fontweight='bold', va='center', ha='center')
+
+    if meta:
+        comment_text = meta.get("comments", "")
+        if comment_text:
+            scene.add_text(0.99, 0.04, comment_text, coords='axes', ha='right', va='bottom', fontsize=config['font_size'])
+
+    # Labels move last, once every line, symbol and fixed text is in place
+    if labels and config.get('place_labels', True):
+        place_labels(scene, labels, config['symbol_size'])
+
+    if all_x and all_y:
+        margin = 3.0
+        scene.xlim = (min(all_x) - margin - 1, max(all_x) + margin)
+        # Deep U-shape lanes can reach below the lowest generation
+        bottom = min((min(seg.y0, seg.y1) for seg in scene.segments), default=min(all_y))
+        scene.ylim = (min(min(all_y) - margin - 3, bottom - margin), max(all_y) + margin)
+
+    return scene
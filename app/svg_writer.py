@@ -0,0 +1,282 @@
+import io
+import math
+import re
+import unicodedata
+from collections import defaultdict
+from xml.sax.saxutils import escape, quoteattr
+
+from parameter import (
+    AFFECTED_COLORS, SVG_DECIMALS, SVG_FONT_FAMILY, SVG_DASH_PATTERN,
+)
+from symbols import CIRCLE_WEDGES, FILL_REGIONS, POLYGONS, clip_polygon
+
+
+# Text alignment: scene.Text ha / va -> SVG attributes
+TEXT_ANCHOR = {"left": "start", "center": "middle", "right": "end"}
+DOMINANT_BASELINE = {"center": "central", "top": "text-before-edge", "bottom": "text-after-edge"}
+
+# Order of element kinds sharing a zorder, as drawer.draw_scene adds them
+KIND_ORDER = ("texts", "arrows", "symbols", "lines")
+
+# matplotlib's '->' arrow: head length and half width per point of
+# mutation scale, and the gap left at both ends (points)
+ARROW_HEAD_LENGTH = 0.4
+ARROW_HEAD_WIDTH = 0.2
+ARROW_SHRINK = 2.0
+
+
+# matplotlib mathtext subset written as SVG: \mathbf{..} / \mathit{..} / \mathrm{..},
+# sub- and superscripts, named symbols (Greek letters), escaped characters,
+# italic letters and anything else as is
+MATH_TOKEN = re.compile(
+    r"\\math(bf|it|rm)\{([^}]*)\}|([_^])(?:\{([^}]*)\}|(\S))|\\([A-Za-z]+)|\\(.)|([A-Za-z]+)|([^\\_^A-Za-z]+)"
+)
+MATH_FONTS = {"bf": ' font-weight="bold"', "it": ' font-style="italic"', "rm": ""}
+MATH_SYMBOLS = {"pm": "\u00b1", "times": "\u00d7", "cdot": "\u00b7", "infty": "\u221e", "rightarrow": "\u2192"}
+
+
+def _math_symbol(name):
+    if name in MATH_SYMBOLS:
+        return MATH_SYMBOLS[name]
+    case = "CAPITAL" if name[0].isupper() else "SMALL"
+    try:
+        return unicodedata.lookup(f"GREEK {case} LETTER {name.upper()}")
+    except KeyError:
+        return "\\" + name
+
+
+def _rich_text(text):
+    """SVG markup for one line of `text`, with $...$ parts rendered like matplotlib mathtext."""
+    parts = re.split(r"(?<!\\)\$", text)
+    if len(parts) % 2 == 0:
+        # Unbalanced '$': matplotlib shows the text as is
+        return escape(text)
+    markup = []
+    for k, part in enumerate(parts):
+        if k % 2 == 0:
+            markup.append(escape(part.replace("\\$", "$")))
+            continue
+        for m in MATH_TOKEN.finditer(part):
+            font, body, script, script_body, script_char, command, escaped, letters, other = m.groups()
+            if font:
+                body = escape(body.replace("\\ ", " "))
+                markup.append(f"<tspan{MATH_FONTS[font]}>{body}</tspan>")
+            elif script:
+                shift = "sub" if script == "_" else "super"
+                markup.append(f'<tspan baseline-shift="{shift}" font-size="70%">{escape(script_body or script_char)}</tspan>')
+            elif command:
+                markup.append(escape(_math_symbol(command)))
+            elif escaped:
+                markup.append(escape(escaped))
+            elif letters:
+                markup.append(f'<tspan font-style="italic">{escape(letters)}</tspan>')
+            else:
+                markup.append(escape(other))
+    return "".join(markup)
+
+
+def _q(value):
+    """Quantized coordinate: rounded to SVG_DECIMALS places, trailing zeros dropped."""
+    text = f"{value:.{SVG_DECIMALS}f}"
+    if "." in text:
+        text = text.rstrip("0").rstrip(".")
+    return "0" if text == "-0" else text
+
+
+def _polygon_d(points, r):
+    # Chart y points up, SVG y points down
+    return "M" + "L".join(f"{_q(px * r)},{_q(-py * r)}" for px, py in points) + "Z"
+
+
+def _wedge_d(theta1, theta2, r):
+    """Circle sector from theta1 to theta2 (degrees, counter-clockwise) in quarter-turn arcs."""
+    steps = max(1, math.ceil((theta2 - theta1) / 90.0 - 1e-9))
+    angles = [math.radians(theta1 + (theta2 - theta1) * k / steps) for k in range(steps + 1)]
+    d = f"M0,0L{_q(r * math.cos(angles[0]))},{_q(-r * math.sin(angles[0]))}"
+    for a in angles[1:]:
+        # Counter-clockwise in the chart is sweep-flag 0 once y is flipped
+        d += f"A{_q(r)},{_q(r)} 0 0 0 {_q(r * math.cos(a))},{_q(-r * math.sin(a))}"
+    return d + "Z"
+
+
+def _shape_d(shape, r):
+    if shape == "circle":
+        return f"M{_q(r)},0A{_q(r)},{_q(r)} 0 1 0 {_q(-r)},0A{_q(r)},{_q(r)} 0 1 0 {_q(r)},0Z"
+    return _polygon_d(POLYGONS[shape], r)
+
+
+def _fill_d(shape, code, r):
+    if shape == "circle":
+        return _wedge_d(*CIRCLE_WEDGES[code], r)
+    return _polygon_d(clip_polygon(POLYGONS[shape], FILL_REGIONS[code]), r)
+
+
+class SvgWriter:
+    """
+    Write a scene.Scene as SVG without going through matplotlib.
+
+    Symbols are defined once per shape, size and fill region as <symbol>
+    elements and placed with <use>; all segments of one style form a single
+    <path>; labels are real <text> elements. Elements are written to `out`
+    (any object with a write(str) method) as they are generated, ordered by
+    zorder like the matplotlib chart, at the same scale
+    (scene.points_per_unit).
+    """
+
+    def __init__(self, scene):
+        self.scene = scene
+        if scene.xlim:
+            (self.x0, x1), (y0, self.y1) = scene.xlim, scene.ylim
+            width, height = x1 - self.x0, self.y1 - y0
+        else:
+            self.x0, self.y1, width, height = 0.0, 0.0, 1.0, 1.0
+        self.scale = scene.points_per_unit
+        self.width = width * self.scale
+        self.height = height * self.scale
+        self.symbol_ids = {}
+
+    def X(self, x):
+        return _q((x - self.x0) * self.scale)
+
+    def Y(self, y):
+        return _q((self.y1 - y) * self.scale)
+
+    def write(self, out):
+        scene = self.scene
+        w, h = _q(self.width), _q(self.height)
+        out.write(
+            f'<svg xmlns="http://www.w3.org/2000/svg" width="{w}pt" height="{h}pt" viewBox="0 0 {w} {h}" '
+            f'font-family={quoteattr(SVG_FONT_FAMILY)}>\n'
+        )
+        self._write_defs(out)
+
+        layers = defaultdict(lambda: defaultdict(list))
+        for t in scene.texts:
+            layers[t.zorder]["texts"].append(t)
+        for a in scene.arrows:
+            layers[a.zorder]["arrows"].append(a)
+        if scene.symbols:
+            layers[10]["symbols"] = scene.symbols
+        for s in scene.segments:
+            layers[s.zorder]["lines"].append(s)
+        for b in scene.brackets:
+            layers[b.zorder]["lines"].extend(self._bracket_segments(b))
+
+        for zorder in sorted(layers):
+            kinds = layers[zorder]
+            for kind in KIND_ORDER:
+                if kinds[kind]:
+                    getattr(self, f"_write_{kind}")(out, kinds[kind])
+        out.write("</svg>\n")
+
+    def _write_defs(self, out):
+        out.write('<defs>\n<filter id="label-bg" x="0" y="0" width="1" height="1">'
+                  '<feFlood flood-color="white" flood-opacity="0.7"/><feComposite in="SourceGraphic"/></filter>\n')
+        # One definition per (shape, fill code or None for the outline, size)
+        for s in self.scene.symbols:
+            for code in (None, *s.fills):
+                key = (s.shape, code, s.hs)
+                if key in self.symbol_ids:
+                    continue
+                self.symbol_ids[key] = sid = f"s{len(self.symbol_ids)}"
+                r = s.hs * self.scale
+                d = _shape_d(s.shape, r) if code is None else _fill_d(s.shape, code, r)
+                out.write(f'<symbol id="{sid}" overflow="visible"><path d="{d}"/></symbol>\n')
+        out.write("</defs>\n")
+
+    def _use(self, key, x, y, fill=None):
+        fill = f' fill="{fill}"' if fill else ""
+        return f'<use href="#{self.symbol_ids[key]}" x="{self.X(x)}" y="{self.Y(y)}"{fill}/>\n'
+
+    def _write_symbols(self, out, symbols):
+        # Faces, then partial fills, then outlines on top (as drawer.SymbolBatch)
+        out.write('<g stroke="none">\n')
+        for s in symbols:
+            out.write(self._use((s.shape, None, s.hs), s.x, s.y, s.facecolor))
+        for s in symbols:
+            for code in s.fills:
+                out.write(self._use((s.shape, code, s.hs), s.x, s.y, AFFECTED_COLORS[code]))
+        out.write(f'</g>\n<g fill="none" stroke="black" stroke-width="{_q(self.scene.line_width)}" '
+                  f'stroke-linejoin="miter">\n')
+        for s in symbols:
+            out.write(self._use((s.shape, None, s.hs), s.x, s.y))
+        out.write("</g>\n")
+
+    @staticmethod
+    def _bracket_segments(b):
+        for side in (-1, 1):
+            bx = b.x + side * b.hw
+            yield (bx, b.y + b.hh, bx, b.y - b.hh, "-")
+            yield (bx, b.y + b.hh, bx - side * b.arm, b.y + b.hh, "-")
+            yield (bx, b.y - b.hh, bx - side * b.arm, b.y - b.hh, "-")
+
+    def _write_lines(self, out, segments):
+        lw = self.scene.line_width
+        by_style = defaultdict(list)
+        for s in segments:
+            by_style[s[4]].append(s)
+        for linestyle, group in by_style.items():
+            if linestyle == "-":
+                style = 'stroke-linecap="square"'
+            else:
+                dash, gap = SVG_DASH_PATTERN
+                style = f'stroke-linecap="butt" stroke-dasharray="{_q(dash * lw)},{_q(gap * lw)}"'
+            d = "".join(f"M{self.X(s[0])},{self.Y(s[1])}L{self.X(s[2])},{self.Y(s[3])}" for s in group)
+            out.write(f'<path fill="none" stroke="black" stroke-width="{_q(lw)}" {style} d="{d}"/>\n')
+
+    def _write_arrows(self, out, arrows):
+        for a in arrows:
+            x0, y0 = (a.x0 - self.x0) * self.scale, (self.y1 - a.y0) * self.scale
+            x1, y1 = (a.x1 - self.x0) * self.scale, (self.y1 - a.y1) * self.scale
+            length = math.hypot(x1 - x0, y1 - y0) or 1.0
+            ux, uy = (x1 - x0) / length, (y1 - y0) / length
+            x0, y0 = x0 + ux * ARROW_SHRINK, y0 + uy * ARROW_SHRINK
+            x1, y1 = x1 - ux * ARROW_SHRINK, y1 - uy * ARROW_SHRINK
+            hl, hw = ARROW_HEAD_LENGTH * a.size, ARROW_HEAD_WIDTH * a.size
+            bx, by = x1 - ux * hl, y1 - uy * hl
+            d = (f"M{_q(x0)},{_q(y0)}L{_q(x1)},{_q(y1)}"
+                 f"M{_q(bx - uy * hw)},{_q(by + ux * hw)}L{_q(x1)},{_q(y1)}L{_q(bx + uy * hw)},{_q(by - ux * hw)}")
+            out.write(f'<path fill="none" stroke="black" stroke-width="{_q(self.scene.line_width)}" d="{d}"/>\n')
+
+    def _write_texts(self, out, texts):
+        for t in texts:
+            if t.coords == "axes":
+                x, y = _q(t.x * self.width), _q((1.0 - t.y) * self.height)
+            else:
+                x, y = self.X(t.x), self.Y(t.y)
+            attrs = f'x="{x}" y="{y}" font-size="{_q(t.fontsize)}"'
+            if t.ha != "left":
+                attrs += f' text-anchor="{TEXT_ANCHOR[t.ha]}"'
+            if t.va in DOMINANT_BASELINE:
+                attrs += f' dominant-baseline="{DOMINANT_BASELINE[t.va]}"'
+            if t.color != "black":
+                attrs += f' fill="{t.color}"'
+            if t.fontweight != "normal":
+                attrs += f' font-weight="{t.fontweight}"'
+            if t.background:
+                attrs += ' filter="url(#label-bg)"'
+
+            lines = str(t.text).split("\n")
+            if len(lines) == 1:
+                out.write(f"<text {attrs}>{_rich_text(lines[0])}</text>\n")
+                continue
+            # Multi-line text: the block is aligned as a whole, like matplotlib
+            spacing = t.linespacing or 1.2
+            first = {"top": 0.0, "center": -(len(lines) - 1) / 2}.get(t.va, -(len(lines) - 1)) * spacing
+            spans = "".join(
+                f'<tspan x="{x}" dy="{_q(first if k == 0 else spacing)}em">{_rich_text(line)}</tspan>'
+                for k, line in enumerate(lines)
+            )
+            out.write(f"<text {attrs}>{spans}</text>\n")
+
+
+def write_svg(scene, out):
+    """Stream `scene` as SVG to `out` (a text file or buffer)."""
+    SvgWriter(scene).write(out)
+
+
+def scene_to_svg(scene):
+    """`scene` as an SVG string."""
+    buf = io.StringIO()
+    write_svg(scene, buf)
+    return buf.getvalue()
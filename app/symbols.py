@@ -0,0 +1,85 @@
+import numpy as np
+from matplotlib.path import Path
+
+
+# ========================================
+# Unit Symbol Paths
+# ========================================
+# Every path is centred on (0, 0) with half-size 1; drawer.SymbolBatch
+# scales it by symbol_size / 2 and moves it to the individual's position.
+
+# (x0, y0, x1, y1) of each partial fill region in unit coordinates
+FILL_REGIONS = {
+    "A2-1": (0.0, -1.0, 1.0, 1.0),
+    "A2-2": (-1.0, -1.0, 0.0, 1.0),
+    "A4-1": (0.0, 0.0, 1.0, 1.0),
+    "A4-2": (0.0, -1.0, 1.0, 0.0),
+    "A4-3": (-1.0, -1.0, 0.0, 0.0),
+    "A4-4": (-1.0, 0.0, 0.0, 1.0),
+}
+
+# Angular range (degrees) of the same regions on the unit circle
+CIRCLE_WEDGES = {
+    "A2-1": (-90.0, 90.0),
+    "A2-2": (90.0, 270.0),
+    "A4-1": (0.0, 90.0),
+    "A4-2": (270.0, 360.0),
+    "A4-3": (180.0, 270.0),
+    "A4-4": (90.0, 180.0),
+}
+
+# Polygon corners of every shape in parameter.SYMBOL_SHAPES except the circle
+POLYGONS = {
+    "square": [(-1.0, -1.0), (1.0, -1.0), (1.0, 1.0), (-1.0, 1.0)],
+    "triangle": [(-1.0, -0.5), (0.0, 1.0), (1.0, -0.5)],
+    "diamond": [(0.0, 1.0), (1.0, 0.0), (0.0, -1.0), (-1.0, 0.0)],
+}
+
+
+def clip_polygon(points, region):
+    """Clip a convex polygon to the axis-aligned box `region` (Sutherland-Hodgman)."""
+    x0, y0, x1, y1 = region
+    edges = (
+        (lambda p: p[0] >= x0, lambda p, q: (x0, p[1] + (q[1] - p[1]) * (x0 - p[0]) / (q[0] - p[0]))),
+        (lambda p: p[0] <= x1, lambda p, q: (x1, p[1] + (q[1] - p[1]) * (x1 - p[0]) / (q[0] - p[0]))),
+        (lambda p: p[1] >= y0, lambda p, q: (p[0] + (q[0] - p[0]) * (y0 - p[1]) / (q[1] - p[1]), y0)),
+        (lambda p: p[1] <= y1, lambda p, q: (p[0] + (q[0] - p[0]) * (y1 - p[1]) / (q[1] - p[1]), y1)),
+    )
+    for inside, cross in edges:
+        clipped = []
+        for k, q in enumerate(points):
+            p = points[k - 1]
+            if inside(q):
+                if not inside(p):
+                    clipped.append(cross(p, q))
+                clipped.append(q)
+            elif inside(p):
+                clipped.append(cross(p, q))
+        points = clipped
+    return points
+
+
+def _closed(points):
+    # Clipping repeats vertices that lie on the region boundary
+    points = [p for k, p in enumerate(points) if p != points[k - 1]]
+    return Path(points + [points[0]], closed=True)
+
+
+def _build():
+    shapes = {"circle": Path.unit_circle()}
+    fills = {}
+    for code, (theta1, theta2) in CIRCLE_WEDGES.items():
+        fills["circle", code] = Path.wedge(theta1, theta2)
+    for shape, points in POLYGONS.items():
+        shapes[shape] = _closed(points)
+        for code, region in FILL_REGIONS.items():
+            fills[shape, code] = _closed(clip_polygon(points, region))
+    return shapes, fills
+
+
+UNIT_SHAPES, UNIT_FILLS = _build()
+
+
+def place(path, x, y, hs):
+    """`path` scaled by `hs` and moved to (x, y)."""
+    return Path(path.vertices * hs + np.array((x, y)), path.codes)
@@ -0,0 +1,204 @@
+import math
+import os
+import tempfile
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib.pyplot as plt
+from PIL import Image
+
+from drawer import draw_scene
+from parameter import TILE_SIZE, TILE_DPI, PARALLEL_TILES_MIN
+from scene import PRIMITIVES, Scene
+
+
+# ========================================
+# Deep Zoom Pyramid
+# ========================================
+# Level `max_level` holds the chart at TILE_DPI; every level below halves
+# the resolution, down to a single pixel at level 0 (Deep Zoom / DZI).
+# Tiles are drawn from the scene at each level's own DPI, not downsampled.
+
+DZI_MANIFEST = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<Image xmlns="http://schemas.microsoft.com/deepzoom/2008" Format="png" Overlap="0" TileSize="{tile_size}">\n'
+    '  <Size Width="{width}" Height="{height}"/>\n'
+    '</Image>\n'
+)
+
+
+class TilePyramid:
+    """Pixel geometry of the deep-zoom pyramid for a scene."""
+
+    def __init__(self, scene, tile_size=TILE_SIZE, dpi=TILE_DPI):
+        self.tile_size = tile_size
+        self.dpi = dpi
+        (self.x0, x1), (y0, self.y1) = scene.xlim, scene.ylim
+        # Pixels per chart unit at the deepest level
+        self.scale = scene.points_per_unit / 72 * dpi
+        self.width = max(math.ceil((x1 - self.x0) * self.scale), 1)
+        self.height = max(math.ceil((self.y1 - y0) * self.scale), 1)
+        self.max_level = math.ceil(math.log2(max(self.width, self.height)))
+
+    def level_size(self, level):
+        """(width, height) in pixels of `level`."""
+        factor = 2 ** (self.max_level - level)
+        return math.ceil(self.width / factor), math.ceil(self.height / factor)
+
+    def level_scale(self, level):
+        """Pixels per chart unit at `level`."""
+        return self.scale / 2 ** (self.max_level - level)
+
+    def grid(self, level):
+        """(columns, rows) of tiles at `level`."""
+        width, height = self.level_size(level)
+        return math.ceil(width / self.tile_size), math.ceil(height / self.tile_size)
+
+    def tile_window(self, level, col, row):
+        """Chart-unit window ((x0, x1), (y0, y1)) and pixel size (w, h) of a tile."""
+        width, height = self.level_size(level)
+        t = self.tile_size
+        w = min(t, width - col * t)
+        h = min(t, height - row * t)
+        scale = self.level_scale(level)
+        x0 = self.x0 + col * t / scale
+        y1 = self.y1 - row * t / scale
+        return (x0, x0 + w / scale), (y1 - h / scale, y1), (w, h)
+
+    def index(self, scene, level):
+        """
+        {(col, row): {name: [indices]}} of the primitives intersecting each
+        tile at `level`, in drawing order. Tiles nothing touches are left out.
+        """
+        cols, rows = self.grid(level)
+        per_unit = self.level_scale(level) / self.tile_size
+        tiles = {}
+        for name in PRIMITIVES:
+            for i, p in enumerate(getattr(scene, name)):
+                x0, y0, x1, y1 = scene.extent(name, p)
+                c0 = max(int((x0 - self.x0) * per_unit), 0)
+                c1 = min(int((x1 - self.x0) * per_unit), cols - 1)
+                r0 = max(int((self.y1 - y1) * per_unit), 0)
+                r1 = min(int((self.y1 - y0) * per_unit), rows - 1)
+                for col in range(c0, c1 + 1):
+                    for row in range(r0, r1 + 1):
+                        tiles.setdefault((col, row), {}).setdefault(name, []).append(i)
+        return tiles
+
+
+def tile_scene(scene, selection, xlim, ylim, min_fontsize=0.0):
+    """Scene with the primitives of `selection` ({name: [indices]}) and the given limits, without texts below `min_fontsize`."""
+    tile = Scene(scene.line_width, scene.points_per_unit)
+    for name, indices in selection.items():
+        items = getattr(scene, name)
+        getattr(tile, name).extend(items[i] for i in indices)
+    # 'axes' texts refer to the whole chart, not to the tile
+    tile.texts = [
+        t._replace(x=x, y=y, coords='data') if t.coords == 'axes' else t
+        for t in tile.texts if t.fontsize >= min_fontsize
+        for x, y in [scene.text_anchor(t)]
+    ]
+    tile.xlim, tile.ylim = xlim, ylim
+    return tile
+
+
+def _inches(pixels, dpi):
+    # Agg truncates the canvas size, so round up to the next float if needed
+    inches = pixels / dpi
+    return inches if inches * dpi >= pixels else math.nextafter(inches, math.inf)
+
+
+def render_tile(scene, pyramid, level, col, row, selection, path):
+    """Draw one tile of `pyramid` to the PNG file `path`."""
+    xlim, ylim, (w, h) = pyramid.tile_window(level, col, row)
+    if not selection:
+        Image.new("RGBA", (w, h), "white").save(path, format="png")
+        return
+    dpi = pyramid.dpi / 2 ** (pyramid.max_level - level)
+    # Text under one pixel is invisible, and FreeType cannot size it
+    fig = draw_scene(tile_scene(scene, selection, xlim, ylim, min_fontsize=72 / dpi))
+    fig.set_size_inches(_inches(w, dpi), _inches(h, dpi))
+    fig.savefig(path, format="png", dpi=dpi)
+    plt.close(fig)
+
+
+_worker_state = {}
+
+
+def _init_worker(scene, pyramid):
+    _worker_state["scene"] = scene
+    _worker_state["pyramid"] = pyramid
+
+
+def _render_tiles(jobs):
+    scene, pyramid = _worker_state["scene"], _worker_state["pyramid"]
+    for job in jobs:
+        render_tile(scene, pyramid, *job)
+    return len(jobs)
+
+
+def write_tiles(scene, directory, name="pedigree", tile_size=TILE_SIZE, dpi=TILE_DPI, workers=None):
+    """
+    Write `scene` as a Deep Zoom image: `name`.dzi (the manifest) and
+    `name`_files/<level>/<col>_<row>.png in `directory`.
+
+    Each tile draws only the primitives intersecting it, so memory per tile
+    does not grow with the chart; empty tiles are written blank. With workers=None, levels of at least
+    PARALLEL_TILES_MIN tiles run on a process pool (one worker per CPU);
+    an explicit `workers` > 1 always uses a pool.
+    Returns the path of the manifest.
+    """
+    if not scene.xlim:
+        raise ValueError("scene has no extent to tile")
+    pyramid = TilePyramid(scene, tile_size, dpi)
+    if workers is None:
+        workers = os.cpu_count() or 1
+        min_tiles = PARALLEL_TILES_MIN
+    else:
+        min_tiles = 2
+
+    pool = None
+    try:
+        for level in range(pyramid.max_level + 1):
+            level_dir = os.path.join(directory, f"{name}_files", str(level))
+            os.makedirs(level_dir, exist_ok=True)
+            cols, rows = pyramid.grid(level)
+            tiles = pyramid.index(scene, level)
+            jobs = [
+                (level, col, row, tiles.get((col, row), {}), os.path.join(level_dir, f"{col}_{row}.png"))
+                for col in range(cols) for row in range(rows)
+            ]
+            if workers > 1 and len(jobs) >= min_tiles:
+                if pool is None:
+                    pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(scene, pyramid))
+                # A few batches per worker keep the pool busy without one task per tile
+                size = max(len(jobs) // (workers * 4), 1)
+                list(pool.map(_render_tiles, [jobs[i:i + size] for i in range(0, len(jobs), size)]))
+            else:
+                for job in jobs:
+                    render_tile(scene, pyramid, *job)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    manifest = os.path.join(directory, f"{name}.dzi")
+    with open(manifest, "w", encoding="utf-8") as f:
+        f.write(DZI_MANIFEST.format(tile_size=tile_size, width=pyramid.width, height=pyramid.height))
+    return manifest
+
+
+def zip_tiles(scene, file, name="pedigree", **options):
+    """
+    Write write_tiles(scene, ...) output as a ZIP archive to `file` (a path
+    or a binary file object); `options` go to write_tiles. The tiles go
+    through a temporary directory, so memory does not grow with the chart.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        write_tiles(scene, directory, name, **options)
+        # PNG tiles are already compressed
+        with zipfile.ZipFile(file, "w", zipfile.ZIP_STORED) as archive:
+            for root, dirs, files in os.walk(directory):
+                dirs.sort()
+                for file_name in sorted(files):
+                    path = os.path.join(root, file_name)
+                    archive.write(path, os.path.relpath(path, directory))
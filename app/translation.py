@@ -35,8 +35,8 @@ LANGUAGES = {
         "label_ai": "6. Layout adjustment iterations",
         "help_ai": "Number of iterations for layout optimization. Higher values take more time but may improve layout.",
         "label_lp": "7. Layout Priority",
-        "help_lp": "Choose the layout direction for the pedigree chart.",
-        "lp_options": ["Children to Parents (Top-down)", "Parents to Children (Bottom-up)"],
+        "help_lp": "Choose the layout direction for the pedigree chart. Least Squares places each generation as close as possible to parents and children in one step, and usually settles without the directions pulling against each other. Tidy Tree places pedigrees without loops in a single pass, with families joined by marriage side by side; pedigrees with loops (e.g. consanguineous couples) use Children to Parents instead.",
+        "lp_options": ["Children to Parents (Top-down)", "Parents to Children (Bottom-up)", "Least Squares (Isotonic)", "Tidy Tree (Descendants)"],
         "sub_visual": "Visual Style",
         "label_ss": "8. Symbol size",
         "help_ss": "Size of the symbols (nodes) in the pedigree chart.",
@@ -46,10 +46,16 @@ LANGUAGES = {
         "help_fs": "Font size of the labels in the pedigree chart.",
         "label_lo": "11. Label vertical position",
         "help_lo": "Vertical position adjustment for labels in the pedigree chart.",
+        "label_pl": "Avoid label overlaps",
+        "help_pl": "Move labels that would overlap lines, symbols or other labels to a free spot next to or below their symbol.",
         "label_as": "12. Client arrow size",
         "help_as": "Size of the arrow indicating the client (consultand).",
         "label_pbs": "13. Proband 'P' size",
         "help_pbs": "Font size of the 'P' indicating the proband.",
+        "label_svp": "Native SVG preview",
+        "help_svp": "Show the chart as SVG drawn by the browser instead of a rendered image. Much faster for large pedigrees; fonts may differ slightly. SVG downloads always use this writer.",
+        "label_mp": "Raster Pixel Limit (MP)",
+        "help_mp": "Maximum size in megapixels of the on-screen image and the PNG, JPEG and TIFF downloads. The chart is sized to its content; very large pedigrees are exported at a lower DPI to stay within this limit.",
         "expander_edit": "Edit Data (Table View)",
         "sub_meta": "Metadata",
         "comments_label": "Comments",
@@ -58,7 +64,28 @@ LANGUAGES = {
         "chart_header": "Pedigree Chart",
         "download_header": "Download Options",
         "btn_json": "Download JSON",
-        "success_load": "Loaded {} Data!"
+        "success_load": "Loaded {} Data!",
+        "label_lt": "Convergence tolerance",
+        "help_lt": "Stop layout adjustment once no symbol moves more than this distance in a sweep. 0 runs a fixed number of iterations. With a tolerance, iterations continue until the layout settles and the iteration setting is ignored.",
+        "label_ltb": "Layout time budget (s)",
+        "help_ltb": "Maximum time spent on layout adjustment. 0 means no limit.",
+        "layout_converged": "Layout converged after {} iterations (residual {:.3g}).",
+        "layout_not_converged": "Layout did not converge: stopped after {} iterations (residual {:.3g}).",
+        "label_sc": "Lay out unrelated families separately",
+        "help_sc": "Lay out each unconnected family on its own and place them side by side. This changes the arrangement, not the speed.",
+        "label_ml": "Multilevel layout",
+        "help_ml": "Lay out a simplified chart with couples and siblings merged first, then refine it step by step. Keeps couples and sibships together, which often gives a more compact chart on very large pedigrees; it is slower than the normal layout.",
+        "label_cb": "Crossing reduction time (s)",
+        "help_cb": "Time spent reordering each generation to reduce crossing lines before layout. 0 keeps the ID order.",
+        "layout_cached": "Layout reused from cache ({} hits, {} misses).",
+        "layout_tidy_fallback": "This pedigree has loops (e.g. a consanguineous couple), so Tidy Tree used Children to Parents instead.",
+        "raster_too_large": "This chart is too wide for a legible image within the pixel limit; use the SVG or Deep Zoom download.",
+        "layout_crossings": "Line crossings reduced from {} to {}.",
+        "layout_restored": "Layout restored from the positions saved in the file.",
+        "ids_renumbered": "IDs renumbered.",
+        "label_renumber": "Renumber IDs",
+        "help_renumber": "Renumber every generation left to right as shown in the chart (II-1, II-2, ...) and update all references.",
+        "help_pinned": "Keep this individual at its saved position."
     },
     "Japanese": {
         "title": "HeredicTree",
@@ -94,8 +121,8 @@ LANGUAGES = {
         "label_ai": "6. レイアウト調整の反復回数",
         "help_ai": "レイアウトの最適化を行う反復回数を設定します。値が大きいほど時間がかかりますが、配置が改善される場合があります。",
         "label_lp": "7. レイアウト優先順位",
-        "help_lp": "家系図のレイアウト方向を選択します。",
-        "lp_options": ["子から親へ", "親から子へ"],
+        "help_lp": "家系図のレイアウト方向を選択します。最小二乗は各世代を親と子にできるだけ近づけて一度に配置し、方向同士の綱引きなく収束します。整列ツリーはループのない家系図を一度で配置し、婚姻で結ばれた家系は横に並べます。ループ（近親婚など）を含む家系図では「子から親へ」を使用します。",
+        "lp_options": ["子から親へ", "親から子へ", "最小二乗（等調回帰）", "整列ツリー（子孫）"],
         "sub_visual": "視覚スタイル",
         "label_ss": "8. シンボルのサイズ",
         "help_ss": "家系図上のシンボル（ノード）のサイズを設定します。",
@@ -105,10 +132,16 @@ LANGUAGES = {
         "help_fs": "家系図上のラベルのフォントサイズを設定します。",
         "label_lo": "11. ラベルの垂直位置",
         "help_lo": "家系図上のラベルの垂直位置を調整します。",
+        "label_pl": "ラベルの重なりを回避",
+        "help_pl": "線・シンボル・他のラベルと重なるラベルを、シンボルの横や下の空いている位置に移動します。",
         "label_as": "12. クライエント矢印サイズ",
         "help_as": "来談者（Client）を示す矢印の大きさを設定します。",
         "label_pbs": "13. 発端者(P)サイズ",
         "help_pbs": "発端者を示す「P」の文字サイズを設定します。",
+        "label_svp": "ネイティブSVGプレビュー",
+        "help_svp": "描画済み画像の代わりに、ブラウザが描画するSVGで家系図を表示します。大きな家系図で大幅に高速です。フォントがわずかに異なる場合があります。SVGのダウンロードは常にこの方式で出力されます。",
+        "label_mp": "画像の最大ピクセル数 (MP)",
+        "help_mp": "画面表示とPNG・JPEG・TIFFダウンロードの最大サイズ（メガピクセル）。家系図のサイズは内容に合わせて決まり、非常に大きな家系図はこの上限内に収まるよう低いDPIで出力されます。",
         "expander_edit": "データ編集（テーブル表示）",
         "sub_meta": "メタデータ",
         "comments_label": "備考・コメント",
@@ -117,7 +150,28 @@ LANGUAGES = {
         "chart_header": "家系図プレビュー",
         "download_header": "ダウンロード・オプション",
         "btn_json": "JSONファイルをダウンロード",
-        "success_load": "{}データを読み込みました！"
+        "success_load": "{}データを読み込みました！",
+        "label_lt": "収束許容値",
+        "help_lt": "1回の調整でシンボルの移動量がこの値以下になった時点でレイアウト調整を終了します。0の場合は固定回数の反復を行います。許容値を設定した場合、反復回数の設定は使われず、配置が安定するまで反復します。",
+        "label_ltb": "レイアウト計算の制限時間 (秒)",
+        "help_ltb": "レイアウト調整に使う最大時間です。0は無制限です。",
+        "layout_converged": "レイアウトは{}回の反復で収束しました (残差 {:.3g})。",
+        "layout_not_converged": "レイアウトは収束しませんでした: {}回の反復で終了 (残差 {:.3g})。",
+        "label_sc": "無関係な家系を個別にレイアウト",
+        "help_sc": "つながりのない家系ごとにレイアウトし、横に並べて配置します。配置が変わるだけで、速くはなりません。",
+        "label_ml": "マルチレベルレイアウト",
+        "help_ml": "夫婦と同胞をまとめた簡略図を先にレイアウトし、段階的に詳細化します。夫婦と同胞がまとまるため、非常に大きな家系図ではよりコンパクトな図になることが多いですが、通常のレイアウトより時間がかかります。",
+        "label_cb": "交差削減の時間（秒）",
+        "help_cb": "レイアウト前に各世代の並び順を変えて線の交差を減らす時間です。0 の場合はID順のままです。",
+        "layout_cached": "キャッシュのレイアウトを再利用しました（ヒット {} 回、ミス {} 回）。",
+        "layout_tidy_fallback": "この家系図はループ（近親婚など）を含むため、整列ツリーの代わりに「子から親へ」を使用しました。",
+        "raster_too_large": "この家系図は画素数の上限内では判読できる画像にならないため、SVGまたはDeep Zoomでダウンロードしてください。",
+        "layout_crossings": "線の交差を {} から {} に減らしました。",
+        "layout_restored": "ファイルに保存された座標からレイアウトを復元しました。",
+        "ids_renumbered": "IDを振り直しました。",
+        "label_renumber": "IDを振り直す",
+        "help_renumber": "各世代を家系図の表示どおり左から右へ振り直し（II-1, II-2, ...）、すべての参照を更新します。",
+        "help_pinned": "この人物を保存された位置に固定します。"
     },
     "Español": {
         "title": "HeredicTree",
@@ -153,8 +207,8 @@ LANGUAGES = {
         "label_ai": "6. Iteraciones de ajuste de diseño",
         "help_ai": "Número de iteraciones para la optimización del diseño. Valores más altos toman más tiempo pero pueden mejorar el diseño.",
         "label_lp": "7. Prioridad de diseño",
-        "help_lp": "Elija la dirección de diseño para el gráfico de pedigree.",
-        "lp_options": ["De hijos a padres (de arriba hacia abajo)", "De padres a hijos (de abajo hacia arriba)"],
+        "help_lp": "Elija la dirección de diseño para el gráfico de pedigree. Mínimos cuadrados coloca cada generación lo más cerca posible de padres e hijos en un solo paso y suele estabilizarse sin que las direcciones compitan. Árbol ordenado coloca los pedigrees sin bucles en una sola pasada, con las familias unidas por matrimonio una junto a otra; en pedigrees con bucles (p. ej. parejas consanguíneas) se usa De hijos a padres.",
+        "lp_options": ["De hijos a padres (de arriba hacia abajo)", "De padres a hijos (de abajo hacia arriba)", "Mínimos cuadrados (isotónica)", "Árbol ordenado (descendientes)"],
         "sub_visual": "Estilo visual",
         "label_ss": "8. Tamaño del símbolo",
         "help_ss": "Tamaño de los símbolos (nodos) en el gráfico de pedigree.",
@@ -164,10 +218,16 @@ LANGUAGES = {
         "help_fs": "Tamaño de fuente de las etiquetas en el gráfico de pedigree.",
         "label_lo": "11. Posición vertical de la etiqueta",
         "help_lo": "Ajuste de la posición vertical de las etiquetas en el gráfico de pedigree.",
+        "label_pl": "Evitar superposición de etiquetas",
+        "help_pl": "Mueve las etiquetas que se superpondrían con líneas, símbolos u otras etiquetas a un lugar libre junto a su símbolo o debajo de él.",
         "label_as": "12. Tamaño de flecha (Cliente)",
         "help_as": "Tamaño de la flecha que indica el cliente.",
         "label_pbs": "13. Tamaño de 'P' (Probando)",
         "help_pbs": "Tamaño de fuente de la 'P' que indica el probando.",
+        "label_svp": "Vista previa SVG nativa",
+        "help_svp": "Muestra el gráfico como SVG dibujado por el navegador en lugar de una imagen renderizada. Mucho más rápido en genealogías grandes; las fuentes pueden variar ligeramente. Las descargas SVG siempre usan este método.",
+        "label_mp": "Límite de píxeles (MP)",
+        "help_mp": "Tamaño máximo en megapíxeles de la imagen en pantalla y de las descargas PNG, JPEG y TIFF. El gráfico se dimensiona según su contenido; las genealogías muy grandes se exportan con menos DPI para respetar este límite.",
         "expander_edit": "Editar datos (vista de tabla)",
         "sub_meta": "Metadatos",
         "comments_label": "Comentarios",
@@ -176,7 +236,28 @@ LANGUAGES = {
         "chart_header": "Gráfico de pedigree",
         "download_header": "Opciones de descarga",
         "btn_json": "Descargar JSON",
-        "success_load": "¡Datos de {} cargados!"
+        "success_load": "¡Datos de {} cargados!",
+        "label_lt": "Tolerancia de convergencia",
+        "help_lt": "Detiene el ajuste del diseño cuando ningún símbolo se mueve más de esta distancia en una pasada. 0 ejecuta un número fijo de iteraciones. Con una tolerancia, se itera hasta que el diseño se estabiliza y se ignora el número de iteraciones.",
+        "label_ltb": "Tiempo máximo de diseño (s)",
+        "help_ltb": "Tiempo máximo dedicado al ajuste del diseño. 0 significa sin límite.",
+        "layout_converged": "El diseño convergió tras {} iteraciones (residuo {:.3g}).",
+        "layout_not_converged": "El diseño no convergió: se detuvo tras {} iteraciones (residuo {:.3g}).",
+        "label_sc": "Distribuir familias no relacionadas por separado",
+        "help_sc": "Distribuye cada familia no conectada por separado y las coloca una al lado de la otra. Cambia la disposición, no la velocidad.",
+        "label_ml": "Distribución multinivel",
+        "help_ml": "Distribuye primero un gráfico simplificado con parejas y hermanos agrupados y luego lo refina paso a paso. Mantiene juntas las parejas y los hermanos, lo que suele dar un gráfico más compacto en genealogías muy grandes; es más lento que la distribución normal.",
+        "label_cb": "Tiempo de reducción de cruces (s)",
+        "help_cb": "Tiempo dedicado a reordenar cada generación para reducir los cruces de líneas antes de la distribución. 0 mantiene el orden de ID.",
+        "layout_cached": "Diseño reutilizado de la caché ({} aciertos, {} fallos).",
+        "layout_tidy_fallback": "Este pedigree contiene bucles (p. ej. una pareja consanguínea), por lo que Árbol ordenado usó De hijos a padres.",
+        "raster_too_large": "Este gráfico es demasiado ancho para una imagen legible dentro del límite de píxeles; use la descarga SVG o Deep Zoom.",
+        "layout_crossings": "Cruces de líneas reducidos de {} a {}.",
+        "layout_restored": "Distribución restaurada a partir de las posiciones guardadas en el archivo.",
+        "ids_renumbered": "ID renumerados.",
+        "label_renumber": "Renumerar ID",
+        "help_renumber": "Renumera cada generación de izquierda a derecha tal como aparece en el gráfico (II-1, II-2, ...) y actualiza todas las referencias.",
+        "help_pinned": "Mantiene a esta persona en su posición guardada."
     },
     "Deutsch": {
         "title": "HeredicTree",
@@ -212,8 +293,8 @@ LANGUAGES = {
         "label_ai": "6. Layout-Anpassungsiterationen",
         "help_ai": "Anzahl der Iterationen zur Layout-Optimierung. Höhere Werte dauern länger, können das Layout jedoch verbessern.",
         "label_lp": "7. Layout-Priorität",
-        "help_lp": "Wählen Sie die Layout-Richtung für das Pedigree-Diagramm.",
-        "lp_options": ["Von Kindern zu Eltern (Top-down)", "Von Eltern zu Kindern (Bottom-up)"],
+        "help_lp": "Wählen Sie die Layout-Richtung für das Pedigree-Diagramm. Kleinste Quadrate platziert jede Generation in einem Schritt möglichst nah an Eltern und Kindern und stabilisiert sich meist, ohne dass die Richtungen gegeneinander arbeiten. Geordneter Baum ordnet Stammbäume ohne Schleifen in einem Durchgang an, durch Heirat verbundene Familien nebeneinander; bei Schleifen (z. B. blutsverwandten Paaren) wird Von Kindern zu Eltern verwendet.",
+        "lp_options": ["Von Kindern zu Eltern (Top-down)", "Von Eltern zu Kindern (Bottom-up)", "Kleinste Quadrate (isoton)", "Geordneter Baum (Nachkommen)"],
         "sub_visual": "Visueller Stil",
         "label_ss": "8. Symbolgröße",
         "help_ss": "Größe der Symbole (Knoten) im Pedigree-Diagramm.",
@@ -223,10 +304,16 @@ LANGUAGES = {
         "help_fs": "Schriftgröße der Beschriftungen im Pedigree-Diagramm.",
         "label_lo": "11. Vertikale Position der Beschriftung",
         "help_lo": "Vertikale Positionsanpassung für Beschriftungen im Pedigree-Diagramm.",
+        "label_pl": "Überlappende Beschriftungen vermeiden",
+        "help_pl": "Verschiebt Beschriftungen, die Linien, Symbole oder andere Beschriftungen überdecken würden, an eine freie Stelle neben oder unter ihrem Symbol.",
         "label_as": "12. Pfeilgröße (Klient)",
         "help_as": "Größe des Pfeils, der den Klienten anzeigt.",
         "label_pbs": "13. Größe 'P' (Proband)",
         "help_pbs": "Schriftgröße des 'P', das den Probanden anzeigt.",
+        "label_svp": "Native SVG-Vorschau",
+        "help_svp": "Zeigt das Diagramm als vom Browser gezeichnetes SVG statt als gerendertes Bild. Bei großen Stammbäumen deutlich schneller; Schriften können leicht abweichen. SVG-Downloads verwenden immer dieses Verfahren.",
+        "label_mp": "Pixelgrenze (MP)",
+        "help_mp": "Maximale Größe in Megapixeln des Bildschirmbilds und der PNG-, JPEG- und TIFF-Downloads. Das Diagramm wird an seinen Inhalt angepasst; sehr große Stammbäume werden mit geringerer DPI exportiert, um diese Grenze einzuhalten.",
         "expander_edit": "Daten bearbeiten (Tabellenansicht)",
         "sub_meta": "Metadaten",
         "comments_label": "Kommentare",
@@ -235,6 +322,27 @@ LANGUAGES = {
         "chart_header": "Pedigree-Diagramm",
         "download_header": "Download-Optionen",
         "btn_json": "JSON herunterladen",
-        "success_load": "{} Daten geladen!"
+        "success_load": "{} Daten geladen!",
+        "label_lt": "Konvergenztoleranz",
+        "help_lt": "Beendet die Layout-Anpassung, sobald sich kein Symbol in einem Durchlauf weiter als diese Distanz bewegt. 0 führt eine feste Anzahl von Iterationen aus. Mit Toleranz wird iteriert, bis sich das Layout stabilisiert; die Iterationszahl wird ignoriert.",
+        "label_ltb": "Zeitbudget für das Layout (s)",
+        "help_ltb": "Maximale Zeit für die Layout-Anpassung. 0 bedeutet kein Limit.",
+        "layout_converged": "Layout nach {} Iterationen konvergiert (Residuum {:.3g}).",
+        "layout_not_converged": "Layout nicht konvergiert: nach {} Iterationen beendet (Residuum {:.3g}).",
+        "label_sc": "Nicht verwandte Familien getrennt anordnen",
+        "help_sc": "Ordnet jede nicht verbundene Familie einzeln an und platziert sie nebeneinander. Das ändert die Anordnung, nicht die Geschwindigkeit.",
+        "label_ml": "Mehrstufige Anordnung",
+        "help_ml": "Ordnet zuerst ein vereinfachtes Diagramm mit zusammengefassten Paaren und Geschwistern an und verfeinert es dann schrittweise. Hält Paare und Geschwister zusammen, was bei sehr großen Stammbäumen oft ein kompakteres Diagramm ergibt; langsamer als die normale Anordnung.",
+        "label_cb": "Zeit für Kreuzungsreduktion (s)",
+        "help_cb": "Zeit, um vor der Anordnung jede Generation umzusortieren und Linienkreuzungen zu verringern. 0 behält die ID-Reihenfolge bei.",
+        "layout_cached": "Layout aus dem Cache wiederverwendet ({} Treffer, {} Fehlschläge).",
+        "layout_tidy_fallback": "Dieser Stammbaum enthält Schleifen (z. B. ein blutsverwandtes Paar), daher wurde statt Geordneter Baum Von Kindern zu Eltern verwendet.",
+        "raster_too_large": "Dieses Diagramm ist zu breit für ein lesbares Bild innerhalb der Pixelgrenze; verwenden Sie den SVG- oder Deep-Zoom-Download.",
+        "layout_crossings": "Linienkreuzungen von {} auf {} reduziert.",
+        "layout_restored": "Layout aus den in der Datei gespeicherten Positionen wiederhergestellt.",
+        "ids_renumbered": "IDs neu nummeriert.",
+        "label_renumber": "IDs neu nummerieren",
+        "help_renumber": "Nummeriert jede Generation von links nach rechts wie im Diagramm dargestellt (II-1, II-2, ...) und aktualisiert alle Verweise.",
+        "help_pinned": "Hält diese Person an ihrer gespeicherten Position fest."
     }
 }
@@ -6,7 +6,11 @@ import pandas as pd
 import logging
 import copy
 
-from parameter import FONT_FILES, SYSTEM_FONTS
+from parameter import (
+    FONT_FILES, SYSTEM_FONTS, FILL_BITS, ROMAN_DIGITS, ROMAN_TO_INT, INT_TO_ROMAN,
+    FLAG_DONOR, FLAG_SURROGATE, FLAG_DECEASED, FLAG_PROBAND, FLAG_CLIENT,
+    FLAG_DOCUMENTED, FLAG_CARRIER, FLAG_PREGNANCY, FLAG_PINNED,
+)
 
 
 def get_custom_fonts():
@@ -91,6 +95,87 @@ def parse_list_string(value, separator=","):
     return [x.strip() for x in normalized.split(separator) if x.strip()]
 
 
+def parse_affected_codes(value):
+    """Parse the 'affected' field (string or list) into a list of codes."""
+    if isinstance(value, list):
+        return [str(x).strip() for x in value if str(x).strip()]
+    return parse_list_string(value)
+
+
+def int_to_roman(n):
+    """Roman numeral for any positive integer (generation labels)."""
+    if n in INT_TO_ROMAN:
+        return INT_TO_ROMAN[n]
+    if n < 1:
+        return str(n)
+    
+    digits = []
+    for value, numeral in ROMAN_DIGITS:
+        count, n = divmod(n, value)
+        digits.append(numeral * count)
+    return "".join(digits)
+
+
+def roman_to_int(text):
+    """Value of a Roman numeral written in canonical form, or None (e.g. 'IIII', 'A')."""
+    if text in ROMAN_TO_INT:
+        return ROMAN_TO_INT[text]
+    if not text or any(c not in "IVXLCDM" for c in text):
+        return None
+    
+    total = 0
+    pos = 0
+    for value, numeral in ROMAN_DIGITS:
+        while text.startswith(numeral, pos):
+            total += value
+            pos += len(numeral)
+    # Reject non-canonical spellings such as 'IIII' or 'VX'
+    if pos != len(text) or int_to_roman(total) != text:
+        return None
+    return total
+
+
+def _is_true(value):
+    return value is True or str(value).lower() == 'true'
+
+
+def parse_individual_flags(person):
+    """
+    Normalize an individual record once into typed flags.
+    Donor/surrogate also honor the legacy 'D'/'S' affected codes.
+    Returns:
+        tuple: (flags, fill) bit masks, see FLAG_* and FILL_CODES in parameter.py
+    """
+    codes = parse_affected_codes(person.get("affected", ""))
+    
+    flags = 0
+    if _is_true(person.get("donor")) or "D" in codes:
+        flags |= FLAG_DONOR
+    if _is_true(person.get("surrogate")) or "S" in codes:
+        flags |= FLAG_SURROGATE
+    if person.get("deceased"):
+        flags |= FLAG_DECEASED
+    if person.get("proband"):
+        flags |= FLAG_PROBAND
+    if person.get("client"):
+        flags |= FLAG_CLIENT
+    if person.get("documented"):
+        flags |= FLAG_DOCUMENTED
+    if person.get("carrier"):
+        flags |= FLAG_CARRIER
+    if person.get("pinned"):
+        flags |= FLAG_PINNED
+    pregnancy = person.get("pregnancy", "")
+    if pregnancy is True or str(pregnancy).upper() == "P":
+        flags |= FLAG_PREGNANCY
+    
+    fill = 0
+    for code in codes:
+        fill |= FILL_BITS.get(code, 0)
+    
+    return flags, fill
+
+
 def parse_multiples_field(value):
     """
     Parse multiples field from string format to list of dictionaries.
@@ -141,7 +226,7 @@ def prepare_individual_dataframe(json_data):
     df_ind = pd.DataFrame(data_list)
     
     str_cols = ["id", "gender", "affected", "label", "note_idv"]
-    bool_cols = ["proband", "client", "carrier", "documented", "deceased", "pregnancy", "donor", "surrogate"]
+    bool_cols = ["proband", "client", "carrier", "documented", "deceased", "pregnancy", "donor", "surrogate", "pinned"]
     
     # Initialize string columns
     for col in str_cols:
@@ -234,7 +319,7 @@ def prepare_relationships_dataframe(json_data):
 def process_individuals(df_ind):
     """Process individuals dataframe into JSON format."""
     individuals = df_ind.to_dict(orient="records")
-    bool_fields = ["proband", "client", "documented", "deceased", "pregnancy", "carrier", "donor", "surrogate"]
+    bool_fields = ["proband", "client", "documented", "deceased", "pregnancy", "carrier", "donor", "surrogate", "pinned"]
     
     for row in individuals:
         for key, value in row.items():
@@ -286,3 +371,51 @@ def process_dataframe_for_json(df_ind, df_rel, current_meta, layout_config):
         "individual": individuals,
         "relationships": relationships
     }
+
+
+# ========================================
+# ID Renumbering
+# ========================================
+
+def _remap_list(value, mapping):
+    """Remap a list of IDs, or a comma-separated string of them."""
+    if isinstance(value, str):
+        return ",".join(mapping.get(x, x) for x in parse_list_field(value))
+    return [mapping.get(x, x) for x in value]
+
+
+def remap_ids(json_data, mapping):
+    """
+    Rewrite every ID through `mapping` ({old: new}) in one pass over the records:
+    individual ids, p1/p2, children, adopted_in, adopted_out, multiples and
+    saved positions. IDs missing from `mapping` are kept.
+    Returns a new dict; the input is not modified.
+    """
+    def remap(pid):
+        return mapping.get(pid, pid)
+    
+    individuals = [dict(p, id=remap(p.get("id"))) for p in json_data.get("individual", [])]
+    
+    relationships = []
+    for rel in json_data.get("relationships", []):
+        rel = dict(rel)
+        for field in ("p1", "p2"):
+            if rel.get(field):
+                rel[field] = remap(rel[field])
+        for field in ("children", "adopted_in", "adopted_out"):
+            if rel.get(field):
+                rel[field] = _remap_list(rel[field], mapping)
+        
+        multiples = rel.get("multiples")
+        if isinstance(multiples, str):
+            multiples = parse_multiples_field(multiples)
+        if multiples:
+            rel["multiples"] = [dict(m, ids=[remap(x) for x in m.get("ids", [])]) for m in multiples]
+        relationships.append(rel)
+    
+    remapped = dict(json_data, individual=individuals, relationships=relationships)
+    positions = json_data.get("positions")
+    if positions:
+        # The saved key no longer matches: keep the positions as a warm start only
+        remapped["positions"] = {"x": {remap(pid): x for pid, x in positions.get("x", {}).items()}}
+    return remapped
@@ -0,0 +1,28 @@
+import glob
+import json
+import os
+import sys
+
+import pytest
+
+APP_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app")
+# The app's modules import each other by their flat names
+sys.path.insert(0, APP_DIR)
+
+from parameter import DEFAULT_LAYOUT  # noqa: E402
+
+SAMPLES = sorted(glob.glob(os.path.join(APP_DIR, "samples", "*.json")))
+
+
+def load_sample(path):
+    """(data, config) of a bundled sample, with its own layout settings applied."""
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    config = dict(DEFAULT_LAYOUT)
+    config.update(data.get("layout", {}))
+    return data, config
+
+
+@pytest.fixture(params=SAMPLES, ids=lambda path: os.path.basename(path).split(".")[0])
+def sample(request):
+    return load_sample(request.param)
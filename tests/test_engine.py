@@ -0,0 +1,90 @@
+import copy
+import json
+import os
+
+import pytest
+
+from conftest import SAMPLES, load_sample
+from engine import PedigreeEngine
+from parameter import LAYOUT_PRIORITY_ISOTONIC, LAYOUT_PRIORITY_TIDY
+
+# Positions from the engine before the NodeStore rewrite (the baseline
+# commit), per sample, priority and adjustment_iterations
+with open(os.path.join(os.path.dirname(__file__), "data", "baseline_layouts.json"), encoding="utf-8") as f:
+    BASELINE = json.load(f)
+
+# The baseline sums over sets of string IDs, so its own output varies
+# between runs in the last bits
+BASELINE_TOLERANCE = 1e-9
+
+BASELINE_RUNS = [
+    (path, priority, int(iterations))
+    for path in SAMPLES
+    for priority, runs in BASELINE[os.path.basename(path)].items()
+    for iterations in runs
+]
+
+LAYOUT_MODES = {
+    "top-down": {},
+    "bottom-up": {"priority": "Parents to Children (Bottom-up)"},
+    "vectorized": {"vectorized": True},
+    "isotonic": {"priority": LAYOUT_PRIORITY_ISOTONIC},
+    "tidy": {"priority": LAYOUT_PRIORITY_TIDY},
+    "multilevel": {"multilevel": True},
+    "crossings": {"crossing_budget": 0.1},
+    "split": {"split_components": True, "workers": 1},
+    "tolerance": {"tolerance": 0.01},
+}
+
+
+@pytest.mark.parametrize("vectorized", [False, True], ids=["default", "vectorized"])
+@pytest.mark.parametrize(
+    "path, priority, iterations", BASELINE_RUNS,
+    ids=[f"{os.path.basename(p).split('.')[0]}-{pr.split('(')[1][:-1]}-{it}" for p, pr, it in BASELINE_RUNS],
+)
+def test_layout_matches_baseline(path, priority, iterations, vectorized):
+    data, config = load_sample(path)
+    nodes = PedigreeEngine(data, config).calculate_layout(iterations, priority, vectorized=vectorized)
+    expected = BASELINE[os.path.basename(path)][priority][str(iterations)]
+    assert nodes.keys() == expected.keys()
+    for pid, (x, y) in expected.items():
+        assert nodes[pid]["x"] == pytest.approx(x, abs=BASELINE_TOLERANCE)
+        assert nodes[pid]["y"] == y
+
+
+@pytest.mark.parametrize("mode", LAYOUT_MODES.values(), ids=LAYOUT_MODES.keys())
+def test_layout_keeps_minimum_spacing(sample, mode):
+    data, config = sample
+    engine = PedigreeEngine(data, config)
+    nodes = engine.calculate_layout(1, **mode)
+    store = engine.store
+    by_gen = {}
+    for pid, node in nodes.items():
+        by_gen.setdefault(node["gen"], []).append(store.index[pid])
+    # Neighbours in x keep the partner, sibling or family gap between them
+    for nids in by_gen.values():
+        nids.sort(key=store.x.__getitem__)
+        for left, right in zip(nids, nids[1:]):
+            gap = engine.NODE_WIDTH + engine._get_required_spacing(left, right)
+            assert store.x[right] - store.x[left] >= gap - 1e-9
+
+
+def test_relayout_keeps_the_layout_budget():
+    data, config = load_sample(SAMPLES[1])
+    engine = PedigreeEngine(data, config)
+    engine.calculate_layout(1, tolerance=0.01)
+
+    edited = copy.deepcopy(data)
+    edited["individual"].append({"id": "II-99", "gender": "F"})
+    edited["relationships"][0]["children"].append("II-99")
+    engine.sync(edited)
+    engine.relayout()
+    assert "dirty_generations" in engine.layout_stats
+    assert engine.layout_stats["converged"] is True
+    assert engine.layout_stats["residual"] is not None
+
+
+def test_relayout_lays_out_a_new_engine():
+    data, config = load_sample(SAMPLES[1])
+    nodes = PedigreeEngine(data, config).relayout()
+    assert nodes.keys() == PedigreeEngine(data, config).calculate_layout(1).keys()
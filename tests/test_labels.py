@@ -0,0 +1,49 @@
+from benchmark import make_config, make_wide_pedigree
+from engine import PedigreeEngine
+from labels import SpatialHash
+from scene import build_scene
+
+
+def overlapping_labels(scene):
+    grid = SpatialHash()
+    pairs = 0
+    for t in scene.texts:
+        if t.background:
+            box = scene.text_box(t)
+            pairs += grid.count(box)
+            grid.add_box(box)
+    return pairs
+
+
+def test_spatial_hash_counts_boxes_and_segments():
+    grid = SpatialHash(cell=1.0)
+    grid.add_box((0.0, 0.0, 1.0, 1.0))
+    grid.add_segment(5.0, 0.0, 5.0, 10.0)
+    grid.add_segment(0.0, 10.0, 10.0, 0.0)
+    assert grid.count((0.5, 0.5, 2.0, 2.0)) == 1
+    assert grid.count((4.5, 2.0, 5.5, 3.0)) == 1
+    # The diagonal's bounding box covers this one, the segment itself does not
+    assert grid.count((0.5, 2.0, 1.5, 3.0)) == 0
+    assert grid.count((4.0, 4.0, 6.0, 6.0)) == 2
+    assert grid.count((4.0, 4.0, 6.0, 6.0), limit=1) == 1
+    assert grid.count((-1.0, -1.0, 6.0, 6.0), within=(-1.0, -1.0, 2.0, 2.0)) == 2
+
+
+def test_placed_labels_overlap_less():
+    data = make_wide_pedigree(30, 4)
+    for k, person in enumerate(data["individual"]):
+        person["label"] = f"label {k}: long enough to collide"
+    nodes = PedigreeEngine(data, make_config()).calculate_layout(1)
+    fixed = build_scene(nodes, data["relationships"], make_config(place_labels=False))
+    placed = build_scene(nodes, data["relationships"], make_config())
+    assert overlapping_labels(fixed) > 0
+    assert overlapping_labels(placed) < overlapping_labels(fixed)
+
+
+def test_samples_get_no_more_overlaps(sample):
+    data, config = sample
+    nodes = PedigreeEngine(data, config).calculate_layout(config["adjustment_iterations"])
+    fixed = build_scene(nodes, data["relationships"], dict(config, place_labels=False))
+    placed = build_scene(nodes, data["relationships"], dict(config, place_labels=True))
+    assert [t.text for t in placed.texts] == [t.text for t in fixed.texts]
+    assert overlapping_labels(placed) <= overlapping_labels(fixed)
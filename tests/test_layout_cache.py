@@ -0,0 +1,68 @@
+import copy
+
+import pytest
+
+from conftest import SAMPLES, load_sample
+from engine import PedigreeEngine
+from layout_cache import LayoutCache
+
+
+def key_of(data, config, **layout_args):
+    return LayoutCache.make_key(data["individual"], data["relationships"], config, dict({"adjustment_iterations": 1}, **layout_args))
+
+
+def edited(data, edit):
+    data = copy.deepcopy(data)
+    edit(data)
+    return data
+
+
+def set_field(field, value, index=0, table="individual"):
+    def edit(data):
+        data[table][index][field] = value
+    return edit
+
+
+@pytest.mark.parametrize("edit", [
+    set_field("deceased", True),
+    set_field("affected", "A"),
+    set_field("label", "renamed"),
+    set_field("proband", True),
+    set_field("carrier", True),
+    set_field("divorced", "divorced", table="relationships"),
+    set_field("consanguinity", True, table="relationships"),
+], ids=["deceased", "affected", "label", "proband", "carrier", "divorced", "consanguinity"])
+def test_key_ignores_what_does_not_move_nodes(edit):
+    data, config = load_sample(SAMPLES[1])
+    assert key_of(edited(data, edit), config) == key_of(data, config)
+
+
+@pytest.mark.parametrize("edit", [
+    set_field("donor", True),
+    set_field("surrogate", True),
+    set_field("pinned", True),
+    set_field("children", [], table="relationships"),
+    set_field("p2", "", table="relationships"),
+    lambda data: data["individual"].append({"id": "III-99", "gender": "F"}),
+], ids=["donor", "surrogate", "pinned", "children", "partner", "individual"])
+def test_key_follows_what_moves_nodes(edit):
+    data, config = load_sample(SAMPLES[1])
+    assert key_of(edited(data, edit), config) != key_of(data, config)
+
+
+def test_key_follows_geometry_and_layout_settings():
+    data, config = load_sample(SAMPLES[1])
+    key = key_of(data, config)
+    assert key_of(data, dict(config, font_size=20)) == key
+    assert key_of(data, dict(config, partner_spacing=3.0)) != key
+    assert key_of(data, config, priority="Parents to Children (Bottom-up)") != key
+
+
+def test_cached_layout_matches_a_fresh_one():
+    data, config = load_sample(SAMPLES[2])
+    cache = LayoutCache()
+    fresh = PedigreeEngine(data, config).calculate_layout(1, cache=cache)
+    engine = PedigreeEngine(data, config)
+    cached = engine.calculate_layout(1, cache=cache)
+    assert engine.layout_stats["cached"] is True
+    assert {pid: n["x"] for pid, n in cached.items()} == {pid: n["x"] for pid, n in fresh.items()}
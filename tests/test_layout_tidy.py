@@ -0,0 +1,58 @@
+import os
+
+import pytest
+
+from conftest import SAMPLES, load_sample
+from engine import PedigreeEngine
+from parameter import LAYOUT_PRIORITY_TIDY
+
+# Samples with consanguineous couples: real loops, laid out by the passes
+LOOPED = {"2. Habsburg_Pedigree.json", "3. Einstein_Pedigree.json"}
+
+
+@pytest.mark.parametrize("path", SAMPLES, ids=os.path.basename)
+def test_samples_use_tidy_tree_unless_looped(path):
+    data, config = load_sample(path)
+    engine = PedigreeEngine(data, config)
+    nodes = engine.calculate_layout(config["adjustment_iterations"], LAYOUT_PRIORITY_TIDY)
+    assert engine.layout_stats["tidy"] is (os.path.basename(path) not in LOOPED)
+
+    by_gen = {}
+    for node in nodes.values():
+        by_gen.setdefault(node["gen"], []).append(node["x"])
+    for xs in by_gen.values():
+        xs.sort()
+        assert all(b - a >= engine.NODE_WIDTH - 1e-9 for a, b in zip(xs, xs[1:]))
+
+
+def test_marriage_between_families_is_not_a_loop():
+    data = {
+        "individual": [
+            {"id": "I-1", "gender": "M"}, {"id": "I-2", "gender": "F"},
+            {"id": "I-3", "gender": "M"}, {"id": "I-4", "gender": "F"},
+            {"id": "II-1", "gender": "M"}, {"id": "II-2", "gender": "F"},
+            {"id": "III-1", "gender": "F"},
+        ],
+        "relationships": [
+            {"p1": "I-1", "p2": "I-2", "children": ["II-1"]},
+            {"p1": "I-3", "p2": "I-4", "children": ["II-2"]},
+            {"p1": "II-1", "p2": "II-2", "children": ["III-1"]},
+        ],
+    }
+    _, config = load_sample(SAMPLES[0])
+    engine = PedigreeEngine(data, config)
+    engine.calculate_layout(1, LAYOUT_PRIORITY_TIDY)
+    assert engine.layout_stats["tidy"]
+
+    # Cousins marrying close a loop
+    data["individual"] += [
+        {"id": "II-3", "gender": "F"}, {"id": "II-4", "gender": "M"}, {"id": "III-2", "gender": "M"},
+    ]
+    data["relationships"][0]["children"] = ["II-1", "II-3"]
+    data["relationships"] += [
+        {"p1": "II-4", "p2": "II-3", "children": ["III-2"]},
+        {"p1": "III-2", "p2": "III-1", "children": []},
+    ]
+    engine = PedigreeEngine(data, config)
+    engine.calculate_layout(1, LAYOUT_PRIORITY_TIDY)
+    assert not engine.layout_stats["tidy"]
@@ -0,0 +1,21 @@
+from scene import assign_lanes
+
+
+def test_enclosing_span_takes_deeper_lane():
+    # Outer U-shape listed first, as when its relationship comes first
+    spans = [(0.0, 10.0), (2.0, 4.0), (6.0, 8.0), (3.0, 7.0)]
+    lanes = assign_lanes(spans)
+    assert lanes[1] == lanes[2] == 0
+    assert lanes[3] == 1
+    assert lanes[0] == 2
+
+
+def test_lanes_do_not_share_overlapping_or_touching_spans():
+    spans = [(0.0, 5.0), (5.0, 9.0), (4.0, 12.0), (13.0, 14.0), (1.0, 2.0)]
+    lanes = assign_lanes(spans)
+    for i, (a0, a1) in enumerate(spans):
+        for j, (b0, b1) in enumerate(spans[:i]):
+            if a0 <= b1 and b0 <= a1:
+                assert lanes[i] != lanes[j]
+    # Disjoint spans share the nearest lane
+    assert lanes[3] == 0
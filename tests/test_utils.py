@@ -0,0 +1,49 @@
+import pytest
+
+from utils import int_to_roman, remap_ids, roman_to_int
+
+
+@pytest.mark.parametrize("n, numeral", [
+    (1, "I"), (4, "IV"), (9, "IX"), (14, "XIV"), (20, "XX"), (21, "XXI"),
+    (40, "XL"), (89, "LXXXIX"), (90, "XC"), (400, "CD"), (1994, "MCMXCIV"), (3999, "MMMCMXCIX"),
+])
+def test_roman_numerals(n, numeral):
+    assert int_to_roman(n) == numeral
+    assert roman_to_int(numeral) == n
+
+
+def test_roman_numerals_round_trip():
+    assert all(roman_to_int(int_to_roman(n)) == n for n in range(1, 4000))
+
+
+@pytest.mark.parametrize("text", ["", "IIII", "VX", "IC", "XXXX", "A", "ii", "I-1"])
+def test_non_canonical_roman_numerals_are_rejected(text):
+    assert roman_to_int(text) is None
+
+
+def test_remap_ids_rewrites_every_reference():
+    data = {
+        "meta": {"title": "t"},
+        "individual": [{"id": "I-2", "gender": "M"}, {"id": "I-1", "gender": "F"}, {"id": "II-1"}, {"id": "II-2"}],
+        "relationships": [{
+            "p1": "I-2", "p2": "I-1", "children": ["II-1", "II-2"],
+            "adopted_in": "II-2", "adopted_out": [],
+            "multiples": [{"type": "dz", "ids": ["II-1", "II-2"]}],
+        }],
+        "positions": {"key": "stale", "x": {"I-2": 0.0, "I-1": 3.0, "II-1": -1.0, "II-2": 4.0}},
+    }
+    mapping = {"I-2": "I-1", "I-1": "I-2", "II-2": "II-3"}
+    remapped = remap_ids(data, mapping)
+
+    assert [p["id"] for p in remapped["individual"]] == ["I-1", "I-2", "II-1", "II-3"]
+    rel = remapped["relationships"][0]
+    assert (rel["p1"], rel["p2"]) == ("I-1", "I-2")
+    assert rel["children"] == ["II-1", "II-3"]
+    assert rel["adopted_in"] == "II-3"
+    assert rel["multiples"] == [{"type": "dz", "ids": ["II-1", "II-3"]}]
+    # Saved positions follow the IDs but lose the key they were saved under
+    assert remapped["positions"] == {"x": {"I-1": 0.0, "I-2": 3.0, "II-1": -1.0, "II-3": 4.0}}
+    assert remapped["meta"] == data["meta"]
+    # The input is left as it was
+    assert data["relationships"][0]["p1"] == "I-2"
+    assert data["positions"]["key"] == "stale"